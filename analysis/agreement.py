@@ -0,0 +1,225 @@
+"""
+Inter-rater agreement of per-question grades.
+
+Each item is one question of one answer (tested model, assignment, trial,
+question). Raters are either the repeated grades of one grader model (grade_num)
+or different grader models. For every item the correct/partial/incorrect
+labels are counted once, and Fleiss' kappa and Krippendorff's alpha are then
+computed per question, per assignment and overall with grouped sums over the
+count matrix.
+
+The NUM_GRADES guidance projects how reliable the average of k grades is
+(Spearman-Brown on the single-grade alpha) and measures how far the average of
+the first k grades actually lands from the average of all of them.
+
+Usage:
+    python analysis/agreement.py [--metric interval|nominal] [--target 0.8]
+"""
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+import core
+import config  # Repo root is on sys.path via core
+
+# Columns identifying one graded question of one answer
+ITEM_KEYS = ['tested_model', 'assignment', 'trial', 'question_id']
+CATEGORIES = list(core.RESULT_SCORES)
+
+
+def rating_counts(long_df, rater='grade_num'):
+    """
+    Count labels per item.
+
+    Args:
+        long_df: Frame from core.explode_questions()
+        rater: 'grade_num' for agreement between repeated grades of each grader model, or
+            'grader_model' for agreement between grader models (each grader's ratings
+            are reduced to its most common label per item)
+
+    Returns:
+        Frame indexed by item (plus grader_model when rater='grade_num') with one
+        count column per category
+    """
+    if rater == 'grade_num':
+        keys = ['grader_model'] + ITEM_KEYS
+        labels = long_df
+    elif rater == 'grader_model':
+        keys = ITEM_KEYS
+        per_grader = long_df.groupby(ITEM_KEYS + ['grader_model', 'result'], observed=True).size()
+        # Most common label per grader and item (ties go to the lower-credit label)
+        per_grader = per_grader.reset_index(name='n').sort_values(['n', 'result'], ascending=[False, False])
+        labels = per_grader.drop_duplicates(ITEM_KEYS + ['grader_model'])
+    else:
+        raise ValueError(f"Unknown rater: {rater!r} (expected 'grade_num' or 'grader_model')")
+
+    counts = labels.groupby(keys + ['result'], observed=True).size().unstack('result', fill_value=0)
+    return counts.reindex(columns=CATEGORIES, fill_value=0)
+
+
+def _distance_matrix(metric):
+    """Squared distance between categories."""
+    if metric == 'interval':
+        values = np.array([core.RESULT_SCORES[category] for category in CATEGORIES])
+        return (values[:, None] - values[None, :]) ** 2
+    if metric == 'nominal':
+        return 1.0 - np.eye(len(CATEGORIES))
+    raise ValueError(f"Unknown metric: {metric!r} (expected 'interval' or 'nominal')")
+
+
+def agreement_table(counts, by=None, metric='interval'):
+    """
+    Fleiss' kappa and Krippendorff's alpha for groups of items.
+
+    Items rated fewer than twice are ignored. Kappa/alpha are NaN when every rating
+    in a group has the same label (there is no variation to agree on); `agreement`
+    (the observed share of agreeing rating pairs) is still reported.
+
+    Args:
+        counts: Frame from rating_counts()
+        by: Index level(s) to group by, or None for a single overall row
+        metric: Distance used by alpha ('interval' on credit 1/0.5/0, or 'nominal')
+
+    Returns:
+        Frame with n_items, n_ratings, agreement, fleiss_kappa and krippendorff_alpha
+    """
+    x = counts.to_numpy(dtype=float)
+    n_i = x.sum(axis=1)
+    pairable = n_i >= 2
+    x, n_i = x[pairable], n_i[pairable]
+    index = counts.index[pairable]
+
+    # Fleiss: share of agreeing rating pairs per item vs. chance agreement from the label mix
+    pair_agreement = ((x ** 2).sum(axis=1) - n_i) / (n_i * (n_i - 1))
+
+    # Krippendorff: disagreement observed within items vs. expected from the pooled labels
+    distance = _distance_matrix(metric)
+    coincidences = x[:, :, None] * (x[:, None, :] - np.eye(x.shape[1])) / (n_i - 1)[:, None, None]
+    observed = (coincidences * distance).sum(axis=(1, 2))
+
+    per_item = pd.DataFrame(x, columns=CATEGORIES, index=index)
+    per_item['pair_agreement'] = pair_agreement
+    per_item['observed'] = observed
+    per_item['n_ratings'] = n_i
+    grouped = per_item.groupby(level=by, observed=True) if by else per_item.groupby(np.zeros(len(x), dtype=int))
+
+    totals = grouped[CATEGORIES].sum()
+    n = totals.sum(axis=1)
+    shares = totals.div(n, axis=0)
+    chance = (shares ** 2).sum(axis=1)
+    agreement = grouped['pair_agreement'].mean()
+    expected = np.einsum('gi,ij,gj->g', totals.to_numpy(), distance, totals.to_numpy())
+    expected_disagreement = pd.Series(expected, index=totals.index).where(expected > 0)
+
+    table = pd.DataFrame({
+        'n_items': grouped.size(),
+        'n_ratings': grouped['n_ratings'].sum().astype(int),
+        'agreement': agreement,
+        'fleiss_kappa': ((agreement - chance) / (1 - chance)).where(chance < 1),
+        'krippendorff_alpha': 1 - (n - 1) * grouped['observed'].sum() / expected_disagreement,
+    })
+    if not by:
+        table.index = ['overall']
+    return table
+
+
+def grades_needed(long_df, metric='interval', target=0.8, max_grades=None):
+    """
+    Estimate how many grades per answer are needed.
+
+    Args:
+        long_df: Frame from core.explode_questions()
+        metric: Distance used by alpha
+        target: Desired reliability of the averaged grade
+        max_grades: Largest k to report (default: max(config.NUM_GRADES, grades on record))
+
+    Returns:
+        (single_alpha, recommended_k, table) where table has, for each k, the Spearman-Brown
+        `projected_reliability` and `mean_abs_diff`: the mean absolute difference between an
+        item's credit averaged over its first k grades and over all its grades
+    """
+    overall = agreement_table(rating_counts(long_df), metric=metric)
+    alpha = overall['krippendorff_alpha'].iloc[0]
+
+    # Item x grade_num matrix of credit (NaN where a grade did not rate the question)
+    scores = long_df.pivot_table(index=['grader_model'] + ITEM_KEYS, columns='grade_num', values='score',
+                                 aggfunc='first', observed=True).sort_index(axis=1).to_numpy()
+    rated = ~np.isnan(scores)
+    cum_sum = np.nancumsum(scores, axis=1)
+    cum_count = rated.cumsum(axis=1)
+    full_mean = cum_sum[:, -1] / np.maximum(cum_count[:, -1], 1)
+
+    max_grades = max_grades or max(config.NUM_GRADES, scores.shape[1])
+    rows = []
+    for k in range(1, max_grades + 1):
+        row = {'grades': k}
+        if alpha > 0:
+            row['projected_reliability'] = k * alpha / (1 + (k - 1) * alpha)
+        if k <= scores.shape[1]:
+            has_k = cum_count[:, k - 1] > 0
+            first_k_mean = cum_sum[has_k, k - 1] / cum_count[has_k, k - 1]
+            row['mean_abs_diff'] = np.abs(first_k_mean - full_mean[has_k]).mean()
+        rows.append(row)
+
+    recommended = None
+    if 0 < alpha < 1:
+        recommended = max(1, math.ceil(target * (1 - alpha) / (alpha * (1 - target))))
+    elif alpha >= 1:
+        recommended = 1
+    return alpha, recommended, pd.DataFrame(rows).set_index('grades')
+
+
+def print_agreement_report(long_df, metric='interval', target=0.8):
+    """Print agreement per question, per assignment, overall, across graders, and NUM_GRADES guidance."""
+    counts = rating_counts(long_df)
+
+    print("\n" + "="*70)
+    print(f"GRADER AGREEMENT ACROSS GRADE REPETITIONS (alpha metric: {metric})")
+    print("="*70)
+    print("\nOverall:")
+    print(agreement_table(counts, metric=metric).round(3).to_string())
+    print("\nPer assignment:")
+    print(agreement_table(counts, by=['grader_model', 'assignment'], metric=metric).round(3).to_string())
+    print("\nPer question (least reliable first):")
+    per_question = agreement_table(counts, by=['grader_model', 'assignment', 'question_id'], metric=metric)
+    print(per_question.sort_values(['krippendorff_alpha', 'agreement']).round(3).to_string())
+
+    print("\n" + "-"*70)
+    print("AGREEMENT ACROSS GRADER MODELS")
+    print("-"*70)
+    if long_df['grader_model'].nunique() < 2:
+        print("Only one grader model on record; grade with another GRADER_MODEL to compare graders.")
+    else:
+        grader_counts = rating_counts(long_df, rater='grader_model')
+        print(agreement_table(grader_counts, metric=metric).round(3).to_string())
+        print(agreement_table(grader_counts, by='assignment', metric=metric).round(3).to_string())
+
+    print("\n" + "-"*70)
+    print(f"HOW MANY GRADES? (NUM_GRADES = {config.NUM_GRADES}, target reliability {target})")
+    print("-"*70)
+    alpha, recommended, table = grades_needed(long_df, metric, target)
+    print(table.round(3).to_string())
+    if recommended is None:
+        print(f"\nSingle-grade alpha is {alpha:.3f}; more grades will not make grading reliable. "
+              "Fix the grading prompt or grader model first.")
+    else:
+        print(f"\nSingle-grade alpha {alpha:.3f}: about {recommended} grade(s) per answer reach "
+              f"reliability {target} (currently NUM_GRADES = {config.NUM_GRADES}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inter-rater agreement of per-question grades.")
+    parser.add_argument("--metric", choices=['interval', 'nominal'], default='interval',
+                        help="Distance between labels for Krippendorff's alpha")
+    parser.add_argument("--target", type=float, default=0.8, help="Target reliability for the NUM_GRADES estimate")
+    args = parser.parse_args()
+
+    _, long_df = core.load_analysis_data()
+    print_agreement_report(long_df, args.metric, args.target)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,19 @@ Analysis script for CivBench grading data.
 Loads grades and generates visualizations for model performance and grader consistency.
 """
 
-import json
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from pathlib import Path
 from collections import defaultdict
 
+import core
+
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
 plt.rcParams['font.size'] = 11
 
-def load_grades(grades_file='results/grades.jsonl'):
-    """Load grades from JSONL file."""
-    grades = []
-    with open(grades_file, 'r') as f:
-        for line in f:
-            grades.append(json.loads(line.strip()))
-    return pd.DataFrame(grades)
-
-def calculate_normalized_scores(df):
-    """Calculate normalized scores (0-1 range) for each grade."""
-    df['normalized_score'] = df['total_correct'] / df['total_questions']
-    return df
-
 def analyze_model_performance(df):
     """Calculate average performance metrics per model."""
     performance = df.groupby('tested_model').agg({
@@ -38,7 +25,7 @@ def analyze_model_performance(df):
     performance = performance.sort_values('mean_score', ascending=False)
     return performance
 
-def plot_model_performance(df, output_path='analysis/graphs/model_performance.png'):
+def plot_model_performance(df, output_path='analysis/graphs/model_performance.png', dpi=300):
     """Create bar chart of model performance with error bars."""
     performance = analyze_model_performance(df)
 
@@ -83,7 +70,7 @@ def plot_model_performance(df, output_path='analysis/graphs/model_performance.pn
                 ha='center', va='bottom', fontsize=8, alpha=0.7)
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
     print(f"✓ Saved: {output_path}")
     plt.close()
 
@@ -99,11 +86,12 @@ def analyze_grader_consistency(df):
     consistency['range'] = consistency['max'] - consistency['min']
     return consistency.sort_values('std_dev', ascending=False)
 
-def plot_grader_consistency(df, output_path='analysis/graphs/grader_consistency.png'):
+def plot_grader_consistency(df, output_path='analysis/graphs/grader_consistency.png', dpi=300):
     """Create box plots showing score distributions for each assignment/model combo."""
 
     # Create a more readable identifier
-    df['combo'] = df.apply(lambda x: f"A{x['assignment']}: {x['tested_model'].split('/')[-1].replace('_', ' ').replace('-', ' ').title()[:20]}", axis=1)
+    model_names = core.short_model_name(df['tested_model']).str.replace('_', ' ').str.replace('-', ' ').str.title()
+    df['combo'] = 'A' + df['assignment'].astype(str) + ': ' + model_names.str[:20]
 
     # Calculate number of unique combos to determine figure size
     n_combos = df['combo'].nunique()
@@ -132,7 +120,7 @@ def plot_grader_consistency(df, output_path='analysis/graphs/grader_consistency.
     ax.grid(axis='x', alpha=0.3)
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
     print(f"✓ Saved: {output_path}")
     plt.close()
 
@@ -170,8 +158,7 @@ def print_summary_stats(df):
 def main():
     """Main analysis pipeline."""
     print("Loading grades data...")
-    df = load_grades()
-    df = calculate_normalized_scores(df)
+    df, _ = core.load_analysis_data()
 
     print(f"Loaded {len(df)} grades")
 
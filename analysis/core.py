@@ -0,0 +1,170 @@
+"""
+Shared data preparation for the analysis scripts.
+
+Grades are loaded once from the results store and their `questions` dicts are
+exploded into a long-form frame (one row per graded question) with categorical
+columns, so every per-model/per-assignment/per-question aggregate is a
+vectorized groupby instead of a Python loop over rows.
+
+load_analysis_data() caches both frames as Parquet under analysis/.cache/,
+keyed by the size and mtime of the results store, so unchanged grades are not
+re-parsed on every run (requires pyarrow; without it the cache is skipped).
+"""
+
+import json
+import sys
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Repo root, for the shared results store
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+import results_store
+
+# Credit per question result (anything else counts as incorrect)
+RESULT_SCORES = {'correct': 1.0, 'partial': 0.5, 'incorrect': 0.0}
+RESULT_TYPE = pd.CategoricalDtype(list(RESULT_SCORES), ordered=True)
+
+# Columns identifying a single grade
+GRADE_KEYS = ['grader_model', 'tested_model', 'assignment', 'trial', 'grade_num']
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache'
+
+
+def short_model_name(models):
+    """Strip the provider prefix from a Series of model IDs."""
+    return models.astype(str).str.split('/').str[-1]
+
+
+def load_grades():
+    """
+    Load deduplicated grades from the results store.
+
+    Returns:
+        One row per grade, with `normalized_score` (total_correct / total_questions)
+    """
+    df = results_store.load_dataframe()
+    df['normalized_score'] = df['total_correct'] / df['total_questions']
+    return df
+
+
+def explode_questions(df):
+    """
+    Explode each grade's `questions` dict into one row per question.
+
+    Args:
+        df: Grades frame from load_grades()
+
+    Returns:
+        Long-form frame with the grade key columns plus `model`, `question_id`,
+        `question` ("A<assignment>_<question_id>"), `result` (categorical) and `score`
+    """
+    questions = df['questions']
+    lengths = questions.map(len).to_numpy()
+    rows = np.repeat(np.arange(len(df)), lengths)
+
+    long_df = df[GRADE_KEYS].iloc[rows].reset_index(drop=True)
+    long_df['grader_model'] = long_df['grader_model'].astype('category')
+    long_df['tested_model'] = long_df['tested_model'].astype('category')
+    long_df['model'] = short_model_name(long_df['tested_model']).astype('category')
+    long_df['grade_index'] = df.index.to_numpy()[rows]
+    long_df['question_id'] = pd.Categorical(list(chain.from_iterable(questions.map(dict.keys))))
+    raw_results = pd.Series(list(chain.from_iterable(questions.map(dict.values))), dtype=object)
+    long_df['result'] = raw_results.astype(RESULT_TYPE).fillna('incorrect')
+    long_df['score'] = long_df['result'].map(RESULT_SCORES).astype(float)
+    long_df['question'] = pd.Categorical(
+        'A' + long_df['assignment'].astype(str) + '_' + long_df['question_id'].astype(str)
+    )
+    return long_df
+
+
+def question_average_scores(df, long_df):
+    """
+    Average question credit (partial = 0.5) for each grade.
+
+    Returns:
+        Series aligned with df's index (grades without questions score 0)
+    """
+    scores = long_df.groupby('grade_index')['score'].mean()
+    return scores.reindex(df.index, fill_value=0.0)
+
+
+def model_assignment_scores(df, long_df, by='tested_model'):
+    """
+    Average per-grade question credit for each model and assignment.
+
+    Args:
+        df: Grades frame from load_grades()
+        long_df: explode_questions(df)
+        by: Grade column identifying the model
+
+    Returns:
+        Frame with models (`by`) as rows and assignments as columns, sorted by assignment
+    """
+    scores = df[[by, 'assignment']].assign(score=question_average_scores(df, long_df))
+    pivot = scores.groupby([by, 'assignment'])['score'].mean().unstack('assignment')
+    return pivot.sort_index(axis=1)
+
+
+def question_scores(long_df, by='model'):
+    """Average credit for each model (`by`) and question: models as rows, questions as columns."""
+    return long_df.pivot_table(index=by, columns='question', values='score', aggfunc='mean', observed=True)
+
+
+def result_counts(long_df, by='tested_model'):
+    """Count correct/partial/incorrect question results per model (`by`)."""
+    counts = long_df.groupby([by, 'result'], observed=False).size().unstack('result', fill_value=0)
+    return counts.loc[counts.sum(axis=1) > 0]
+
+
+def source_key():
+    """Size and mtime of the results store files (the WAL holds recent, uncheckpointed writes)."""
+    db_path = Path(config.RESULTS_DB_PATH)
+    key = {}
+    for path in [db_path, db_path.with_name(db_path.name + '-wal')]:
+        if path.exists():
+            stat = path.stat()
+            key[path.name] = [stat.st_size, stat.st_mtime_ns]
+    return key
+
+
+def load_analysis_data(use_cache=True):
+    """
+    Load grades and their exploded questions once for all reports.
+
+    Args:
+        use_cache: Reuse the Parquet cache if the results store is unchanged
+
+    Returns:
+        (df, long_df): grades frame from load_grades() without the `questions`/`summary`
+        dicts, and its explode_questions() frame
+    """
+    results_store.ensure_migrated()
+    key = source_key()
+    key_path = CACHE_DIR / 'key.json'
+    grades_path = CACHE_DIR / 'grades.parquet'
+    questions_path = CACHE_DIR / 'questions.parquet'
+
+    if use_cache and key_path.exists() and json.loads(key_path.read_text()) == key:
+        try:
+            return pd.read_parquet(grades_path), pd.read_parquet(questions_path)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = load_grades()
+    long_df = explode_questions(df)
+    df = df.drop(columns=['questions', 'summary'])
+
+    if use_cache:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(grades_path)
+            long_df.to_parquet(questions_path)
+            key_path.write_text(json.dumps(key))
+        except ImportError:
+            pass
+
+    return df, long_df
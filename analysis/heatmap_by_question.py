@@ -2,66 +2,21 @@
 Generate a heatmap showing model performance by assignment.
 """
 
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
-def load_grades(grades_file='results/grades.jsonl'):
-    """Load grades from JSONL file."""
-    grades = []
-    with open(grades_file, 'r') as f:
-        for line in f:
-            grades.append(json.loads(line.strip()))
-    return pd.DataFrame(grades)
+import core
 
-def prepare_assignment_performance_data(df):
+def prepare_assignment_performance_data(df, long_df):
     """
     Extract per-assignment performance for each model.
     Returns a dataframe with models as rows and assignments as columns.
     """
-    # Calculate average score per model per assignment
-    assignment_scores = []
-    for _, row in df.iterrows():
-        model = row['tested_model']
-        assignment = row['assignment']
-
-        # Calculate score for this assignment (average across all questions)
-        questions = row['questions']
-        total = 0
-        count = 0
-        for result in questions.values():
-            if result == "correct":
-                total += 1.0
-            elif result == "partial":
-                total += 0.5
-            # incorrect adds 0
-            count += 1
-
-        score = total / count if count > 0 else 0
-
-        assignment_scores.append({
-            'model': model,
-            'assignment': f"A{assignment}",
-            'score': score
-        })
-
-    assignment_df = pd.DataFrame(assignment_scores)
-
-    # Calculate average score per model per assignment (across multiple grading trials)
-    pivot_data = assignment_df.groupby(['model', 'assignment'])['score'].mean().reset_index()
-
-    # Create pivot table for heatmap
-    heatmap_data = pivot_data.pivot(index='model', columns='assignment', values='score')
-
-    # Sort columns by assignment number
-    def sort_key(col):
-        return int(col[1:])  # Remove 'A' prefix and convert to int
-
-    sorted_cols = sorted(heatmap_data.columns, key=sort_key)
-    heatmap_data = heatmap_data[sorted_cols]
-
+    # Score each grade as its average question credit, then average across grading trials
+    heatmap_data = core.model_assignment_scores(df, long_df)
+    heatmap_data.columns = pd.Index([f"A{assignment}" for assignment in heatmap_data.columns], name='assignment')
     return heatmap_data
 
 def clean_model_name(model):
@@ -71,14 +26,11 @@ def clean_model_name(model):
     name = name.replace('_', ' ').replace('-', ' ')
     return name
 
-def plot_assignment_heatmap(output_path='analysis/graphs/model_performance_by_assignment.png'):
+def plot_assignment_heatmap(df, long_df, output_path='analysis/graphs/model_performance_by_assignment.png', dpi=300):
     """Create heatmap of model performance by assignment."""
 
-    print("Loading grades data...")
-    df = load_grades()
-
     print("Preparing assignment performance data...")
-    heatmap_data = prepare_assignment_performance_data(df)
+    heatmap_data = prepare_assignment_performance_data(df, long_df)
 
     # Clean up model names for better display
     heatmap_data.index = [clean_model_name(model) for model in heatmap_data.index]
@@ -121,11 +73,16 @@ def plot_assignment_heatmap(output_path='analysis/graphs/model_performance_by_as
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
     print(f"✓ Saved heatmap: {output_path}")
     plt.close()
 
-    # Print summary statistics
+    return heatmap_data
+
+def print_assignment_summary(heatmap_data):
+    """Print assignment difficulty and model averages from the heatmap data."""
+    model_avg = heatmap_data.mean(axis=1).sort_values(ascending=False)
+
     print("\n" + "="*70)
     print("ASSIGNMENT DIFFICULTY SUMMARY")
     print("="*70)
@@ -140,9 +97,14 @@ def plot_assignment_heatmap(output_path='analysis/graphs/model_performance_by_as
     print("="*70)
     print(model_avg.to_string())
 
-    print("\n✅ Heatmap generation complete!")
+def main():
+    print("Loading grades data...")
+    df, long_df = core.load_analysis_data()
 
-    return heatmap_data
+    heatmap_data = plot_assignment_heatmap(df, long_df)
+    print_assignment_summary(heatmap_data)
+
+    print("\n✅ Heatmap generation complete!")
 
 if __name__ == "__main__":
-    plot_assignment_heatmap()
+    main()
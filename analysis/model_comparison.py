@@ -3,49 +3,17 @@ Compare how different models answered the same questions.
 Creates visualizations showing model response patterns and differences.
 """
 
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from pathlib import Path
-from collections import defaultdict
+
+import core
 
 sns.set_style("whitegrid")
 
-def load_grades():
-    """Load all grades."""
-    grades = []
-    with open('results/grades.jsonl', 'r') as f:
-        for line in f:
-            grades.append(json.loads(line.strip()))
-    df = pd.DataFrame(grades)
-    df['normalized_score'] = df['total_correct'] / df['total_questions']
-    return df
-
-def analyze_model_answer_patterns(df):
-    """Analyze how models answer differently across assignments."""
-
-    # Create a comparison matrix showing which models succeed on which questions
-    model_question_success = []
-
-    for _, row in df.iterrows():
-        model_name = row['tested_model'].split('/')[-1]
-        assignment = row['assignment']
-
-        for q_id, result in row['questions'].items():
-            score = 1 if result == 'correct' else 0.5 if result == 'partial' else 0
-            model_question_success.append({
-                'model': model_name,
-                'assignment': assignment,
-                'question': f"A{assignment}_{q_id}",
-                'score': score,
-                'result': result
-            })
-
-    return pd.DataFrame(model_question_success)
-
-def plot_model_comparison(df, output_path='analysis/graphs/model_answer_comparison.png'):
+def plot_model_comparison(df, long_df, output_path='analysis/graphs/model_answer_comparison.png', dpi=300):
     """Create comprehensive model comparison visualization."""
 
     fig = plt.figure(figsize=(18, 14))
@@ -86,14 +54,13 @@ def plot_model_comparison(df, output_path='analysis/graphs/model_answer_comparis
     # 2. Question-level heatmap - which models succeed on which questions?
     ax2 = fig.add_subplot(gs[1, :])
 
-    mq_df = analyze_model_answer_patterns(df)
+    # One row per model/question result
+    mq_df = long_df
     # Focus on questions that have some variance (not all 0 or all 1)
-    question_variance = mq_df.groupby('question')['score'].std()
+    question_variance = mq_df.groupby('question', observed=True)['score'].std()
     interesting_questions = question_variance[question_variance > 0.1].index[:30]  # Top 30 most variable
 
-    pivot_mq = mq_df[mq_df['question'].isin(interesting_questions)].pivot_table(
-        index='model', columns='question', values='score', aggfunc='mean'
-    )
+    pivot_mq = core.question_scores(mq_df[mq_df['question'].isin(interesting_questions)])
 
     if len(pivot_mq) > 0:
         sns.heatmap(pivot_mq, annot=False, cmap='RdYlGn', vmin=0, vmax=1,
@@ -108,15 +75,9 @@ def plot_model_comparison(df, output_path='analysis/graphs/model_answer_comparis
     # 3. Correct vs Partial vs Incorrect breakdown by model
     ax3 = fig.add_subplot(gs[2, 0])
 
-    result_counts = []
-    for model in df['model_clean'].unique():
-        model_grades = df[df['model_clean'] == model]
-        for _, grade in model_grades.iterrows():
-            for result in grade['questions'].values():
-                result_counts.append({'model': model, 'result': result})
-
-    result_df = pd.DataFrame(result_counts)
-    result_pivot = pd.crosstab(result_df['model'], result_df['result'], normalize='index') * 100
+    result_pivot = core.result_counts(mq_df, by='model')
+    result_pivot.index = result_pivot.index.astype(str).str.replace('_', '-')
+    result_pivot = result_pivot.div(result_pivot.sum(axis=1), axis=0) * 100
 
     result_pivot.plot(kind='bar', stacked=True, ax=ax3,
                      color={'correct': '#2ecc71', 'partial': '#f39c12', 'incorrect': '#e74c3c'},
@@ -148,42 +109,35 @@ def plot_model_comparison(df, output_path='analysis/graphs/model_answer_comparis
         ax4.text(val + 0.01, bar.get_y() + bar.get_height()/2.,
                 f'{val:.3f}', ha='left', va='center', fontsize=10, fontweight='bold')
 
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
     print(f"✓ Saved: {output_path}")
     plt.close()
 
-def print_model_comparison_stats(df):
+def print_model_comparison_stats(df, long_df):
     """Print detailed comparison statistics."""
     print("\n" + "="*70)
     print("MODEL COMPARISON STATISTICS")
     print("="*70)
 
-    for model in df['tested_model'].unique():
-        model_data = df[df['tested_model'] == model]
+    by_model = df.groupby('tested_model', sort=False)
+    stats = by_model['normalized_score'].agg(['count', 'mean', 'std'])
+    assignment_means = df.groupby(['assignment', 'tested_model'])['normalized_score'].mean().unstack('tested_model')
+    results = core.result_counts(long_df, by='tested_model')
+
+    for model, row in stats.iterrows():
         model_name = model.split('/')[-1]
 
         print(f"\n{model_name}:")
-        print(f"  Total grades: {len(model_data)}")
-        print(f"  Average score: {model_data['normalized_score'].mean():.3f}")
-        print(f"  Std dev: {model_data['normalized_score'].std():.3f}")
-        print(f"  Best assignment: {model_data.groupby('assignment')['normalized_score'].mean().idxmax()}")
-        print(f"  Worst assignment: {model_data.groupby('assignment')['normalized_score'].mean().idxmin()}")
+        print(f"  Total grades: {int(row['count'])}")
+        print(f"  Average score: {row['mean']:.3f}")
+        print(f"  Std dev: {row['std']:.3f}")
+        print(f"  Best assignment: {assignment_means[model].idxmax()}")
+        print(f"  Worst assignment: {assignment_means[model].idxmin()}")
 
         # Count result types
-        total_questions = 0
-        correct = 0
-        partial = 0
-        incorrect = 0
-
-        for _, row in model_data.iterrows():
-            for result in row['questions'].values():
-                total_questions += 1
-                if result == 'correct':
-                    correct += 1
-                elif result == 'partial':
-                    partial += 1
-                else:
-                    incorrect += 1
+        counts = results.loc[model] if model in results.index else pd.Series(0, index=results.columns)
+        total_questions = counts.sum()
+        correct, partial, incorrect = counts['correct'], counts['partial'], counts['incorrect']
 
         print(f"  Question results:")
         print(f"    Correct: {correct}/{total_questions} ({correct/total_questions*100:.1f}%)")
@@ -195,17 +149,15 @@ def print_model_comparison_stats(df):
     print("HEAD-TO-HEAD ASSIGNMENT WINS")
     print("="*70)
 
-    for assignment in sorted(df['assignment'].unique()):
-        assignment_data = df[df['assignment'] == assignment]
-        winner = assignment_data.groupby('tested_model')['normalized_score'].mean().idxmax()
-        winner_score = assignment_data.groupby('tested_model')['normalized_score'].mean().max()
+    for assignment, scores in assignment_means.iterrows():
+        winner = scores.idxmax()
+        winner_score = scores.max()
 
         print(f"\nAssignment {assignment}:")
         print(f"  Winner: {winner.split('/')[-1]} (score: {winner_score:.3f})")
 
         # Show all scores for this assignment
-        for model in sorted(df['tested_model'].unique()):
-            model_score = assignment_data[assignment_data['tested_model'] == model]['normalized_score'].mean()
+        for model, model_score in scores.sort_index().items():
             model_name = model.split('/')[-1]
             # Handle NaN case
             if pd.isna(model_score):
@@ -221,12 +173,12 @@ def main():
     print("MODEL COMPARISON ANALYSIS")
     print("="*70)
 
-    df = load_grades()
+    df, long_df = core.load_analysis_data()
 
     print(f"\nLoaded {len(df)} grades across {df['tested_model'].nunique()} models")
 
-    plot_model_comparison(df)
-    print_model_comparison_stats(df)
+    plot_model_comparison(df, long_df)
+    print_model_comparison_stats(df, long_df)
 
     print("\n" + "="*70)
     print("✅ Model comparison complete!")
@@ -0,0 +1,180 @@
+"""
+Run all CivBench analysis reports from a single load of the grades.
+
+Grades are loaded and normalized once (see core.load_analysis_data) and shared
+by every chart and report. Charts render in parallel worker processes
+(matplotlib state is per-process), and a chart is skipped when the hash of its
+input data, plotting code and dpi matches its last render.
+
+Usage:
+    python analysis/run_analysis.py                          # all charts and reports
+    python analysis/run_analysis.py --charts heatmap comparison
+    python analysis/run_analysis.py --preview                # fast low-dpi charts in analysis/graphs/preview/
+    python analysis/run_analysis.py --force                  # re-render even if unchanged
+    python analysis/run_analysis.py --no-charts              # printed reports only
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')  # Render off-screen (also in worker processes)
+import pandas as pd
+
+import agreement
+import analyze_grades
+import core
+import heatmap_by_question
+import model_comparison
+import stats
+
+GRAPHS_DIR = Path('analysis/graphs')
+PREVIEW_DIR = GRAPHS_DIR / 'preview'
+PREVIEW_DPI = 72
+RENDERED_PATH = core.CACHE_DIR / 'charts.json'
+
+# Chart name -> module, render function, output file and the data the chart is drawn from
+CHARTS = {
+    'performance': {
+        'module': analyze_grades,
+        'render': lambda df, long_df, path, dpi: analyze_grades.plot_model_performance(df, path, dpi),
+        'filename': 'model_performance.png',
+        'inputs': lambda df, long_df: [df[['tested_model', 'normalized_score']]],
+    },
+    'consistency': {
+        'module': analyze_grades,
+        'render': lambda df, long_df, path, dpi: analyze_grades.plot_grader_consistency(df, path, dpi),
+        'filename': 'grader_consistency.png',
+        'inputs': lambda df, long_df: [df[['assignment', 'tested_model', 'normalized_score']]],
+    },
+    'heatmap': {
+        'module': heatmap_by_question,
+        'render': heatmap_by_question.plot_assignment_heatmap,
+        'filename': 'model_performance_by_assignment.png',
+        'inputs': lambda df, long_df: [core.model_assignment_scores(df, long_df)],
+    },
+    'comparison': {
+        'module': model_comparison,
+        'render': model_comparison.plot_model_comparison,
+        'filename': 'model_answer_comparison.png',
+        'inputs': lambda df, long_df: [
+            df[['tested_model', 'assignment', 'normalized_score']],
+            long_df[['model', 'question', 'result', 'score']],
+        ],
+    },
+}
+
+
+def chart_hash(name, df, long_df, dpi):
+    """Hash a chart's input data, plotting code and dpi."""
+    chart = CHARTS[name]
+    digest = hashlib.sha256()
+    for frame in chart['inputs'](df, long_df):
+        digest.update(pd.util.hash_pandas_object(frame).to_numpy().tobytes())
+        digest.update(repr(list(frame.columns)).encode('utf-8'))
+    digest.update(inspect.getsource(chart['module']).encode('utf-8'))
+    digest.update(f"{name}:{dpi}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _render_chart(name, df, long_df, output_path, dpi):
+    """Render one chart (runs in a worker process)."""
+    CHARTS[name]['render'](df, long_df, output_path, dpi)
+    return name
+
+
+def render_charts(df, long_df, names, preview=False, force=False, jobs=None):
+    """
+    Render the selected charts, skipping those whose inputs are unchanged.
+
+    Args:
+        names: Chart names (keys of CHARTS)
+        preview: Render at PREVIEW_DPI into PREVIEW_DIR
+        force: Re-render even if the chart is up to date
+        jobs: Worker processes (default: one per chart, up to the CPU count; 1 renders in-process)
+    """
+    output_dir = PREVIEW_DIR if preview else GRAPHS_DIR
+    dpi = PREVIEW_DPI if preview else 300
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rendered = json.loads(RENDERED_PATH.read_text()) if RENDERED_PATH.exists() else {}
+    pending = {}
+    for name in names:
+        output_path = str(output_dir / CHARTS[name]['filename'])
+        input_hash = chart_hash(name, df, long_df, dpi)
+        if not force and rendered.get(output_path) == input_hash and Path(output_path).exists():
+            print(f"  {name}: unchanged, skipping ({output_path})")
+            continue
+        pending[name] = (output_path, input_hash)
+
+    if not pending:
+        return
+
+    jobs = jobs or min(len(pending), os.cpu_count() or 1)
+    if jobs == 1:
+        for name, (output_path, _) in pending.items():
+            _render_chart(name, df, long_df, output_path, dpi)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(_render_chart, name, df, long_df, output_path, dpi)
+                for name, (output_path, _) in pending.items()
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+    for output_path, input_hash in pending.values():
+        rendered[output_path] = input_hash
+    core.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    RENDERED_PATH.write_text(json.dumps(rendered, indent=2))
+
+
+def print_reports(df, long_df, bootstrap_iterations=10000, seed=0):
+    """Print every text report."""
+    analyze_grades.print_summary_stats(df)
+    stats.print_bootstrap_cis(df, bootstrap_iterations, seed)
+    heatmap_data = heatmap_by_question.prepare_assignment_performance_data(df, long_df)
+    heatmap_data.index = [heatmap_by_question.clean_model_name(model) for model in heatmap_data.index]
+    heatmap_by_question.print_assignment_summary(heatmap_data)
+    model_comparison.print_model_comparison_stats(df, long_df)
+    agreement.print_agreement_report(long_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CivBench analysis reports.")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), default=list(CHARTS),
+                        help="Charts to render (default: all)")
+    parser.add_argument("--no-charts", action="store_true", help="Skip rendering charts")
+    parser.add_argument("--no-reports", action="store_true", help="Skip printed reports")
+    parser.add_argument("--preview", action="store_true",
+                        help=f"Render low-dpi ({PREVIEW_DPI}) charts into {PREVIEW_DIR}/")
+    parser.add_argument("--force", action="store_true", help="Re-render charts even if their inputs are unchanged")
+    parser.add_argument("--jobs", type=int, default=None, help="Chart rendering processes (default: one per chart)")
+    parser.add_argument("--bootstrap-iterations", type=int, default=10000,
+                        help="Resamples for the hierarchical bootstrap CIs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the bootstrap")
+    parser.add_argument("--no-cache", action="store_true", help="Re-read grades instead of using the Parquet cache")
+    args = parser.parse_args()
+
+    print("Loading grades data...")
+    df, long_df = core.load_analysis_data(use_cache=not args.no_cache)
+    print(f"Loaded {len(df)} grades ({len(long_df)} graded questions) across "
+          f"{df['tested_model'].nunique()} models")
+
+    if not args.no_charts:
+        print("\nGenerating visualizations...")
+        render_charts(df, long_df, args.charts, preview=args.preview, force=args.force, jobs=args.jobs)
+
+    if not args.no_reports:
+        print_reports(df, long_df, args.bootstrap_iterations, args.seed)
+
+    print("\n✅ Analysis complete! Check the analysis/graphs/ folder for visualizations.")
+
+
+if __name__ == "__main__":
+    main()
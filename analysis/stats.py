@@ -0,0 +1,160 @@
+"""
+Hierarchical bootstrap confidence intervals for model scores.
+
+Re-grades of the same answer (and trials of the same assignment) are
+correlated, so treating every grade as an independent sample understates the
+uncertainty. The bootstrap here resamples at each level of the design:
+assignments, then trials within each sampled assignment, then grades within
+each sampled trial. All resamples are drawn at once as NumPy index matrices.
+
+Usage:
+    python analysis/stats.py [--iterations 10000] [--seed 0] [--ci 0.95]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import core
+
+# Upper bound on resampled values held in memory at once (iterations are processed in chunks)
+MAX_CHUNK_VALUES = 5_000_000
+
+
+def score_array(group):
+    """
+    Arrange one model's grades as an (assignment, trial, grade) array.
+
+    Trials and grades are packed to the front of each row; missing slots are NaN.
+
+    Args:
+        group: Grades frame rows for one model (assignment, trial, grade_num, normalized_score)
+
+    Returns:
+        Float array of shape (n_assignments, max_trials, max_grades)
+    """
+    group = group.dropna(subset=['normalized_score'])
+    a_idx = group['assignment'].astype('category').cat.codes.to_numpy()
+    t_idx = (group.groupby('assignment')['trial'].rank(method='dense') - 1).astype(int).to_numpy()
+    g_idx = group.groupby(['assignment', 'trial']).cumcount().to_numpy()
+
+    values = np.full((a_idx.max() + 1, t_idx.max() + 1, g_idx.max() + 1), np.nan)
+    values[a_idx, t_idx, g_idx] = group['normalized_score'].to_numpy()
+    return values
+
+
+def hierarchical_means(values, assignments, trials, grades, trial_counts, grade_counts):
+    """Nested mean (grades -> trials -> assignments) of resampled values, one per iteration."""
+    n_trials = trial_counts[assignments]                                  # (B, A)
+    n_grades = grade_counts[assignments[..., None], trials]               # (B, A, T)
+    sampled = values[assignments[..., None, None], trials[..., None], grades]  # (B, A, T, G)
+
+    grade_mask = np.arange(values.shape[2]) < n_grades[..., None]
+    trial_mask = np.arange(values.shape[1]) < n_trials[..., None]
+
+    trial_means = np.where(grade_mask, sampled, 0.0).sum(axis=-1) / np.maximum(n_grades, 1)
+    assignment_means = np.where(trial_mask, trial_means, 0.0).sum(axis=-1) / n_trials
+    return assignment_means.mean(axis=-1)
+
+
+def hierarchical_bootstrap(values, iterations=10000, seed=0, ci=0.95):
+    """
+    Bootstrap the nested mean of an (assignment, trial, grade) score array.
+
+    Args:
+        values: Array from score_array()
+        iterations: Number of bootstrap resamples
+        seed: Random seed
+        ci: Confidence level of the percentile interval
+
+    Returns:
+        Dict with 'mean', 'ci_low', 'ci_high' and 'std_error'
+    """
+    n_assignments, max_trials, max_grades = values.shape
+    grade_counts = (~np.isnan(values)).sum(axis=2)                       # (A, T)
+    trial_counts = (grade_counts > 0).sum(axis=1)                         # (A,)
+    rng = np.random.default_rng(seed)
+
+    # Point estimate: the same nested mean on the original data
+    identity = np.arange(n_assignments)[None, :]
+    trials = np.broadcast_to(np.arange(max_trials), (1, n_assignments, max_trials))
+    grades = np.broadcast_to(np.arange(max_grades), (1, n_assignments, max_trials, max_grades))
+    mean = hierarchical_means(values, identity, trials, grades, trial_counts, grade_counts)[0]
+
+    chunk = max(1, MAX_CHUNK_VALUES // values.size)
+    boot = []
+    for start in range(0, iterations, chunk):
+        size = min(chunk, iterations - start)
+        assignments = rng.integers(0, n_assignments, size=(size, n_assignments))
+        trials = (rng.random((size, n_assignments, max_trials)) * trial_counts[assignments][..., None]).astype(int)
+        n_grades = grade_counts[assignments[..., None], trials]
+        grades = (rng.random((size, n_assignments, max_trials, max_grades)) * n_grades[..., None]).astype(int)
+        boot.append(hierarchical_means(values, assignments, trials, grades, trial_counts, grade_counts))
+    boot = np.concatenate(boot)
+
+    alpha = (1 - ci) / 2
+    ci_low, ci_high = np.quantile(boot, [alpha, 1 - alpha])
+    return {'mean': float(mean), 'ci_low': float(ci_low), 'ci_high': float(ci_high),
+            'std_error': float(boot.std(ddof=1))}
+
+
+def bootstrap_model_cis(df, iterations=10000, seed=0, ci=0.95, by='tested_model'):
+    """
+    Hierarchical bootstrap CI of normalized_score for each model.
+
+    Args:
+        df: Grades frame with assignment, trial, grade_num and normalized_score
+        iterations: Number of bootstrap resamples per model
+        seed: Random seed (each model gets its own stream derived from it)
+        ci: Confidence level
+        by: Column identifying the model
+
+    Returns:
+        Frame indexed by model with mean, ci_low, ci_high, std_error, n_assignments and n_grades,
+        sorted by mean (models without any scored grade get NaN statistics and sort last)
+    """
+    rows = {}
+    seeds = np.random.SeedSequence(seed).spawn(df[by].nunique())
+    for model_seed, (model, group) in zip(seeds, df.groupby(by, sort=True, observed=True)):
+        # e.g. every grade of the model failed or couldn't be parsed
+        if group['normalized_score'].notna().sum() == 0:
+            rows[model] = {'mean': np.nan, 'ci_low': np.nan, 'ci_high': np.nan, 'std_error': np.nan,
+                           'n_assignments': 0, 'n_grades': 0}
+            continue
+        values = score_array(group)
+        result = hierarchical_bootstrap(values, iterations, model_seed, ci)
+        result['n_assignments'] = values.shape[0]
+        result['n_grades'] = int((~np.isnan(values)).sum())
+        rows[model] = result
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    return table.sort_values('mean', ascending=False)
+
+
+def print_bootstrap_cis(df, iterations=10000, seed=0, ci=0.95):
+    """Print per-model hierarchical bootstrap CIs."""
+    print("\n" + "-"*70)
+    print(f"MODEL PERFORMANCE ({ci:.0%} hierarchical bootstrap CI, {iterations:,} resamples)")
+    print("-"*70)
+    start = time.perf_counter()
+    table = bootstrap_model_cis(df, iterations, seed, ci)
+    elapsed = time.perf_counter() - start
+    print(table.round(4).to_string())
+    print(f"\n(computed in {elapsed:.2f}s)")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hierarchical bootstrap CIs of model scores.")
+    parser.add_argument("--iterations", type=int, default=10000, help="Bootstrap resamples per model")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--ci", type=float, default=0.95, help="Confidence level")
+    args = parser.parse_args()
+
+    df, _ = core.load_analysis_data()
+    print_bootstrap_cis(df, args.iterations, args.seed, args.ci)
+
+
+if __name__ == "__main__":
+    main()
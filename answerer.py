@@ -6,10 +6,11 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 import config
 import openrouter_client
+import tracing
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -77,33 +78,43 @@ def load_existing_response(model_id: str, assignment_num: int, trial_num: int) -
     return None
 
 
-def get_answer(
+def _prepare_answer(
     model_id: str,
     assignment_num: int,
-    trial_num: int = 0,
-    verbose: bool = True
-) -> Dict:
+    trial_num: int,
+    verbose: bool
+) -> Tuple[Optional[Dict], List[Path]]:
     """
-    Get an answer from a model for a specific assignment.
-    If a response already exists on disk, it will be loaded instead of calling the API.
-
-    Args:
-        model_id: OpenRouter model ID
-        assignment_num: Assignment number (e.g., 1, 2, 4, ...)
-        trial_num: Trial number (default 0)
+    Shared setup for get_answer and get_answer_async.
 
     Returns:
-        Dict containing the response and metadata
+        (response, image_paths) - response is set when no API call is needed
+        (cached response or missing images)
     """
     logger.info(f"Processing: model={model_id}, assignment={assignment_num}, trial={trial_num}")
 
     # Check if we already have a response for this
     existing_response = load_existing_response(model_id, assignment_num, trial_num)
+    if existing_response is not None and not existing_response.get("success"):
+        # Failed calls are not cached; try again
+        logger.info(f"Retrying previously failed response for assignment {assignment_num}: {existing_response.get('error')}")
+        existing_response = None
+    if existing_response is not None and existing_response.get("request_fingerprint"):
+        # Re-ask if the prompt, images or sampling params changed since this answer was saved
+        current_fingerprint = openrouter_client.get_request_fingerprint(
+            model_id=model_id,
+            prompt=config.ANSWERING_PROMPT,
+            image_paths=find_assignment_images(assignment_num),
+            sample_key=f"trial_{trial_num}",
+        )
+        if current_fingerprint != existing_response["request_fingerprint"]:
+            logger.info(f"Cached response for assignment {assignment_num} is stale (request changed)")
+            existing_response = None
     if existing_response is not None:
         logger.info(f"Using cached response for assignment {assignment_num}")
         if verbose:
             print(f"  ✓ Using cached response for assignment {assignment_num}")
-        return existing_response
+        return existing_response, []
 
     # Find all images for this assignment (e.g., 1.png, 1.1.png, 1.2.png)
     image_paths = find_assignment_images(assignment_num)
@@ -116,28 +127,30 @@ def get_answer(
             "model_id": model_id,
             "assignment_num": assignment_num,
             "trial_num": trial_num,
-        }
+        }, []
 
     logger.info(f"Found {len(image_paths)} image(s) for assignment {assignment_num}: {[p.name for p in image_paths]}")
     if verbose:
         print(f"  Sending assignment {assignment_num} ({len(image_paths)} image(s)) to {model_id}...")
 
-    # Call the model
-    logger.info(f"Calling OpenRouter API with timeout={config.DEFAULT_TIMEOUT}s")
-    result = openrouter_client.call_model(
-        model_id=model_id,
-        prompt=config.ANSWERING_PROMPT,
-        image_paths=image_paths,
-        timeout=config.DEFAULT_TIMEOUT,
-    )
+    return None, image_paths
+
 
-    # Build response object
+def _finish_answer(
+    model_id: str,
+    assignment_num: int,
+    trial_num: int,
+    result: Dict,
+    verbose: bool
+) -> Dict:
+    """Build the response object from a call_model result and save it."""
     response_data = {
         "model_id": model_id,
         "assignment_num": assignment_num,
         "trial_num": trial_num,
         "timestamp": datetime.now().isoformat(),
         "success": result["error"] is None,
+        "attempts": result.get("attempts", 1),
     }
 
     if result["error"]:
@@ -149,6 +162,10 @@ def get_answer(
     else:
         response_data["answer"] = result["content"]
         response_data["usage"] = result.get("usage", {})
+        response_data["metrics"] = result.get("metrics", {})
+        response_data["request_fingerprint"] = result.get("request_fingerprint")
+        if result.get("cache_hit"):
+            response_data["cache_hit"] = True
         logger.info(f"Assignment {assignment_num} succeeded: {len(result['content'])} chars, usage={result.get('usage', {})}")
         if verbose:
             print(f"  ✓ Got response ({len(result['content'])} chars)")
@@ -159,6 +176,70 @@ def get_answer(
     return response_data
 
 
+def get_answer(
+    model_id: str,
+    assignment_num: int,
+    trial_num: int = 0,
+    verbose: bool = True
+) -> Dict:
+    """
+    Get an answer from a model for a specific assignment.
+    If a response already exists on disk, it will be loaded instead of calling the API.
+
+    Args:
+        model_id: OpenRouter model ID
+        assignment_num: Assignment number (e.g., 1, 2, 4, ...)
+        trial_num: Trial number (default 0)
+
+    Returns:
+        Dict containing the response and metadata
+    """
+    response, image_paths = _prepare_answer(model_id, assignment_num, trial_num, verbose)
+    if response is not None:
+        return response
+
+    # Call the model
+    logger.info(f"Calling OpenRouter API with timeout={config.DEFAULT_TIMEOUT}s")
+    result = openrouter_client.call_model(
+        model_id=model_id,
+        prompt=config.ANSWERING_PROMPT,
+        image_paths=image_paths,
+        timeout=config.DEFAULT_TIMEOUT,
+        sample_key=f"trial_{trial_num}",
+        tags={"stage": "answer", "assignment": assignment_num, "tested_model": model_id},
+    )
+
+    return _finish_answer(model_id, assignment_num, trial_num, result, verbose)
+
+
+async def get_answer_async(
+    model_id: str,
+    assignment_num: int,
+    trial_num: int = 0,
+    verbose: bool = True
+) -> Dict:
+    """
+    Async version of get_answer using openrouter_client.call_model_async.
+    Takes the same arguments and returns the same dict as get_answer.
+    """
+    response, image_paths = _prepare_answer(model_id, assignment_num, trial_num, verbose)
+    if response is not None:
+        return response
+
+    # Call the model
+    logger.info(f"Calling OpenRouter API (async) with timeout={config.DEFAULT_TIMEOUT}s")
+    result = await openrouter_client.call_model_async(
+        model_id=model_id,
+        prompt=config.ANSWERING_PROMPT,
+        image_paths=image_paths,
+        timeout=config.DEFAULT_TIMEOUT,
+        sample_key=f"trial_{trial_num}",
+        tags={"stage": "answer", "assignment": assignment_num, "tested_model": model_id},
+    )
+
+    return _finish_answer(model_id, assignment_num, trial_num, result, verbose)
+
+
 def save_answer(response_data: Dict, verbose: bool = True):
     """Save answer to disk."""
     model_id = response_data["model_id"]
@@ -168,12 +249,13 @@ def save_answer(response_data: Dict, verbose: bool = True):
     # Get output file path
     output_file = get_response_path(model_id, assignment_num, trial_num)
 
-    # Create directory structure: responses/{model_name}/trial_{n}/
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with tracing.span("save_answer", "answerer"):
+        # Create directory structure: responses/{model_name}/trial_{n}/
+        output_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # Save to file
-    with open(output_file, "w") as f:
-        json.dump(response_data, f, indent=2)
+        # Save to file
+        with open(output_file, "w") as f:
+            json.dump(response_data, f, indent=2)
 
     logger.info(f"Saved response to: {output_file}")
     if verbose:
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Record/replay of OpenRouter calls for deterministic offline runs.
+
+With config.CASSETTE_MODE = "record", call_model writes the raw response body of
+every request it sends (plus its error, attempts and timing) to a cassette,
+keyed by the same fingerprint as the request cache. With "replay", call_model
+serves requests from the cassette instead of the network: the recorded body is
+parsed again exactly as a live response would be, and requests that were never
+recorded fail instead of reaching OpenRouter. Replay waits
+config.CASSETTE_REPLAY_LATENCY times the recorded latency (0 = instantly).
+
+Record or replay a whole run with:
+    python run_bench.py --cassette record
+    python run_grading.py --full --cassette replay
+
+Show what a cassette holds with:
+    python cassette.py
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import config
+from request_cache import BlobStore
+
+MODES = ["record", "replay"]
+
+_store = BlobStore(config.CASSETTE_PATH, table="interactions")
+_stats = {"recorded": 0, "replayed": 0, "missing": 0}
+_stats_lock = threading.Lock()
+
+
+def get_mode() -> Optional[str]:
+    """Get the configured mode ("record", "replay" or None)."""
+    mode = config.CASSETTE_MODE
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unsupported CASSETTE_MODE: {mode!r} (expected one of {MODES} or None)")
+    return mode
+
+
+def record(fingerprint: str, model_id: str, result: Dict, response_data: Optional[Dict], elapsed: float):
+    """
+    Record one sent request (replacing any earlier recording of it).
+
+    Args:
+        fingerprint: Request fingerprint (see request_cache.request_fingerprint)
+        model_id: Model the request went to
+        result: The call_model result (its error, attempts and metrics are kept)
+        response_data: The raw response body of the last attempt (None if there was none)
+        elapsed: Seconds the request took, including retries
+    """
+    _store.put(fingerprint, model_id, {
+        "recorded": datetime.now().isoformat(),
+        "response_data": response_data,
+        "error": result["error"] if response_data is None else None,
+        "attempts": result.get("attempts", 1),
+        "metrics": result.get("metrics"),
+        "elapsed": round(elapsed, 3),
+    })
+    with _stats_lock:
+        _stats["recorded"] += 1
+
+
+def load(fingerprint: str) -> Optional[Dict]:
+    """Get the recording for a fingerprint, or None (counts a replay or a miss)."""
+    entry = _store.get(fingerprint)
+    with _stats_lock:
+        _stats["replayed" if entry is not None else "missing"] += 1
+    return entry
+
+
+def get_replay_delay(entry: Dict) -> float:
+    """Seconds to wait before serving a recording (config.CASSETTE_REPLAY_LATENCY x recorded time)."""
+    return max(0.0, config.CASSETTE_REPLAY_LATENCY * (entry.get("elapsed") or 0.0))
+
+
+def get_stats() -> Dict:
+    """Get this process's recorded/replayed/missing counts."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def print_stats():
+    """Print this process's cassette use (if any)."""
+    stats = get_stats()
+    if stats["recorded"]:
+        print(f"Cassette: recorded {stats['recorded']} request(s) to {config.CASSETTE_PATH}")
+    if stats["replayed"] or stats["missing"]:
+        print(f"Cassette: replayed {stats['replayed']} request(s), {stats['missing']} not recorded")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("CASSETTE")
+    print("=" * 60)
+    print(f"Path: {config.CASSETTE_PATH}")
+    print(f"Mode: {config.CASSETTE_MODE}")
+    print()
+    for row in _store.summary():
+        print(f"  {row['model']:40s} {row['entries']:6d} entries {row['bytes'] / 1024:10.1f} KiB")
@@ -34,6 +34,24 @@ DEFAULT_MAX_TOKENS = 50000
 DEFAULT_TEMPERATURE = 1.0
 DEFAULT_TIMEOUT = 120  # seconds
 
+# Streaming (SSE) responses record time-to-first-token and output tokens/sec
+STREAM_RESPONSES = False
+STREAM_IDLE_TIMEOUT = 60  # seconds without any data before a stream counts as stalled
+
+# Retries for rate limits (429), server errors (5xx), timeouts and connection errors
+MAX_RETRIES = 4  # Extra attempts after the first one
+RETRY_BASE_DELAY = 2.0  # seconds, doubled on every retry (with jitter)
+RETRY_MAX_DELAY = 60.0  # seconds, also caps how long a Retry-After header is honored
+RETRYABLE_STATUS_CODES = [408, 429, 500, 502, 503, 504]
+
+# Requests-per-minute limits, keyed by model ID or provider prefix.
+# A call waits for every limit that applies to its model.
+RATE_LIMITS = {
+    # "google/gemini-2.5-flash": 120,
+    # "openai": 60,
+}
+RATE_LIMIT_BURST = 5  # Requests that may be sent back-to-back before the rate applies
+
 # Models to test
 TEST_MODELS = [
     "anthropic/claude-sonnet-4.5",
@@ -49,11 +67,110 @@ GRADER_MODEL = "google/gemini-2.5-flash"
 GRADER_MAX_TOKENS = 2048  # Reduced for simpler per-question grading
 GRADER_TEMPERATURE = 0.5  # More deterministic grading
 
+# Grader responses are validated against the schemas in grading_schema.py. Grader models
+# matching STRUCTURED_OUTPUT_MODELS (ID prefixes) are sent the schema as a JSON-schema
+# response_format; responses that still don't validate are re-asked up to GRADE_PARSE_RETRIES times.
+GRADER_STRUCTURED_OUTPUT = True
+STRUCTURED_OUTPUT_MODELS = ["openai/", "google/gemini"]
+GRADE_PARSE_RETRIES = 2
+
 # Benchmark settings
 NUM_TRIALS = 1  # Number of answer attempts per model
 NUM_GRADES = 5  # Number of times each answer is graded
 MAX_WORKERS = 10  # Number of parallel API requests (adjust based on API rate limits)
 
+# Adaptive grading (python run_grading.py --adaptive): grade each answer in rounds,
+# stopping once every question's labels agree and adding grades while they don't.
+# Run python analysis/agreement.py to see how much grades agree.
+ADAPTIVE_MIN_GRADES = 3  # Grades every answer gets before checking agreement
+ADAPTIVE_MAX_GRADES = 7  # Upper bound on grades for contentious answers
+ADAPTIVE_AGREEMENT = 0.8  # Required share of grades giving each question its most common label
+
+# Batched grading (python run_grading.py --batch N): request up to GRADE_BATCH_SIZE grades
+# of an answer in one grader call, so the ground truth, answer and images are uploaded once.
+# "n" asks the API for independent samples via the `n` parameter (samples a provider doesn't
+# return are graded one call at a time); "prompt" asks for a list of verdicts in one response
+# (cheaper still, but the verdicts are not independent samples).
+GRADE_BATCH_SIZE = 1
+GRADE_BATCH_MODE = "n"
+
+# Per-question grading (python run_grading.py --per-question): split the ground truth and each
+# answer into canonical question IDs (see questions.py) and grade every question with its own
+# small request. Questions that fail are retried on the next run without regrading the rest.
+PER_QUESTION_GRADING = False
+QUESTION_GRADER_MAX_TOKENS = 512  # A single-question verdict is short
+
+# Per-provider cap on in-flight jobs (provider = model ID prefix, e.g. "openai").
+# Providers not listed here can use all MAX_WORKERS.
+PROVIDER_MAX_WORKERS = {
+    # "openai": 4,
+    # "x-ai": 2,
+}
+
+# Async mode (python run_bench.py --async / python run_grading.py --async)
+ASYNC_MAX_IN_FLIGHT = 200  # Maximum concurrent API requests from one process
+ASYNC_MAX_CONNECTIONS = 200  # Size of the async HTTP connection pool
+
+# Encoded image cache (images are base64-encoded once and reused across calls)
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # In-memory size bound
+IMAGE_CACHE_DIR = None  # Set to e.g. PROJECT_ROOT / ".cache" / "images" to also cache on disk
+
+# Content-addressed cache of successful API calls (keyed on model, prompt, images,
+# sampling params and sample number). Run python request_cache.py for stats.
+REQUEST_CACHE_ENABLED = True
+REQUEST_CACHE_PATH = RESULTS_DIR / "request_cache.sqlite"
+
+# Record/replay of raw API responses (see cassette.py). "record" saves every sent request's
+# response; "replay" serves them back without network access (unrecorded requests fail).
+# Both bypass request cache lookups. Replay waits CASSETTE_REPLAY_LATENCY x the recorded
+# latency (0 = instantly, 1.0 = as slow as the recorded run).
+CASSETTE_MODE = None  # None, "record" or "replay"
+CASSETTE_PATH = RESULTS_DIR / "cassette.sqlite"
+CASSETTE_REPLAY_LATENCY = 0.0
+
+# Span tracing of every pipeline stage: queue wait, image encoding, HTTP, parsing, saving
+# (python run_bench.py --trace / run_grading.py --trace). Each run writes one Chrome-trace
+# JSON file to TRACE_DIR; open it in https://ui.perfetto.dev or chrome://tracing.
+TRACE_ENABLED = False
+TRACE_DIR = RESULTS_DIR / "traces"
+
+# Live metrics endpoint (Prometheus text format, see metrics.py) served on 127.0.0.1 while a
+# run is going, e.g. 9108 (python run_bench.py --metrics-port 9108). None = not served.
+METRICS_PORT = None
+
+# Run manifests (see run_manifest.py): each run's config snapshot, planned jobs and their states,
+# so an interrupted or partly failed run can be resumed (python run_bench.py --resume RUN_ID).
+RUNS_DIR = RESULTS_DIR / "runs"
+RUN_MANIFEST_SAVE_INTERVAL = 1.0  # seconds between checkpoints of job states while a run is going
+
+# Ledger of usage and spend per sent call (python cost_ledger.py for reports by model, stage,
+# assignment and run). Prices are $ per million tokens (check openrouter.ai/models for current
+# ones); calls to models not listed here use the cost OpenRouter reports in the usage, if any.
+COST_LEDGER_PATH = RESULTS_DIR / "cost_ledger.sqlite"
+MODEL_PRICES = {
+    "google/gemini-2.5-flash": {"prompt": 0.30, "cached_prompt": 0.075, "completion": 2.50},
+    "google/gemini-2.5-pro": {"prompt": 1.25, "cached_prompt": 0.31, "completion": 10.00},
+    "anthropic/claude-sonnet-4.5": {"prompt": 3.00, "cached_prompt": 0.30, "completion": 15.00},
+    "anthropic/claude-opus-4.1": {"prompt": 15.00, "cached_prompt": 1.50, "completion": 75.00},
+    "openai/gpt-5": {"prompt": 1.25, "cached_prompt": 0.125, "completion": 10.00},
+    "x-ai/grok-4": {"prompt": 3.00, "cached_prompt": 0.75, "completion": 15.00},
+}
+# Stop scheduling new jobs once a run has spent this many dollars (None = no limit). Jobs already
+# in flight still finish, so a run can overshoot by up to MAX_WORKERS (or ASYNC_MAX_IN_FLIGHT) calls.
+BUDGET_LIMIT_USD = None
+
+# Deduplicated grade records (one per grader/model/assignment/trial/grade_num).
+# Created from results/grades.jsonl on first use; run python results_store.py --help.
+RESULTS_DB_PATH = RESULTS_DIR / "grades.sqlite"
+
+# Image preprocessing (shrinks vision payloads; requires Pillow).
+# Run python image_preprocess.py to see bytes/tokens saved per assignment.
+IMAGE_PREPROCESS = False
+IMAGE_MAX_DIMENSION = 1568  # Longest side in pixels after downsampling
+IMAGE_GRAYSCALE = False
+IMAGE_FORMAT = "png"  # "png" (optimized) or "jpeg"
+IMAGE_JPEG_QUALITY = 85
+
 # Which assignments to test (based on image files in data/images/)
 ASSIGNMENTS_TO_TEST = [1, 2, 4, 5, 6, 7]
 
@@ -109,3 +226,37 @@ Example:
 }}
 
 """
+
+# Appended to the grading prompt in GRADE_BATCH_MODE = "prompt"
+GRADING_MULTI_VERDICT_PROMPT = """
+
+Grade the answer {n} times, independently, as if each grading were done by a different grader.
+Respond with ONLY valid JSON of the form {{"gradings": [<grading>, ...]}} containing exactly {n}
+gradings, each in the required format above.
+"""
+
+# Prompt for grading one question (PER_QUESTION_GRADING)
+QUESTION_GRADING_PROMPT_TEMPLATE = """You are grading one question of a civil engineering student's answer.
+
+QUESTION: Question {question_id} in the attached image(s)
+
+GROUND TRUTH ANSWER TO QUESTION {question_id}:
+{ground_truth}
+
+STUDENT'S ANSWER (the part for question {question_id}):
+{student_answer}
+
+Your task: Compare the student's answer to question {question_id} with the ground truth.
+Ignore any other questions in the student's answer.
+If they get a HSS very similar to the correct one, give them correct.
+
+Mark the question as:
+- "correct": Answer matches ground truth (accepts minor notation differences)
+- "partial": Right approach/method but has calculation errors or minor mistakes
+- "incorrect": Wrong answer or no relevant attempt
+
+IMPORTANT: Respond with ONLY valid JSON. No other text before or after.
+
+Required format:
+{{"result": "correct|partial|incorrect"}}
+"""
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Ledger of token usage and spend for every OpenRouter call (SQLite).
+
+call_model records each call it actually sends (request cache hits cost nothing
+and are not recorded) with its model, usage and the tags the caller passed
+(stage, assignment, tested model). Cost comes from config.MODEL_PRICES, or from
+the `cost` OpenRouter reports in the usage when the model isn't priced there.
+
+Every process is one run (see start_run); with config.BUDGET_LIMIT_USD set, the
+scheduler stops handing out jobs once the run's spend reaches the limit.
+
+Usage:
+    python cost_ledger.py                       # spend by model and stage, all runs
+    python cost_ledger.py --by run model        # any of: run model stage assignment tested_model
+    python cost_ledger.py --run 20250101-120000 # one run only
+"""
+
+import argparse
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+
+# Tags a caller can attach to a call (columns of the ledger)
+TAG_COLUMNS = ["stage", "assignment", "tested_model"]
+GROUP_COLUMNS = {"run": "run_id", "model": "model", **{tag: tag for tag in TAG_COLUMNS}}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    stage TEXT,
+    assignment INTEGER,
+    tested_model TEXT,
+    prompt_tokens INTEGER,
+    cached_tokens INTEGER,
+    completion_tokens INTEGER,
+    reasoning_tokens INTEGER,
+    cost_usd REAL,
+    priced INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_calls_run ON calls (run_id);
+"""
+
+_local = threading.local()
+_run = {"id": datetime.now().strftime("%Y%m%d-%H%M%S"), "spend": 0.0, "calls": 0}
+_run_lock = threading.Lock()
+
+
+def _connect(db_path: Optional[Path] = None) -> sqlite3.Connection:
+    """Get this thread's connection to the ledger, creating it on first use."""
+    db_path = Path(db_path or config.COST_LEDGER_PATH)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def start_run(run_id: Optional[str] = None) -> str:
+    """
+    Start a run: later calls are recorded under run_id (default: a new ID from the current
+    time) and count against the budget. Continuing an existing run (e.g. --resume) starts
+    from the spend and calls the ledger already holds for it, so the budget covers the
+    run and all of its resumes.
+
+    Returns:
+        The run ID
+    """
+    spend, calls = 0.0, 0
+    if run_id:
+        calls, spend = _connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(cost_usd), 0) FROM calls WHERE run_id = ?", (run_id,)
+        ).fetchone()
+    with _run_lock:
+        _run.update(id=run_id or datetime.now().strftime("%Y%m%d-%H%M%S"), spend=spend, calls=calls)
+        return _run["id"]
+
+
+def get_run_id() -> str:
+    """Get the ID calls are currently recorded under."""
+    return _run["id"]
+
+
+def get_run_spend() -> float:
+    """Get the dollars spent by calls of the current run."""
+    return _run["spend"]
+
+
+def token_counts(usage: Optional[Dict]) -> Dict[str, int]:
+    """Pull prompt/cached/completion/reasoning token counts out of an OpenRouter usage dict."""
+    usage = usage or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "reasoning_tokens": (usage.get("completion_tokens_details") or {}).get("reasoning_tokens") or 0,
+    }
+
+
+def call_cost(model_id: str, usage: Optional[Dict]) -> Optional[float]:
+    """
+    Dollar cost of one call.
+
+    Uses config.MODEL_PRICES ($ per million tokens; cached prompt tokens at the
+    "cached_prompt" price if given) and falls back to the cost OpenRouter reports.
+
+    Returns:
+        Cost in dollars, or None if the model is unpriced and no cost was reported
+    """
+    prices = config.MODEL_PRICES.get(model_id)
+    if prices is None:
+        reported = (usage or {}).get("cost")
+        return float(reported) if reported is not None else None
+
+    tokens = token_counts(usage)
+    uncached = tokens["prompt_tokens"] - tokens["cached_tokens"]
+    cached_price = prices.get("cached_prompt", prices["prompt"])
+    return (
+        uncached * prices["prompt"]
+        + tokens["cached_tokens"] * cached_price
+        + tokens["completion_tokens"] * prices["completion"]
+    ) / 1e6
+
+
+def record(model_id: str, usage: Optional[Dict], tags: Optional[Dict] = None):
+    """Record one sent call under the current run."""
+    tags = tags or {}
+    cost = call_cost(model_id, usage)
+    tokens = token_counts(usage)
+    with _run_lock:
+        run_id = _run["id"]
+        _run["spend"] += cost or 0.0
+        _run["calls"] += 1
+
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT INTO calls (timestamp, run_id, model, stage, assignment, tested_model, prompt_tokens, "
+            "cached_tokens, completion_tokens, reasoning_tokens, cost_usd, priced) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now().isoformat(), run_id, model_id,
+                tags.get("stage"), tags.get("assignment"), tags.get("tested_model"),
+                tokens["prompt_tokens"], tokens["cached_tokens"],
+                tokens["completion_tokens"], tokens["reasoning_tokens"],
+                cost or 0.0, cost is not None,
+            ),
+        )
+
+
+def budget_exceeded() -> bool:
+    """Whether the current run has spent config.BUDGET_LIMIT_USD (never, if no limit is set)."""
+    limit = config.BUDGET_LIMIT_USD
+    return limit is not None and _run["spend"] >= limit
+
+
+def summarize(by: List[str], run_id: Optional[str] = None, db_path: Optional[Path] = None) -> List[Dict]:
+    """
+    Aggregate the ledger.
+
+    Args:
+        by: Grouping keys (see GROUP_COLUMNS: run, model, stage, assignment, tested_model)
+        run_id: Only include this run
+        db_path: Ledger database (default config.COST_LEDGER_PATH)
+
+    Returns:
+        One dict per group with the group keys, calls, token totals, cached_ratio,
+        cost_usd and unpriced (calls without a price)
+    """
+    columns = [GROUP_COLUMNS[key] for key in by]
+    where, params = ("WHERE run_id = ?", [run_id]) if run_id else ("", [])
+    select = ", ".join(columns + [
+        "COUNT(*)", "SUM(prompt_tokens)", "SUM(cached_tokens)", "SUM(completion_tokens)",
+        "SUM(reasoning_tokens)", "SUM(cost_usd)", "SUM(1 - priced)",
+    ])
+    group = f"GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}" if columns else ""
+    rows = _connect(db_path).execute(f"SELECT {select} FROM calls {where} {group}", params).fetchall()
+
+    summary = []
+    for row in rows:
+        keys, (calls, prompt, cached, completion, reasoning, cost, unpriced) = row[:len(by)], row[len(by):]
+        if not calls:
+            continue
+        summary.append({
+            **dict(zip(by, keys)),
+            "calls": calls,
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "cached_ratio": cached / prompt if prompt else 0.0,
+            "completion_tokens": completion,
+            "reasoning_tokens": reasoning,
+            "cost_usd": cost,
+            "unpriced": unpriced,
+        })
+    return summary
+
+
+def print_summary(by: List[str], run_id: Optional[str] = None):
+    """Print the ledger aggregated by the given keys."""
+    rows = summarize(by, run_id)
+    if not rows:
+        print("No calls recorded" + (f" for run {run_id}" if run_id else ""))
+        return
+
+    labels = [" / ".join(str(row[key]) for key in by) or "all" for row in rows]
+    header = " / ".join(by) or "all"
+    width = max(len(label) for label in labels + [header])
+    print(f"{header:{width}s} {'calls':>6s} {'prompt':>11s} {'cached':>7s} "
+          f"{'completion':>11s} {'reasoning':>10s} {'cost $':>10s}")
+    for label, row in zip(labels, rows):
+        note = f"  ({row['unpriced']} unpriced)" if row["unpriced"] else ""
+        print(f"{label:{width}s} {row['calls']:6d} {row['prompt_tokens']:11,d} {row['cached_ratio']:7.1%} "
+              f"{row['completion_tokens']:11,d} {row['reasoning_tokens']:10,d} {row['cost_usd']:10.4f}{note}")
+
+
+def print_run_summary():
+    """Print the current run's calls and spend (if it made any)."""
+    with _run_lock:
+        run_id, spend, calls = _run["id"], _run["spend"], _run["calls"]
+    if not calls:
+        return
+    limit = config.BUDGET_LIMIT_USD
+    budget = f" of ${limit:.2f} budget" if limit is not None else ""
+    print(f"Spend (run {run_id}): ${spend:.4f}{budget} over {calls} call(s); "
+          f"see python cost_ledger.py --run {run_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report token usage and spend from the cost ledger.")
+    parser.add_argument("--by", nargs="*", choices=list(GROUP_COLUMNS), default=["model", "stage"],
+                        help="Group by these keys (default: model stage)")
+    parser.add_argument("--run", default=None, help="Only include this run ID")
+    args = parser.parse_args()
+
+    print(f"Ledger: {config.COST_LEDGER_PATH}\n")
+    print_summary(args.by, args.run)
+    if args.by:
+        print()
+        print_summary([], args.run)
+
+
+if __name__ == "__main__":
+    main()
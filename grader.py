@@ -2,14 +2,36 @@
 Module for grading model answers.
 """
 
+import asyncio
+import hashlib
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 import config
+import cassette
+import cost_ledger
+import metrics
 import openrouter_client
+import request_cache
 import answerer
+import grading_schema
+import providers
+import questions
+import scheduler
+import results_store
+import run_manifest
+import tracing
+
+# Upload size of grader requests made by this process (see print_upload_stats)
+_upload_stats = {"requests": 0, "bytes": 0}
+_upload_stats_lock = threading.Lock()
+
+# Grader responses checked against the grading schema by this process (see print_parse_stats)
+_parse_stats = {"responses": 0, "failures": 0, "reasks": 0}
+_parse_stats_lock = threading.Lock()
 
 
 def load_ground_truth(assignment_num: int) -> Optional[str]:
@@ -22,25 +44,82 @@ def load_ground_truth(assignment_num: int) -> Optional[str]:
         return f.read()
 
 
-def grade_answer(
+def get_answer_hash(student_answer: str) -> str:
+    """Hash an answer's text so grades can be matched to the exact answer they graded."""
+    return hashlib.sha256(student_answer.encode("utf-8")).hexdigest()
+
+
+def get_ground_truth_hash(assignment_num: int) -> Optional[str]:
+    """Hash an assignment's ground truth so grades made against an older version can be spotted."""
+    ground_truth = load_ground_truth(assignment_num)
+    return get_answer_hash(ground_truth) if ground_truth is not None else None
+
+
+def get_grade_path(grader_model: str, model_id: str, assignment_num: int, trial_num: int, grade_num: int) -> Path:
+    """
+    Get the file path where a grade should be saved/loaded.
+    Structure: grades/{grader_model}/{tested_model}/trial_{n}/assignment_{n}_grade_{n}.json
+    """
+    grader_name = grader_model.replace("/", "_")
+    model_name = model_id.replace("/", "_")
+    grade_dir = config.GRADES_DIR / grader_name / model_name / f"trial_{trial_num}"
+    return grade_dir / f"assignment_{assignment_num}_grade_{grade_num}.json"
+
+
+def load_existing_grade(model_id: str, assignment_num: int, trial_num: int, grade_num: int) -> Optional[Dict]:
+    """Load an existing grade by the current grader model from disk, if it exists."""
+    grade_path = get_grade_path(config.GRADER_MODEL, model_id, assignment_num, trial_num, grade_num)
+    if grade_path.exists():
+        with open(grade_path, "r") as f:
+            return json.load(f)
+    return None
+
+
+def is_grade_current(
+    grade_data: Optional[Dict],
+    answer_hash: str,
+    answer_timestamp: Optional[str],
+    per_question: bool = False,
+    ground_truth_hash: Optional[str] = None,
+) -> bool:
+    """
+    Check whether an existing grade is a usable grade of the current answer.
+
+    Grades that failed or could not be parsed are never current, nor are grades made in
+    the other grading mode (per_question), so whole-answer and per-question grades aren't mixed.
+    Grades that record the ground truth hash must match ground_truth_hash (the ground truth
+    is part of the grading prompt).
+    Grades that record the answer hash must match it; older grades without one must be newer
+    than the answer.
+    """
+    if not grade_data or not grade_data.get("success") or grade_data.get("score") is None:
+        return False
+    if bool(grade_data.get("per_question")) != per_question:
+        return False
+    if not _ground_truth_matches(grade_data, ground_truth_hash):
+        return False
+    if grade_data.get("answer_hash"):
+        return grade_data["answer_hash"] == answer_hash
+    return bool(answer_timestamp) and grade_data.get("timestamp", "") >= answer_timestamp
+
+
+def _ground_truth_matches(grade_data: Dict, ground_truth_hash: Optional[str]) -> bool:
+    """Whether a grade was made against this ground truth (grades that don't record one are assumed to be)."""
+    return not grade_data.get("ground_truth_hash") or grade_data["ground_truth_hash"] == ground_truth_hash
+
+
+def _prepare_grade(
     model_id: str,
     assignment_num: int,
     student_answer: str,
-    trial_num: int = 0,
-    grade_num: int = 0
-) -> Dict:
+    grade_num: int,
+    verbose: bool
+) -> Tuple[Optional[Dict], str, List[Path]]:
     """
-    Grade a student's answer using the grader model.
-
-    Args:
-        model_id: The model that provided the answer
-        assignment_num: Assignment number
-        student_answer: The student's answer text
-        trial_num: Trial number
-        grade_num: Grade attempt number (for consistency checking)
+    Shared setup for grade_answer and grade_answer_async.
 
     Returns:
-        Dict containing the grade and metadata
+        (error, grading_prompt, image_paths) - error is set when the answer can't be graded
     """
     # Load ground truth
     ground_truth = load_ground_truth(assignment_num)
@@ -50,7 +129,7 @@ def grade_answer(
             "error": f"Ground truth not found for assignment {assignment_num}",
             "model_id": model_id,
             "assignment_num": assignment_num,
-        }
+        }, "", []
 
     # Find all images for this assignment (same as answerer)
     image_paths = answerer.find_assignment_images(assignment_num)
@@ -60,9 +139,10 @@ def grade_answer(
             "error": f"No images found for assignment {assignment_num}",
             "model_id": model_id,
             "assignment_num": assignment_num,
-        }
+        }, "", []
 
-    print(f"  Grading {model_id}'s answer (grade {grade_num + 1}/{config.NUM_GRADES})...")
+    if verbose:
+        print(f"  Grading {model_id}'s answer (grade {grade_num + 1}/{config.NUM_GRADES})...")
 
     # Build grading prompt
     grading_prompt = config.GRADING_PROMPT_TEMPLATE.format(
@@ -70,15 +150,118 @@ def grade_answer(
         student_answer=student_answer
     )
 
-    # Call grader model with all images
-    result = openrouter_client.call_model(
-        model_id=config.GRADER_MODEL,
-        prompt=grading_prompt,
-        image_paths=image_paths,
-        max_tokens=config.GRADER_MAX_TOKENS,
-        temperature=config.GRADER_TEMPERATURE,
-    )
+    return None, grading_prompt, image_paths
+
+
+def _record_upload(result: Dict):
+    """Count a grader request's upload size (cache hits upload nothing)."""
+    request_bytes = (result.get("metrics") or {}).get("request_bytes")
+    if request_bytes and not result.get("cache_hit"):
+        with _upload_stats_lock:
+            _upload_stats["requests"] += 1
+            _upload_stats["bytes"] += request_bytes
+
+
+def print_upload_stats():
+    """Print how many bytes this process uploaded to the grader (if any)."""
+    with _upload_stats_lock:
+        requests_made, total_bytes = _upload_stats["requests"], _upload_stats["bytes"]
+    if requests_made:
+        print(f"Grader uploads: {requests_made} request(s), {total_bytes / 1e6:.1f} MB "
+              f"({total_bytes / requests_made / 1e3:.0f} KB per request)")
+
+
+def _parse_result(result: Dict, schema: Dict) -> bool:
+    """
+    Parse and validate a grader call_model result against a grading schema.
+
+    Sets result["parsed"] on success and result["parse_error"] on failure.
+
+    Returns:
+        Whether the result is a failed parse that is worth re-asking
+        (API errors are not; call_model has already retried those)
+    """
+    if result["error"]:
+        return False
+    try:
+        with tracing.span("parse_grade", "grader"):
+            result["parsed"] = grading_schema.parse(result["content"], schema)
+        failed = False
+    except ValueError as e:
+        result["parse_error"] = str(e)
+        failed = True
+    with _parse_stats_lock:
+        _parse_stats["responses"] += 1
+        _parse_stats["failures"] += failed
+    return failed
+
+
+def _reask_kwargs(call_kwargs: Dict, reask: int) -> Dict:
+    """
+    call_model arguments for re-asking: a new sample_key, so the request cache doesn't
+    replay the bad reply, and a "_reask" stage in the cost ledger.
+    """
+    with _parse_stats_lock:
+        _parse_stats["reasks"] += 1
+    tags = call_kwargs.get("tags") or {}
+    return {
+        **call_kwargs,
+        "sample_key": f"{call_kwargs['sample_key']}_reask_{reask}",
+        "tags": {**tags, "stage": f"{tags.get('stage', 'grade')}_reask"},
+    }
+
+
+def _call_grader(call_kwargs: Dict, schema: Dict) -> Dict:
+    """
+    Call the grader and validate its response, re-asking up to config.GRADE_PARSE_RETRIES
+    times if it doesn't match the schema.
 
+    Returns:
+        The last call_model result, with 'parsed' or 'parse_error' and 'reasks' set
+    """
+    result = openrouter_client.call_model(**call_kwargs)
+    _record_upload(result)
+    reasks = 0
+    while _parse_result(result, schema) and reasks < config.GRADE_PARSE_RETRIES:
+        reasks += 1
+        result = openrouter_client.call_model(**_reask_kwargs(call_kwargs, reasks))
+        _record_upload(result)
+    result["reasks"] = reasks
+    return result
+
+
+async def _call_grader_async(call_kwargs: Dict, schema: Dict) -> Dict:
+    """Async version of _call_grader using openrouter_client.call_model_async."""
+    result = await openrouter_client.call_model_async(**call_kwargs)
+    _record_upload(result)
+    reasks = 0
+    while _parse_result(result, schema) and reasks < config.GRADE_PARSE_RETRIES:
+        reasks += 1
+        result = await openrouter_client.call_model_async(**_reask_kwargs(call_kwargs, reasks))
+        _record_upload(result)
+    result["reasks"] = reasks
+    return result
+
+
+def print_parse_stats():
+    """Print how many grader responses failed schema validation (if any were checked)."""
+    with _parse_stats_lock:
+        responses, failures, reasks = _parse_stats["responses"], _parse_stats["failures"], _parse_stats["reasks"]
+    if responses:
+        print(f"Grader responses: {responses} checked, {failures} failed schema validation "
+              f"({failures / responses:.1%}), {reasks} re-asked")
+
+
+def _finish_grade(
+    model_id: str,
+    assignment_num: int,
+    trial_num: int,
+    grade_num: int,
+    answer_hash: str,
+    result: Dict,
+    verbose: bool
+) -> Dict:
+    """Build the grade object from a grader call_model result, parse it and save it."""
     # Build response object
     grade_data = {
         "grader_model": config.GRADER_MODEL,
@@ -86,45 +269,32 @@ def grade_answer(
         "assignment_num": assignment_num,
         "trial_num": trial_num,
         "grade_num": grade_num,
+        "answer_hash": answer_hash,
+        "ground_truth_hash": get_ground_truth_hash(assignment_num),
         "timestamp": datetime.now().isoformat(),
         "success": result["error"] is None,
+        "attempts": result.get("attempts", 1),
+        "reasks": result.get("reasks", 0),
     }
 
     if result["error"]:
         grade_data["error"] = result["error"]
         grade_data["grade_response"] = None
-        print(f"  ❌ Grading error: {result['error']}")
+        if verbose:
+            print(f"  ❌ Grading error: {result['error']}")
     else:
         grade_data["grade_response"] = result["content"]
         grade_data["usage"] = result.get("usage", {})
+        grade_data["metrics"] = result.get("metrics", {})
+        grade_data["request_fingerprint"] = result.get("request_fingerprint")
+        if result.get("cache_hit"):
+            grade_data["cache_hit"] = True
 
-        # Try to parse the JSON grade
-        try:
-            # Extract JSON from response (may have markdown code blocks or extra text)
-            response_text = result["content"].strip()
-
-            # Try to find JSON in various formats
-            json_text = None
-
-            # Check for markdown code blocks
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                # Try to find JSON object by looking for { and }
-                if "{" in response_text and "}" in response_text:
-                    json_start = response_text.find("{")
-                    json_end = response_text.rfind("}") + 1
-                    json_text = response_text[json_start:json_end].strip()
-                else:
-                    json_text = response_text
-
-            parsed_grade = json.loads(json_text)
+        # Parse the JSON grade (already validated by _call_grader for single grades)
+        if "parsed" not in result and "parse_error" not in result:
+            _parse_result(result, grading_schema.GRADE_SCHEMA)
+        if "parsed" in result:
+            parsed_grade = result["parsed"]
             grade_data["score"] = parsed_grade.get("score")
             grade_data["questions"] = parsed_grade.get("questions", {})
             grade_data["total_correct"] = parsed_grade.get("total_correct")
@@ -141,21 +311,492 @@ def grade_answer(
                     "incorrect": incorrect_count
                 }
 
-            print(f"  ✓ Score: {grade_data['score']}/100 ({grade_data.get('total_correct', 0)}/{grade_data.get('total_questions', 0)} correct)")
-        except (json.JSONDecodeError, ValueError) as e:
-            grade_data["parse_error"] = str(e)
+            if verbose:
+                print(f"  ✓ Score: {grade_data['score']}/100 ({grade_data.get('total_correct', 0)}/{grade_data.get('total_questions', 0)} correct)")
+        else:
+            grade_data["parse_error"] = result["parse_error"]
             grade_data["score"] = None
             # Store raw response for debugging
-            grade_data["raw_response_preview"] = result["content"][:500]
-            print(f"  ⚠️  Got response but couldn't parse JSON: {str(e)}")
+            grade_data["raw_response_preview"] = (result["content"] or "")[:500]
+            if verbose:
+                print(f"  ⚠️  Got response but couldn't parse JSON: {result['parse_error']}")
 
     # Save grade
-    save_grade(grade_data)
+    save_grade(grade_data, verbose=verbose)
 
     return grade_data
 
 
-def save_grade(grade_data: Dict):
+def _grade_call_kwargs(
+    model_id: str,
+    assignment_num: int,
+    grading_prompt: str,
+    image_paths: List[Path],
+    grade_num: int,
+    use_cache: bool = True
+) -> Dict:
+    """call_model keyword arguments for one grade of a whole answer."""
+    return dict(
+        model_id=config.GRADER_MODEL,
+        prompt=grading_prompt,
+        image_paths=image_paths,
+        max_tokens=config.GRADER_MAX_TOKENS,
+        temperature=config.GRADER_TEMPERATURE,
+        sample_key=f"grade_{grade_num}",
+        use_cache=use_cache,
+        response_format=grading_schema.response_format(config.GRADER_MODEL, "grade", grading_schema.GRADE_SCHEMA),
+        tags={"stage": "grade", "assignment": assignment_num, "tested_model": model_id},
+    )
+
+
+def grade_answer(
+    model_id: str,
+    assignment_num: int,
+    student_answer: str,
+    trial_num: int = 0,
+    grade_num: int = 0,
+    verbose: bool = True,
+    use_cache: bool = True
+) -> Dict:
+    """
+    Grade a student's answer using the grader model.
+
+    Args:
+        model_id: The model that provided the answer
+        assignment_num: Assignment number
+        student_answer: The student's answer text
+        trial_num: Trial number
+        grade_num: Grade attempt number (for consistency checking)
+        verbose: Print progress messages
+        use_cache: Look up the verdict in the request cache (False to always call the grader)
+
+    Returns:
+        Dict containing the grade and metadata
+    """
+    error, grading_prompt, image_paths = _prepare_grade(model_id, assignment_num, student_answer, grade_num, verbose)
+    if error is not None:
+        return error
+
+    # Call grader model with all images
+    call_kwargs = _grade_call_kwargs(model_id, assignment_num, grading_prompt, image_paths, grade_num, use_cache)
+    result = _call_grader(call_kwargs, grading_schema.GRADE_SCHEMA)
+
+    answer_hash = get_answer_hash(student_answer)
+    return _finish_grade(model_id, assignment_num, trial_num, grade_num, answer_hash, result, verbose)
+
+
+async def grade_answer_async(
+    model_id: str,
+    assignment_num: int,
+    student_answer: str,
+    trial_num: int = 0,
+    grade_num: int = 0,
+    verbose: bool = True,
+    use_cache: bool = True
+) -> Dict:
+    """
+    Async version of grade_answer using openrouter_client.call_model_async.
+    Takes the same arguments and returns the same dict as grade_answer.
+    """
+    error, grading_prompt, image_paths = _prepare_grade(model_id, assignment_num, student_answer, grade_num, verbose)
+    if error is not None:
+        return error
+
+    # Call grader model with all images
+    call_kwargs = _grade_call_kwargs(model_id, assignment_num, grading_prompt, image_paths, grade_num, use_cache)
+    result = await _call_grader_async(call_kwargs, grading_schema.GRADE_SCHEMA)
+
+    answer_hash = get_answer_hash(student_answer)
+    return _finish_grade(model_id, assignment_num, trial_num, grade_num, answer_hash, result, verbose)
+
+
+def _prepare_batch(
+    model_id: str,
+    assignment_num: int,
+    student_answer: str,
+    grade_nums: List[int],
+    verbose: bool,
+    use_cache: bool = True
+) -> Tuple[Optional[Dict], Dict]:
+    """
+    Shared setup for grade_answer_batch and grade_answer_batch_async.
+
+    Returns:
+        (error, call_model keyword arguments)
+    """
+    error, grading_prompt, image_paths = _prepare_grade(model_id, assignment_num, student_answer, grade_nums[0], verbose)
+    if error is not None:
+        return error, {}
+
+    n = 1
+    schema_name, schema = "grade", grading_schema.GRADE_SCHEMA
+    if config.GRADE_BATCH_MODE == "n":
+        n = len(grade_nums)
+    elif config.GRADE_BATCH_MODE == "prompt":
+        grading_prompt += config.GRADING_MULTI_VERDICT_PROMPT.format(n=len(grade_nums))
+        schema_name, schema = "gradings", grading_schema.MULTI_GRADE_SCHEMA
+    else:
+        raise ValueError(f"Unsupported GRADE_BATCH_MODE: {config.GRADE_BATCH_MODE!r} (expected 'n' or 'prompt')")
+
+    return None, dict(
+        model_id=config.GRADER_MODEL,
+        prompt=grading_prompt,
+        image_paths=image_paths,
+        max_tokens=config.GRADER_MAX_TOKENS * (len(grade_nums) if n == 1 else 1),
+        temperature=config.GRADER_TEMPERATURE,
+        sample_key=f"grades_{grade_nums[0]}-{grade_nums[-1]}",
+        use_cache=use_cache,
+        n=n,
+        response_format=grading_schema.response_format(config.GRADER_MODEL, schema_name, schema),
+        tags={"stage": "grade_batch", "assignment": assignment_num, "tested_model": model_id},
+    )
+
+
+def _split_batch_result(result: Dict, count: int, verbose: bool) -> List[Dict]:
+    """
+    Split a batched grader call into one call_model-style result per valid verdict
+    (only the first carries the call's usage; see metrics batch_size/batch_index).
+    May return fewer than `count` results if the grader returned fewer valid verdicts
+    (verdicts that don't match the grading schema are dropped and graded again singly).
+    """
+    if result["error"]:
+        return [result] * count
+
+    if config.GRADE_BATCH_MODE == "n":
+        contents = result.get("contents") or [result["content"]]
+    else:
+        multi = {**result}
+        if _parse_result(multi, grading_schema.MULTI_GRADE_SCHEMA):
+            if verbose:
+                print(f"  ⚠️  Couldn't parse batched verdicts, grading one at a time: {multi['parse_error']}")
+            contents = []
+        else:
+            contents = [json.dumps(grading) for grading in multi["parsed"]["gradings"]]
+
+    verdicts = []
+    for content in contents[:count]:
+        verdict = {**result, "content": content}
+        if not _parse_result(verdict, grading_schema.GRADE_SCHEMA):
+            verdicts.append(verdict)
+    # The call's usage and token/byte counts are recorded once, on the first verdict, so summing
+    # over grades doesn't count a batched call batch_size times
+    for index, verdict in enumerate(verdicts):
+        verdict["metrics"] = {**result.get("metrics", {}), "batch_size": len(verdicts), "batch_index": index}
+        if index > 0:
+            verdict["usage"] = {}
+            verdict["metrics"].update(output_tokens=0, request_bytes=0)
+    return verdicts
+
+
+def grade_answer_batch(
+    model_id: str,
+    assignment_num: int,
+    student_answer: str,
+    trial_num: int = 0,
+    grade_nums: List[int] = (0,),
+    verbose: bool = True,
+    use_cache: bool = True
+) -> List[Dict]:
+    """
+    Grade an answer several times with one grader request (see config.GRADE_BATCH_MODE).
+    Each verdict is saved as its own grade; verdicts the grader didn't return are
+    graded with separate grade_answer calls.
+
+    Args:
+        grade_nums: Grade numbers to produce
+        (other arguments as for grade_answer)
+
+    Returns:
+        List of grade dicts, one per grade number
+    """
+    grade_nums = list(grade_nums)
+    error, call_kwargs = _prepare_batch(model_id, assignment_num, student_answer, grade_nums, verbose, use_cache)
+    if error is not None:
+        return [error]
+
+    result = openrouter_client.call_model(**call_kwargs)
+    _record_upload(result)
+
+    answer_hash = get_answer_hash(student_answer)
+    verdicts = _split_batch_result(result, len(grade_nums), verbose)
+    grades = [
+        _finish_grade(model_id, assignment_num, trial_num, grade_num, answer_hash, verdict, verbose)
+        for grade_num, verdict in zip(grade_nums, verdicts)
+    ]
+    for grade_num in grade_nums[len(verdicts):]:
+        grades.append(grade_answer(model_id, assignment_num, student_answer, trial_num, grade_num, verbose, use_cache))
+    return grades
+
+
+async def grade_answer_batch_async(
+    model_id: str,
+    assignment_num: int,
+    student_answer: str,
+    trial_num: int = 0,
+    grade_nums: List[int] = (0,),
+    verbose: bool = True,
+    use_cache: bool = True
+) -> List[Dict]:
+    """
+    Async version of grade_answer_batch using openrouter_client.call_model_async.
+    Takes the same arguments and returns the same list as grade_answer_batch.
+    """
+    grade_nums = list(grade_nums)
+    error, call_kwargs = _prepare_batch(model_id, assignment_num, student_answer, grade_nums, verbose, use_cache)
+    if error is not None:
+        return [error]
+
+    result = await openrouter_client.call_model_async(**call_kwargs)
+    _record_upload(result)
+
+    answer_hash = get_answer_hash(student_answer)
+    verdicts = _split_batch_result(result, len(grade_nums), verbose)
+    grades = [
+        _finish_grade(model_id, assignment_num, trial_num, grade_num, answer_hash, verdict, verbose)
+        for grade_num, verdict in zip(grade_nums, verdicts)
+    ]
+    for grade_num in grade_nums[len(verdicts):]:
+        grades.append(await grade_answer_async(model_id, assignment_num, student_answer, trial_num, grade_num, verbose,
+                                               use_cache))
+    return grades
+
+
+def _question_call_kwargs(job: Dict, use_cache: bool = True) -> Dict:
+    """call_model keyword arguments for grading one question (see _question_jobs)."""
+    return dict(
+        model_id=config.GRADER_MODEL,
+        prompt=config.QUESTION_GRADING_PROMPT_TEMPLATE.format(
+            question_id=job["question_id"],
+            ground_truth=job["question_ground_truth"],
+            student_answer=job["question_answer"],
+        ),
+        image_paths=answerer.find_assignment_images(job["assignment_num"]),
+        max_tokens=config.QUESTION_GRADER_MAX_TOKENS,
+        temperature=config.GRADER_TEMPERATURE,
+        sample_key=f"grade_{job['grade_num']}_q{job['question_id']}",
+        use_cache=use_cache,
+        response_format=grading_schema.response_format(
+            config.GRADER_MODEL, "question_grade", grading_schema.QUESTION_SCHEMA, strict=True
+        ),
+        tags={"stage": "grade_question", "assignment": job["assignment_num"], "tested_model": job["model_id"]},
+    )
+
+
+def _sum_counts(counts: List[Dict]) -> Dict:
+    """Sum the numeric fields of usage dicts."""
+    total: Dict = {}
+    for entry in counts:
+        for key, value in (entry or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                total[key] = total.get(key, 0) + value
+    return total
+
+
+class QuestionGradeCollector:
+    """
+    Collects per-question verdicts and saves each grade once all of its questions are done.
+
+    Question jobs of one grade run independently (and in any order) on the scheduler;
+    record() is called from their workers and is thread-safe.
+    """
+
+    def __init__(self):
+        self._grades: Dict[Tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, answer: Dict, grade_num: int, question_ids: List[str], reused: Dict[str, str]) -> Tuple:
+        """Register a grade of an answer; reused verdicts (from an earlier run) are not regraded."""
+        key = (answer["model_id"], answer["trial_num"], answer["assignment_num"], grade_num)
+        self._grades[key] = {
+            "answer": answer,
+            "grade_num": grade_num,
+            "question_ids": question_ids,
+            "verdicts": dict(reused),
+            "errors": {},
+            "results": [],
+            "reused": sorted(reused),
+            "remaining": set(question_ids) - set(reused),
+        }
+        return key
+
+    def record(self, job: Dict, result: Dict, verbose: bool = False) -> Dict:
+        """
+        Record one question's grader result, saving the grade if it was the last question.
+
+        Returns:
+            Dict with 'success' (whether this question got a valid verdict)
+        """
+        label = (result.get("parsed") or {}).get("result")
+        error = result["error"] or f"Couldn't parse question verdict: {result.get('parse_error')}"
+
+        with self._lock:
+            entry = self._grades[job["grade_key"]]
+            if label is not None:
+                entry["verdicts"][job["question_id"]] = label
+            else:
+                entry["errors"][job["question_id"]] = error
+            entry["results"].append(result)
+            entry["remaining"].discard(job["question_id"])
+
+        self.save_if_complete(job["grade_key"], verbose)
+        return {"success": label is not None}
+
+    def save_if_complete(self, key: Tuple, verbose: bool = False):
+        """Save a grade once none of its questions are outstanding (only once per grade)."""
+        with self._lock:
+            entry = self._grades[key]
+            if entry["remaining"] or entry.get("saved"):
+                return
+            entry["saved"] = True
+        save_grade(self._build_grade(entry), verbose=verbose)
+
+    def _build_grade(self, entry: Dict) -> Dict:
+        """Assemble a grade record (same fields as _finish_grade) from per-question verdicts."""
+        answer = entry["answer"]
+        question_ids = entry["question_ids"]
+        verdicts = {qid: entry["verdicts"][qid] for qid in question_ids if qid in entry["verdicts"]}
+        failed = {qid: entry["errors"].get(qid, "not graded") for qid in question_ids if qid not in verdicts}
+        results = [result for result in entry["results"] if result["error"] is None]
+        question_metrics = [result.get("metrics") or {} for result in results]
+
+        grade_data = {
+            "grader_model": config.GRADER_MODEL,
+            "graded_model": answer["model_id"],
+            "assignment_num": answer["assignment_num"],
+            "trial_num": answer["trial_num"],
+            "grade_num": entry["grade_num"],
+            "answer_hash": answer["answer_hash"],
+            "ground_truth_hash": get_ground_truth_hash(answer["assignment_num"]),
+            "timestamp": datetime.now().isoformat(),
+            "success": not failed,
+            "attempts": sum(result.get("attempts", 1) for result in entry["results"]),
+            "reasks": sum(result.get("reasks", 0) for result in entry["results"]),
+            "per_question": True,
+            "question_results": verdicts,
+            "reused_questions": entry["reused"],
+            "usage": _sum_counts([result.get("usage") for result in results]),
+            "metrics": {
+                "question_requests": len(entry["results"]),
+                # Questions run in parallel, so the slowest one bounds the grade's latency
+                # (cache hits have no latency)
+                "latency": max((metrics["latency"] for metrics in question_metrics
+                                if metrics.get("latency") is not None), default=None),
+                "output_tokens": sum(metrics.get("output_tokens") or 0 for metrics in question_metrics),
+                "request_bytes": sum(metrics.get("request_bytes") or 0 for metrics in question_metrics),
+            },
+        }
+
+        if failed:
+            # Incomplete grades stay out of the analysis; the next run retries only these questions
+            grade_data["error"] = f"{len(failed)}/{len(question_ids)} question(s) not graded"
+            grade_data["question_errors"] = failed
+            grade_data["score"] = None
+            return grade_data
+
+        summary = {
+            label: sum(1 for v in verdicts.values() if v == label) for label in grading_schema.QUESTION_RESULTS
+        }
+        grade_data["questions"] = verdicts
+        grade_data["summary"] = summary
+        grade_data["total_correct"] = summary["correct"]
+        grade_data["total_questions"] = len(question_ids)
+        grade_data["score"] = round(100 * (summary["correct"] + 0.5 * summary["partial"]) / len(question_ids), 1)
+        return grade_data
+
+
+def _question_jobs(jobs: List[Dict], collector: QuestionGradeCollector, incremental: bool = True) -> List[Dict]:
+    """
+    Expand grade jobs into one job per ungraded question (see questions.py).
+
+    With incremental set, verdicts saved by an earlier per-question grade of the same
+    answer are reused, so only the questions that failed are sent again.
+    """
+    question_jobs = []
+    split_cache: Dict[int, Dict[str, str]] = {}
+    for job in jobs:
+        assignment_num = job["assignment_num"]
+        if assignment_num not in split_cache:
+            split_cache[assignment_num] = questions.split_ground_truth(load_ground_truth(assignment_num) or "")
+        ground_truths = split_cache[assignment_num]
+        if not ground_truths:
+            print(f"  ⚠️  No labelled questions in the ground truth for assignment {assignment_num}; "
+                  f"grade it without --per-question")
+            continue
+
+        answer = {**job, "answer_hash": get_answer_hash(job["student_answer"])}
+        question_ids = list(ground_truths)
+        existing = load_existing_grade(job["model_id"], assignment_num, job["trial_num"], job["grade_num"])
+        reused = {}
+        if (incremental and existing and existing.get("per_question")
+                and existing.get("answer_hash") == answer["answer_hash"]
+                and _ground_truth_matches(existing, get_ground_truth_hash(assignment_num))):
+            reused = {qid: label for qid, label in (existing.get("question_results") or {}).items()
+                      if qid in ground_truths}
+
+        grade_key = collector.add(answer, job["grade_num"], question_ids, reused)
+        collector.save_if_complete(grade_key)
+        sections = questions.split_student_answer(job["student_answer"], question_ids)
+        for question_id in question_ids:
+            if question_id not in reused:
+                question_jobs.append({
+                    **job,
+                    "grade_key": grade_key,
+                    "question_id": question_id,
+                    "question_ground_truth": ground_truths[question_id],
+                    "question_answer": sections[question_id],
+                })
+    return question_jobs
+
+
+def _run_question_jobs(
+    jobs: List[Dict],
+    use_async: bool = False,
+    incremental: bool = True,
+    use_cache: bool = True,
+) -> Dict:
+    """
+    Grade each question of the given grade jobs as its own request (see _run_grade_jobs).
+
+    Returns:
+        Dict with 'total', 'successful' and 'failed' counts of question requests
+    """
+    collector = QuestionGradeCollector()
+    question_jobs = _question_jobs(jobs, collector, incremental)
+    common = dict(
+        provider_of=lambda job: providers.get_provider(config.GRADER_MODEL),
+        describe=lambda job: (f"{job['model_id'].split('/')[-1]} A{job['assignment_num']} "
+                              f"#{job['grade_num']} Q{job['question_id']}"),
+        unit="question",
+    )
+
+    if use_async:
+        print(f"\n  Running {len(jobs)} grade job(s) as {len(question_jobs)} question request(s) "
+              f"with up to {config.ASYNC_MAX_IN_FLIGHT} requests in flight...")
+
+        async def grade_question(job: Dict) -> Dict:
+            result = await _call_grader_async(_question_call_kwargs(job, use_cache), grading_schema.QUESTION_SCHEMA)
+            return collector.record(job, result)
+
+        async def run():
+            try:
+                return await scheduler.run_jobs_async(question_jobs, worker=grade_question, **common)
+            finally:
+                await openrouter_client.close_async_client()
+
+        return asyncio.run(run())
+
+    print(f"\n  Running {len(jobs)} grade job(s) as {len(question_jobs)} question request(s) "
+          f"with {config.MAX_WORKERS} workers...")
+    return scheduler.run_jobs(
+        question_jobs,
+        worker=lambda job: collector.record(
+            job, _call_grader(_question_call_kwargs(job, use_cache), grading_schema.QUESTION_SCHEMA)
+        ),
+        **common,
+    )
+
+
+def save_grade(grade_data: Dict, verbose: bool = True):
     """Save grade to disk in two formats for different use cases."""
     grader_model = grade_data["grader_model"]
     model_id = grade_data["graded_model"]
@@ -164,17 +805,14 @@ def save_grade(grade_data: Dict):
     grade_num = grade_data["grade_num"]
 
     # 1. Save detailed grade to organized directory structure
-    # Structure: grades/{grader_model}/{tested_model}/trial_{n}/assignment_{n}_grade_{n}.json
-    grader_name = grader_model.replace("/", "_")
-    model_name = model_id.replace("/", "_")
-    grade_dir = config.GRADES_DIR / grader_name / model_name / f"trial_{trial_num}"
-    grade_dir.mkdir(parents=True, exist_ok=True)
+    output_file = get_grade_path(grader_model, model_id, assignment_num, trial_num, grade_num)
+    with tracing.span("save_grade", "grader"):
+        output_file.parent.mkdir(parents=True, exist_ok=True)
 
-    output_file = grade_dir / f"assignment_{assignment_num}_grade_{grade_num}.json"
-    with open(output_file, "w") as f:
-        json.dump(grade_data, f, indent=2)
+        with open(output_file, "w") as f:
+            json.dump(grade_data, f, indent=2)
 
-    # 2. Append to JSONL for easy bulk analysis
+    # 2. Upsert into the results store for easy bulk analysis
     # Create a flattened version for analysis
     analysis_record = {
         "grader_model": grader_model,
@@ -191,48 +829,49 @@ def save_grade(grade_data: Dict):
         "success": grade_data["success"],
     }
 
-    # Append to results file
-    config.RESULTS_DIR.mkdir(parents=True, exist_ok=True)
-    results_file = config.RESULTS_DIR / "grades.jsonl"
+    # Replaces any earlier grade with the same key, so re-runs don't add duplicates
+    with tracing.span("upsert_grade", "grader"):
+        results_store.ensure_migrated()
+        results_store.upsert_grade(analysis_record)
 
-    with open(results_file, "a") as f:
-        f.write(json.dumps(analysis_record) + "\n")
+    # Every grading mode ends a job here, successful or not
+    run_manifest.mark_active(
+        {"model_id": model_id, "trial_num": trial_num, "assignment_num": assignment_num, "grade_num": grade_num},
+        grade_data["success"],
+        grade_data.get("error") or grade_data.get("parse_error"),
+    )
 
-    print(f"  Saved to: {output_file}")
-    print(f"  Appended to: {results_file}")
+    if verbose:
+        print(f"  Saved to: {output_file}")
+        print(f"  Upserted into: {config.RESULTS_DB_PATH}")
 
 
-def grade_all_responses():
+def find_answers() -> List[Dict]:
     """
-    Grade all existing responses in the responses directory.
-    """
-    print("=" * 60)
-    print("Grading All Responses")
-    print("=" * 60)
-    print()
+    Collect every successful answer in the responses directory.
 
-    graded_count = 0
-    error_count = 0
+    Returns:
+        List of dicts with model_id, assignment_num, trial_num, student_answer,
+        answer_hash and answer_timestamp
+    """
+    answers = []
 
     # Iterate through all model directories
-    for model_dir in config.RESPONSES_DIR.iterdir():
+    for model_dir in sorted(config.RESPONSES_DIR.iterdir()):
         if not model_dir.is_dir():
             continue
 
         model_id = model_dir.name.replace("_", "/")
-        print(f"\n{'='*60}")
-        print(f"Grading: {model_id}")
-        print('='*60)
 
         # Iterate through trial directories
-        for trial_dir in model_dir.iterdir():
+        for trial_dir in sorted(model_dir.iterdir()):
             if not trial_dir.is_dir() or not trial_dir.name.startswith("trial_"):
                 continue
 
             trial_num = int(trial_dir.name.replace("trial_", ""))
 
             # Find answer files
-            for answer_file in trial_dir.glob("*_answer.json"):
+            for answer_file in sorted(trial_dir.glob("*_answer.json")):
                 # Extract assignment number
                 assignment_num = int(answer_file.stem.replace("assignment_", "").replace("_answer", ""))
 
@@ -241,33 +880,466 @@ def grade_all_responses():
                     answer_data = json.load(f)
 
                 if not answer_data.get("success"):
-                    print(f"  Skipping assignment {assignment_num} (answer failed)")
+                    print(f"  Skipping {model_id} assignment {assignment_num} (answer failed)")
                     continue
 
                 student_answer = answer_data.get("answer")
                 if not student_answer:
-                    print(f"  Skipping assignment {assignment_num} (no answer)")
+                    print(f"  Skipping {model_id} assignment {assignment_num} (no answer)")
                     continue
 
-                # Grade multiple times if configured
-                for grade_num in range(config.NUM_GRADES):
-                    result = grade_answer(
-                        model_id=model_id,
-                        assignment_num=assignment_num,
-                        student_answer=student_answer,
-                        trial_num=trial_num,
-                        grade_num=grade_num
-                    )
-
-                    if result["success"]:
-                        graded_count += 1
-                    else:
-                        error_count += 1
+                answers.append({
+                    "model_id": model_id,
+                    "assignment_num": assignment_num,
+                    "trial_num": trial_num,
+                    "student_answer": student_answer,
+                    "answer_hash": get_answer_hash(student_answer),
+                    "answer_timestamp": answer_data.get("timestamp"),
+                })
+
+    return answers
+
+
+def _make_job(answer: Dict, grade_num: int) -> Dict:
+    """Build a grading job for one grade of an answer."""
+    return {
+        "model_id": answer["model_id"],
+        "assignment_num": answer["assignment_num"],
+        "student_answer": answer["student_answer"],
+        "trial_num": answer["trial_num"],
+        "grade_num": grade_num,
+    }
+
+
+def load_current_grades(answer: Dict, grade_nums, per_question: bool = False) -> Dict[int, Dict]:
+    """Load the current grades (see is_grade_current) of an answer for the given grade numbers."""
+    grades = {}
+    ground_truth_hash = get_ground_truth_hash(answer["assignment_num"])
+    for grade_num in grade_nums:
+        grade = load_existing_grade(answer["model_id"], answer["assignment_num"], answer["trial_num"], grade_num)
+        if is_grade_current(grade, answer["answer_hash"], answer["answer_timestamp"], per_question, ground_truth_hash):
+            grades[grade_num] = grade
+    return grades
+
+
+def find_grading_jobs(incremental: bool = True, per_question: bool = False) -> List[Dict]:
+    """
+    Collect one grading job per (model, trial, assignment, grade_num) from the responses directory.
+
+    Args:
+        incremental: Skip tuples that already have a current grade on disk
+            (see is_grade_current), so only missing or stale grades are redone
+        per_question: Only per-question grades count as current (see is_grade_current)
+
+    Returns:
+        List of job dicts with the student answer and grading coordinates
+    """
+    jobs = []
+    up_to_date = 0
+
+    for answer in find_answers():
+        current = load_current_grades(answer, range(config.NUM_GRADES), per_question) if incremental else {}
+        up_to_date += len(current)
+
+        # Grade multiple times if configured
+        for grade_num in range(config.NUM_GRADES):
+            if grade_num not in current:
+                jobs.append(_make_job(answer, grade_num))
+
+    if incremental and up_to_date:
+        print(f"  {up_to_date} grade(s) already up to date (use --full to regrade them)")
+
+    return jobs
+
+
+def _find_resume_jobs(manifest: "run_manifest.RunManifest") -> List[Dict]:
+    """Rebuild the grading jobs of a run's pending and failed grades from the responses directory."""
+    answers = {
+        (answer["model_id"], answer["trial_num"], answer["assignment_num"]): answer
+        for answer in find_answers()
+    }
+    incomplete = manifest.get_incomplete()
+    jobs = []
+    for job in incomplete:
+        answer = answers.get((job["model_id"], job["trial_num"], job["assignment_num"]))
+        if answer is not None:
+            jobs.append(_make_job(answer, job["grade_num"]))
+
+    print(f"Resuming run {manifest.run_id}: {len(incomplete)} of {len(manifest.data['jobs'])} grade(s) left")
+    if len(jobs) < len(incomplete):
+        print(f"  ⚠️  {len(incomplete) - len(jobs)} grade(s) skipped (their answer is no longer in {config.RESPONSES_DIR})")
+    return jobs
+
+
+def get_label_agreement(grades: List[Dict]) -> float:
+    """
+    Get the lowest per-question agreement between grades of the same answer.
+
+    A question's agreement is the share of grades giving it its most common label;
+    grades that don't label the question count as disagreeing.
+
+    Returns:
+        Agreement between 0 and 1 (1.0 for fewer than two grades)
+    """
+    if len(grades) < 2:
+        return 1.0
+
+    labels_by_question: Dict[str, List[str]] = {}
+    for grade in grades:
+        for question_id, label in (grade.get("questions") or {}).items():
+            labels_by_question.setdefault(question_id, []).append(label)
+
+    if not labels_by_question:
+        return 0.0
+    return min(
+        max(labels.count(label) for label in set(labels)) / len(grades)
+        for labels in labels_by_question.values()
+    )
+
+
+def _grades_still_needed(grades: Dict[int, Dict], attempted: set) -> List[int]:
+    """
+    Pick the grade numbers to request next for an answer in adaptive grading.
+
+    Tops an answer up to ADAPTIVE_MIN_GRADES, then adds one grade per round while
+    its labels disagree, up to ADAPTIVE_MAX_GRADES.
+    """
+    if len(grades) >= config.ADAPTIVE_MIN_GRADES:
+        if len(grades) >= config.ADAPTIVE_MAX_GRADES:
+            return []
+        if get_label_agreement(list(grades.values())) >= config.ADAPTIVE_AGREEMENT:
+            return []
+        needed = 1
+    else:
+        needed = config.ADAPTIVE_MIN_GRADES - len(grades)
+
+    free = [n for n in range(config.ADAPTIVE_MAX_GRADES) if n not in grades and n not in attempted]
+    return free[:needed]
+
+
+def _batch_jobs(jobs: List[Dict], batch_size: int) -> List[Dict]:
+    """Group grade jobs of the same answer into batch jobs of up to batch_size grade numbers."""
+    by_answer: Dict[Tuple, Dict] = {}
+    for job in jobs:
+        key = (job["model_id"], job["trial_num"], job["assignment_num"])
+        if key not in by_answer:
+            by_answer[key] = {**job, "grade_nums": []}
+            del by_answer[key]["grade_num"]
+        by_answer[key]["grade_nums"].append(job["grade_num"])
+
+    batches = []
+    for answer_job in by_answer.values():
+        grade_nums = answer_job["grade_nums"]
+        for start in range(0, len(grade_nums), batch_size):
+            batches.append({**answer_job, "grade_nums": grade_nums[start:start + batch_size]})
+    return batches
+
+
+def _run_grade_jobs(
+    jobs: List[Dict],
+    use_async: bool = False,
+    batch_size: Optional[int] = None,
+    per_question: bool = False,
+    incremental: bool = True,
+    use_cache: bool = True,
+) -> Dict:
+    """
+    Run grading jobs on the shared scheduler.
+    Grade jobs are spread across config.MAX_WORKERS parallel workers,
+    or across config.ASYNC_MAX_IN_FLIGHT concurrent requests when use_async is set.
+    With batch_size > 1 (default config.GRADE_BATCH_SIZE), grades of the same answer
+    are requested together (see grade_answer_batch). With per_question set, every
+    question of a grade is its own request instead (see _run_question_jobs); incremental
+    then reuses the verdicts of questions an earlier run already graded. With use_cache
+    unset, every grader call is sent even if the request cache has its reply (--full).
+
+    Returns:
+        Dict with 'total', 'successful' and 'failed' counts (of requests, when batching
+        or grading per question)
+    """
+    if per_question:
+        return _run_question_jobs(jobs, use_async, incremental, use_cache)
+
+    batch_size = batch_size or config.GRADE_BATCH_SIZE
+    if batch_size > 1:
+        return _run_batch_jobs(_batch_jobs(jobs, batch_size), use_async, use_cache)
+
+    common = dict(
+        # Every grade job calls the grader model, so it counts against the grader's provider
+        provider_of=lambda job: providers.get_provider(config.GRADER_MODEL),
+        describe=lambda job: f"{job['model_id'].split('/')[-1]} A{job['assignment_num']} #{job['grade_num']}",
+        unit="grade",
+    )
+
+    # Grade all jobs on the shared pool (verbose=False for cleaner output)
+    if use_async:
+        print(f"\n  Running {len(jobs)} grade job(s) with up to {config.ASYNC_MAX_IN_FLIGHT} requests in flight...")
+
+        async def run():
+            try:
+                return await scheduler.run_jobs_async(
+                    jobs,
+                    worker=lambda job: grade_answer_async(
+                        model_id=job["model_id"],
+                        assignment_num=job["assignment_num"],
+                        student_answer=job["student_answer"],
+                        trial_num=job["trial_num"],
+                        grade_num=job["grade_num"],
+                        verbose=False,
+                        use_cache=use_cache,
+                    ),
+                    **common,
+                )
+            finally:
+                await openrouter_client.close_async_client()
+
+        return asyncio.run(run())
+
+    print(f"\n  Running {len(jobs)} grade job(s) with {config.MAX_WORKERS} workers...")
+    return scheduler.run_jobs(
+        jobs,
+        worker=lambda job: grade_answer(
+            model_id=job["model_id"],
+            assignment_num=job["assignment_num"],
+            student_answer=job["student_answer"],
+            trial_num=job["trial_num"],
+            grade_num=job["grade_num"],
+            verbose=False,
+            use_cache=use_cache,
+        ),
+        **common,
+    )
+
+
+def _run_batch_jobs(batches: List[Dict], use_async: bool = False, use_cache: bool = True) -> Dict:
+    """Run batch jobs from _batch_jobs on the shared scheduler (see _run_grade_jobs)."""
+    common = dict(
+        provider_of=lambda job: providers.get_provider(config.GRADER_MODEL),
+        describe=lambda job: (f"{job['model_id'].split('/')[-1]} A{job['assignment_num']} "
+                              f"#{job['grade_nums'][0]}-{job['grade_nums'][-1]}"),
+        unit="batch",
+    )
+
+    def summarize(grades: List[Dict]) -> Dict:
+        return {"success": all(grade.get("success") for grade in grades)}
+
+    grade_count = sum(len(job["grade_nums"]) for job in batches)
+    if use_async:
+        print(f"\n  Running {grade_count} grade job(s) as {len(batches)} batched request(s) "
+              f"with up to {config.ASYNC_MAX_IN_FLIGHT} requests in flight...")
+
+        async def grade_batch(job: Dict) -> Dict:
+            return summarize(await grade_answer_batch_async(
+                model_id=job["model_id"],
+                assignment_num=job["assignment_num"],
+                student_answer=job["student_answer"],
+                trial_num=job["trial_num"],
+                grade_nums=job["grade_nums"],
+                verbose=False,
+                use_cache=use_cache,
+            ))
+
+        async def run():
+            try:
+                return await scheduler.run_jobs_async(batches, worker=grade_batch, **common)
+            finally:
+                await openrouter_client.close_async_client()
+
+        return asyncio.run(run())
+
+    print(f"\n  Running {grade_count} grade job(s) as {len(batches)} batched request(s) "
+          f"with {config.MAX_WORKERS} workers...")
+    return scheduler.run_jobs(
+        batches,
+        worker=lambda job: summarize(grade_answer_batch(
+            model_id=job["model_id"],
+            assignment_num=job["assignment_num"],
+            student_answer=job["student_answer"],
+            trial_num=job["trial_num"],
+            grade_nums=job["grade_nums"],
+            verbose=False,
+            use_cache=use_cache,
+        )),
+        **common,
+    )
+
+
+def grade_adaptively(
+    use_async: bool = False,
+    incremental: bool = True,
+    batch_size: Optional[int] = None,
+    per_question: bool = False,
+    use_cache: Optional[bool] = None,
+) -> Dict:
+    """
+    Grade answers in rounds, stopping early on answers whose grades agree.
+
+    Each answer first gets config.ADAPTIVE_MIN_GRADES grades. After every round, answers
+    whose per-question labels agree less than config.ADAPTIVE_AGREEMENT (see
+    get_label_agreement) get one more grade, up to config.ADAPTIVE_MAX_GRADES.
+
+    Args:
+        use_async: Use the asyncio client for each round
+        incremental: Count existing current grades instead of regrading them
+        batch_size: Grades of one answer per grader request (default config.GRADE_BATCH_SIZE)
+        per_question: Grade every question as its own request (see _run_question_jobs)
+        use_cache: Let grader calls be served from the request cache (default: incremental)
+
+    Returns:
+        Dict with 'total', 'successful', 'failed' and 'skipped' counts over all rounds
+        (no new round starts once the budget is spent)
+    """
+    if use_cache is None:
+        use_cache = incremental
+    answers = find_answers()
+    grades = [
+        load_current_grades(answer, range(config.ADAPTIVE_MAX_GRADES), per_question) if incremental else {}
+        for answer in answers
+    ]
+    attempted = [set() for _ in answers]
+    reused = sum(len(answer_grades) for answer_grades in grades)
+    if reused:
+        print(f"  Reusing {reused} existing grade(s) (use --full to regrade them)")
+
+    totals = {"total": 0, "successful": 0, "failed": 0, "skipped": 0}
+    round_num = 0
+    while not cost_ledger.budget_exceeded():
+        jobs = []
+        for i, answer in enumerate(answers):
+            for grade_num in _grades_still_needed(grades[i], attempted[i]):
+                attempted[i].add(grade_num)
+                jobs.append(_make_job(answer, grade_num))
+        if not jobs:
+            break
+
+        round_num += 1
+        run_manifest.plan_active(jobs)
+        print(f"\n  Round {round_num}: {len(jobs)} grade(s) for "
+              f"{len({(job['model_id'], job['trial_num'], job['assignment_num']) for job in jobs})} answer(s)")
+        stats = _run_grade_jobs(jobs, use_async, batch_size, per_question, incremental, use_cache)
+        for key in totals:
+            totals[key] += stats[key]
+
+        # Reload what this round wrote (failed or unparseable grades stay missing)
+        for i, answer in enumerate(answers):
+            grades[i].update(load_current_grades(answer, attempted[i] - grades[i].keys(), per_question))
+
+    converged = sum(
+        1 for answer_grades in grades
+        if get_label_agreement(list(answer_grades.values())) >= config.ADAPTIVE_AGREEMENT
+    )
+    used = sum(len(answer_grades) for answer_grades in grades)
+    print(f"\n  Adaptive grading: {used} grade(s) for {len(answers)} answer(s) "
+          f"(fixed NUM_GRADES would use {len(answers) * config.NUM_GRADES}); "
+          f"{converged}/{len(answers)} answer(s) reached agreement {config.ADAPTIVE_AGREEMENT}")
+    return totals
+
+
+def grade_all_responses(
+    use_async: bool = False,
+    incremental: bool = True,
+    adaptive: bool = False,
+    batch_size: Optional[int] = None,
+    per_question: Optional[bool] = None,
+    resume: Optional[str] = None,
+):
+    """
+    Grade all existing responses in the responses directory.
+    With incremental set, only (answer, grade_num) pairs without a current grade are graded;
+    without it every answer is regraded and grader calls bypass the request cache (whose
+    replies for the same grade numbers would otherwise come back unchanged).
+    With adaptive set, grades are issued in rounds until they agree (see grade_adaptively)
+    instead of exactly config.NUM_GRADES per answer.
+    batch_size overrides config.GRADE_BATCH_SIZE (grades of one answer per grader request).
+    per_question overrides config.PER_QUESTION_GRADING (one small request per question).
+    With resume set to an earlier run's ID, only that run's pending and failed grades are
+    re-queued, with the run's own adaptive/batch/per-question options (see run_manifest.py).
+
+    Returns:
+        Dict with 'total', 'successful', 'failed' and 'skipped' counts (the full scheduler
+        stats, with timings, unless grading adaptively), or None if there is no such run
+    """
+    print("=" * 60)
+    print("Grading All Responses")
+    print("=" * 60)
+    print()
+    run_id = cost_ledger.start_run(resume)
+    tracing.reset()
+    if config.METRICS_PORT:
+        print(f"📈 Live metrics: {metrics.start_server(config.METRICS_PORT)}\n")
+
+    if resume:
+        try:
+            manifest = run_manifest.RunManifest.load("grading", resume)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return None
+        adaptive = manifest.options["adaptive"]
+        batch_size = manifest.options["batch_size"]
+        per_question = manifest.options["per_question"]
+        if adaptive:
+            print(f"Resuming run {run_id}: continuing its adaptive grading rounds")
+        changed = manifest.get_config_changes()
+        if changed:
+            print(f"⚠️  Settings changed since the run started: {', '.join(changed)}")
+
+    with _upload_stats_lock:
+        _upload_stats.update(requests=0, bytes=0)
+    with _parse_stats_lock:
+        _parse_stats.update(responses=0, failures=0, reasks=0)
+
+    if per_question is None:
+        per_question = config.PER_QUESTION_GRADING
+    if per_question and (batch_size or config.GRADE_BATCH_SIZE) > 1:
+        print(f"⚠️  Grade batching (batch size {batch_size or config.GRADE_BATCH_SIZE}) doesn't apply to "
+              f"per-question grading; every question is its own request")
+
+    # --full means new verdicts, not the cached replies of earlier runs
+    use_cache = incremental
+    if resume:
+        # Current grades (and per-question verdicts) saved before the interruption are kept
+        use_cache = manifest.options["incremental"]
+        incremental = True
+    else:
+        manifest = run_manifest.RunManifest.create("grading", run_id, [], options={
+            "adaptive": adaptive, "batch_size": batch_size, "per_question": per_question, "incremental": incremental,
+        })
+
+    run_manifest.activate(manifest)
+    try:
+        if adaptive:
+            # Each round adds its jobs to the manifest; resuming just continues the rounds
+            stats = grade_adaptively(use_async=use_async, incremental=incremental, batch_size=batch_size,
+                                     per_question=per_question, use_cache=use_cache)
+        else:
+            if resume:
+                jobs = _find_resume_jobs(manifest)
+            else:
+                jobs = find_grading_jobs(incremental=incremental, per_question=per_question)
+            manifest.plan(jobs)
+            stats = _run_grade_jobs(jobs, use_async, batch_size, per_question, incremental, use_cache)
+    except BaseException:
+        # Ctrl-C or a crash: keep what finished so the rest can be resumed
+        manifest.finish("interrupted")
+        raise
+    finally:
+        run_manifest.activate(None)
+    manifest.finish()
 
     print()
     print("=" * 60)
     print("GRADING COMPLETE")
     print("=" * 60)
-    print(f"Successfully graded: {graded_count}")
-    print(f"Errors: {error_count}")
+    print(f"Successfully graded: {stats['successful']}")
+    print(f"Errors: {stats['failed']}")
+    if stats.get("skipped"):
+        print(f"Skipped (budget reached): {stats['skipped']}")
+    print_upload_stats()
+    print_parse_stats()
+    request_cache.print_stats()
+    cassette.print_stats()
+    cost_ledger.print_run_summary()
+    manifest.print_summary("run_grading.py")
+    tracing.finish(f"grading-{run_id}")
     print()
+    return stats
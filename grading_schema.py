@@ -0,0 +1,173 @@
+"""
+JSON schemas for grader responses, and a strict parser that validates against them.
+
+Grader models that support structured output (config.STRUCTURED_OUTPUT_MODELS) are
+sent the schema as an OpenRouter `response_format`, so their reply is the bare JSON
+object. parse() reads that directly and only falls back to digging JSON out of
+markdown or surrounding text for models that don't. Either way the result must
+match the schema, so a reply that can't be graded is rejected instead of saved.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+import config
+
+# Labels a grader can give a question
+QUESTION_RESULTS = ["correct", "partial", "incorrect"]
+
+# One grading of a whole answer (the format in config.GRADING_PROMPT_TEMPLATE)
+GRADE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "object",
+            "additionalProperties": {"type": "string", "enum": QUESTION_RESULTS},
+        },
+        "total_correct": {"type": "integer", "minimum": 0},
+        "total_questions": {"type": "integer", "minimum": 0},
+        "score": {"type": "number", "minimum": 0, "maximum": 100},
+    },
+    "required": ["questions", "total_correct", "total_questions", "score"],
+}
+
+# Several gradings in one response (config.GRADING_MULTI_VERDICT_PROMPT)
+MULTI_GRADE_SCHEMA = {
+    "type": "object",
+    "properties": {"gradings": {"type": "array", "items": GRADE_SCHEMA}},
+    "required": ["gradings"],
+}
+
+# One question's verdict (config.QUESTION_GRADING_PROMPT_TEMPLATE)
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {"result": {"type": "string", "enum": QUESTION_RESULTS}},
+    "required": ["result"],
+    "additionalProperties": False,
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def supports_structured_output(model_id: str) -> bool:
+    """Whether a model is asked for schema-constrained JSON (see config.STRUCTURED_OUTPUT_MODELS)."""
+    return config.GRADER_STRUCTURED_OUTPUT and any(
+        model_id.startswith(prefix) for prefix in config.STRUCTURED_OUTPUT_MODELS
+    )
+
+
+def response_format(model_id: str, name: str, schema: Dict, strict: bool = False) -> Optional[Dict]:
+    """
+    Build the `response_format` for a call_model request, or None if the model doesn't support it.
+
+    Only request strict mode for schemas without free-form keys: strict schemas must list
+    every property, which GRADE_SCHEMA's question IDs can't.
+    """
+    if not supports_structured_output(model_id):
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": strict, "schema": schema},
+    }
+
+
+def extract_json(content: str):
+    """
+    Parse the JSON in a grader response.
+    Raises json.JSONDecodeError (a ValueError) if there is none.
+    """
+    # Extract JSON from response (may have markdown code blocks or extra text)
+    response_text = content.strip()
+
+    # Try to find JSON in various formats
+    json_text = None
+
+    # Check for markdown code blocks
+    if "```json" in response_text:
+        json_start = response_text.find("```json") + 7
+        json_end = response_text.find("```", json_start)
+        json_text = response_text[json_start:json_end].strip()
+    elif "```" in response_text:
+        json_start = response_text.find("```") + 3
+        json_end = response_text.find("```", json_start)
+        json_text = response_text[json_start:json_end].strip()
+    else:
+        # Try to find JSON object by looking for { and }
+        if "{" in response_text and "}" in response_text:
+            json_start = response_text.find("{")
+            json_end = response_text.rfind("}") + 1
+            json_text = response_text[json_start:json_end].strip()
+        else:
+            json_text = response_text
+
+    return json.loads(json_text)
+
+
+def validate(value, schema: Dict, path: str = "$") -> List[str]:
+    """
+    Check a parsed value against a schema (the subset of JSON Schema used above).
+
+    Returns:
+        List of problems (empty if the value is valid)
+    """
+    expected = _TYPES[schema["type"]]
+    # bool is an int subclass, but true/false are not numbers in JSON
+    if not isinstance(value, expected) or (isinstance(value, bool) and schema["type"] != "boolean"):
+        return [f"{path}: expected {schema['type']}, got {type(value).__name__}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: {value} is below {schema['minimum']}")
+    if "maximum" in schema and value > schema["maximum"]:
+        errors.append(f"{path}: {value} is above {schema['maximum']}")
+
+    if schema["type"] == "object":
+        properties = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate(item, properties[key], f"{path}.{key}"))
+            elif extra is False:
+                errors.append(f"{path}: unexpected '{key}'")
+            elif isinstance(extra, dict):
+                errors.extend(validate(item, extra, f"{path}.{key}"))
+    elif schema["type"] == "array" and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def parse(content: Optional[str], schema: Dict):
+    """
+    Parse a grader response and validate it against a schema.
+
+    Bare JSON (structured output) is parsed directly; otherwise the JSON is extracted
+    from markdown code blocks or surrounding text.
+
+    Raises:
+        ValueError: If there is no JSON or it doesn't match the schema
+    """
+    if not content:
+        raise ValueError("Empty response")
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        parsed = extract_json(content)
+
+    errors = validate(parsed, schema)
+    if errors:
+        raise ValueError("Response doesn't match the grading schema: " + "; ".join(errors[:3]))
+    return parsed
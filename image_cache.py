@@ -0,0 +1,143 @@
+"""
+Process-wide cache of encoded image payloads.
+
+Each assignment image is read and base64-encoded once per process (and,
+optionally, once per machine via an on-disk cache) instead of once per API
+call. Entries are keyed by path + mtime + size (plus the preprocessing
+settings when config.IMAGE_PREPROCESS is on), so editing an image or the
+settings invalidates its entry automatically.
+"""
+
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import config
+import image_preprocess
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """Thread-safe LRU cache of image data URLs, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[Path] = None):
+        """
+        Args:
+            max_bytes: Maximum total size of cached data URLs held in memory
+            disk_dir: Optional directory for persisting encoded data URLs across runs
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _key(self, image_path: Path) -> Tuple:
+        """Build the cache key for an image from its path, mtime, size and preprocessing settings."""
+        stat = image_path.stat()
+        key = (str(image_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if config.IMAGE_PREPROCESS:
+            key += image_preprocess.settings_key()
+        return key
+
+    def _disk_path(self, key: Tuple) -> Path:
+        """Get the on-disk cache file for a key."""
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.txt"
+
+    def get_data_url(self, image_path: Path) -> str:
+        """
+        Get the base64 data URL for an image, encoding it only on a cache miss.
+
+        Args:
+            image_path: Path to a .png image
+
+        Returns:
+            "data:<mime type>;base64,..." string (preprocessed if config.IMAGE_PREPROCESS is set)
+        """
+        key = self._key(image_path)
+
+        with self._lock:
+            url = self._entries.get(key)
+            if url is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return url
+
+        url = None
+        disk_path = self._disk_path(key) if self.disk_dir else None
+        if disk_path is not None and disk_path.exists():
+            url = disk_path.read_text()
+            with self._lock:
+                self.stats["disk_hits"] += 1
+        if url is None:
+            with tracing.span("image_encode", "client", image=image_path.name) as span_args:
+                if config.IMAGE_PREPROCESS:
+                    image_bytes, mime_type = image_preprocess.preprocess_image(image_path)
+                else:
+                    # All images are .png format
+                    with open(image_path, "rb") as f:
+                        image_bytes, mime_type = f.read(), "image/png"
+                encoded = base64.b64encode(image_bytes).decode("utf-8")
+                url = f"data:{mime_type};base64,{encoded}"
+                span_args["bytes"] = len(url)
+            with self._lock:
+                self.stats["misses"] += 1
+            if disk_path is not None:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                # Write to a temp file first so concurrent readers never see a partial entry
+                tmp_path = disk_path.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_path.write_text(url)
+                tmp_path.replace(disk_path)
+
+        self._put(key, url)
+        return url
+
+    def _put(self, key: Tuple, url: str):
+        """Insert an entry, evicting least recently used entries to stay under max_bytes."""
+        size = len(url)
+        if size > self.max_bytes:
+            logger.warning(f"Image payload ({size} bytes) is larger than the image cache, not caching it")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = url
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all in-memory entries (the on-disk cache is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Shared cache used by openrouter_client
+_cache = ImageCache(config.IMAGE_CACHE_MAX_BYTES, config.IMAGE_CACHE_DIR)
+
+
+def get_image_content_part(image_path: Path) -> Dict:
+    """Get the "image_url" message content part for an image, using the shared cache."""
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": _cache.get_data_url(image_path)
+        }
+    }
+
+
+def get_stats() -> Dict:
+    """Get hit/miss/eviction counts for the shared cache."""
+    return dict(_cache.stats)
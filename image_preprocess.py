@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Optional preprocessing that shrinks assignment images before they are sent to models.
+
+Images are downsampled to config.IMAGE_MAX_DIMENSION, optionally converted to
+grayscale, and re-encoded as optimized PNG or JPEG. Results are cached per
+source image by image_cache, so each image is only processed once.
+
+Print a report of bytes and estimated image tokens saved per assignment with:
+    python image_preprocess.py
+"""
+
+import io
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Only needed when config.IMAGE_PREPROCESS is enabled
+    Image = None
+
+import config
+
+
+def settings_key() -> Tuple:
+    """Get the current preprocessing settings (used as part of image cache keys)."""
+    return (
+        config.IMAGE_MAX_DIMENSION,
+        config.IMAGE_GRAYSCALE,
+        config.IMAGE_FORMAT,
+        config.IMAGE_JPEG_QUALITY,
+    )
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimate the prompt tokens a vision model charges for an image.
+    Uses the common (width * height) / 750 approximation.
+    """
+    return max(1, round(width * height / 750))
+
+
+def _load(image_path: Path) -> "Image.Image":
+    """Open an image with Pillow, raising a clear error if Pillow is missing."""
+    if Image is None:
+        raise RuntimeError("Image preprocessing requires Pillow: pip install pillow")
+    image = Image.open(image_path)
+    image.load()
+    return image
+
+
+def preprocess_image(image_path: Path) -> Tuple[bytes, str]:
+    """
+    Downsample and re-encode an image using the current config settings.
+
+    Args:
+        image_path: Path to the source image
+
+    Returns:
+        (image_bytes, mime_type)
+    """
+    image = _load(image_path)
+    original_size = image.size
+
+    # Screenshots are usually RGBA with a fully opaque alpha channel; drop it
+    if image.mode == "RGBA" and image.getextrema()[3] == (255, 255):
+        image = image.convert("RGB")
+
+    # Downsample so the longest side is at most IMAGE_MAX_DIMENSION
+    if max(image.size) > config.IMAGE_MAX_DIMENSION:
+        image.thumbnail((config.IMAGE_MAX_DIMENSION, config.IMAGE_MAX_DIMENSION), Image.LANCZOS)
+
+    if config.IMAGE_GRAYSCALE:
+        image = image.convert("L")
+
+    buffer = io.BytesIO()
+    if config.IMAGE_FORMAT == "jpeg":
+        # JPEG has no alpha channel
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format="JPEG", quality=config.IMAGE_JPEG_QUALITY, optimize=True)
+        return buffer.getvalue(), "image/jpeg"
+    elif config.IMAGE_FORMAT == "png":
+        image.save(buffer, format="PNG", optimize=True)
+        processed_bytes = buffer.getvalue()
+        # Re-encoding an untouched PNG can come out larger than the source; keep the smaller one
+        if image.size == original_size and not config.IMAGE_GRAYSCALE and image_path.suffix == ".png":
+            source_bytes = image_path.read_bytes()
+            if len(source_bytes) <= len(processed_bytes):
+                return source_bytes, "image/png"
+        return processed_bytes, "image/png"
+    else:
+        raise ValueError(f"Unsupported IMAGE_FORMAT: {config.IMAGE_FORMAT!r} (expected 'png' or 'jpeg')")
+
+
+def build_report(assignments: List[int]) -> List[Dict]:
+    """
+    Compare original and preprocessed images for each assignment.
+
+    Returns:
+        List of dicts with byte sizes and estimated image tokens before/after per assignment
+    """
+    # Imported here to avoid a circular import (answerer -> openrouter_client -> image_cache -> here)
+    import answerer
+
+    rows = []
+    for assignment_num in assignments:
+        image_paths = answerer.find_assignment_images(assignment_num)
+        if not image_paths:
+            continue
+
+        row = {
+            "assignment": assignment_num,
+            "images": len(image_paths),
+            "original_bytes": 0,
+            "processed_bytes": 0,
+            "original_tokens": 0,
+            "processed_tokens": 0,
+        }
+        for image_path in image_paths:
+            original = _load(image_path)
+            processed_bytes, _ = preprocess_image(image_path)
+            processed = Image.open(io.BytesIO(processed_bytes))
+
+            row["original_bytes"] += image_path.stat().st_size
+            row["processed_bytes"] += len(processed_bytes)
+            row["original_tokens"] += estimate_image_tokens(*original.size)
+            row["processed_tokens"] += estimate_image_tokens(*processed.size)
+        rows.append(row)
+
+    return rows
+
+
+def print_report(assignments: List[int] = config.ASSIGNMENTS_TO_TEST):
+    """Print bytes and estimated image tokens saved per assignment."""
+    print("=" * 70)
+    print("IMAGE PREPROCESSING REPORT")
+    print("=" * 70)
+    print(f"Max dimension: {config.IMAGE_MAX_DIMENSION}px, grayscale: {config.IMAGE_GRAYSCALE}, "
+          f"format: {config.IMAGE_FORMAT}")
+    print()
+    print(f"{'Assignment':>10s} {'Images':>6s} {'Bytes before':>13s} {'Bytes after':>12s} {'Saved':>7s} "
+          f"{'Tokens before':>14s} {'Tokens after':>13s}")
+
+    rows = build_report(assignments)
+    for row in rows:
+        saved = 1 - row["processed_bytes"] / row["original_bytes"]
+        print(f"{row['assignment']:>10d} {row['images']:>6d} {row['original_bytes']:>13,d} "
+              f"{row['processed_bytes']:>12,d} {saved:>7.1%} "
+              f"{row['original_tokens']:>14,d} {row['processed_tokens']:>13,d}")
+
+    if rows:
+        original_bytes = sum(row["original_bytes"] for row in rows)
+        processed_bytes = sum(row["processed_bytes"] for row in rows)
+        original_tokens = sum(row["original_tokens"] for row in rows)
+        processed_tokens = sum(row["processed_tokens"] for row in rows)
+        print()
+        print(f"Total: {original_bytes:,d} -> {processed_bytes:,d} bytes "
+              f"({1 - processed_bytes / original_bytes:.1%} saved), "
+              f"~{original_tokens:,d} -> ~{processed_tokens:,d} image tokens per answer call")
+
+
+if __name__ == "__main__":
+    print_report()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the answer + grade pipeline against a local mock server.
+
+Starts mock_server.MockOpenRouter in-process, points the client at it, and runs
+run_bench.main and grader.grade_all_responses unchanged on a scratch copy of the
+output directories (responses, grades, results stores), so nothing in the repo is
+touched. Each stage reports calls/sec, job and server latency percentiles, and
+worker utilization (busy job time / (workers x wall time)); the difference between
+job and server latency is the harness's own overhead.
+
+With --replay, requests are served from a cassette recorded with
+`--cassette record` (see cassette.py) instead of the mock server, so a real
+run's answer + grade chain can be re-run offline in seconds for profiling.
+
+Usage:
+    python load_test.py                                        # configured models, constant 50ms latency
+    python load_test.py --models 30 --grades 5 --latency lognormal:1,0.6
+    python load_test.py --async --rate-limit-rate 0.05 --choice-error-rate 0.02
+    python load_test.py --per-question --output results/load_test.json
+    python load_test.py --replay                               # replay config.CASSETTE_PATH
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+import mock_server
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def get_test_models(count: Optional[int]) -> List[str]:
+    """The configured test models, or `count` variants of them (spread over the same providers)."""
+    if count is None:
+        return list(config.TEST_MODELS)
+    return [
+        f"{config.TEST_MODELS[i % len(config.TEST_MODELS)]}-load{i // len(config.TEST_MODELS)}"
+        for i in range(count)
+    ]
+
+
+def configure(args: argparse.Namespace, workdir: Path, base_url: str):
+    """Point the pipeline at the mock server and keep every output under workdir."""
+    config.OPENROUTER_BASE_URL = base_url
+    config.OPENROUTER_API_KEY = config.OPENROUTER_API_KEY or "mock"
+
+    config.RESPONSES_DIR = workdir / "responses"
+    config.GRADES_DIR = workdir / "grades"
+    config.RESULTS_DIR = workdir / "results"
+    config.RESULTS_DB_PATH = config.RESULTS_DIR / "grades.sqlite"
+    config.REQUEST_CACHE_PATH = config.RESULTS_DIR / "request_cache.sqlite"
+    config.COST_LEDGER_PATH = config.RESULTS_DIR / "cost_ledger.sqlite"
+    config.RUNS_DIR = config.RESULTS_DIR / "runs"
+    config.TRACE_DIR = config.RESULTS_DIR / "traces"
+    # Every call should reach the server
+    config.REQUEST_CACHE_ENABLED = False
+    config.BUDGET_LIMIT_USD = None
+
+    config.TEST_MODELS = get_test_models(args.models)
+    config.NUM_TRIALS = args.trials
+    config.NUM_GRADES = args.grades
+    if args.assignments:
+        config.ASSIGNMENTS_TO_TEST = args.assignments
+    if args.workers:
+        config.MAX_WORKERS = args.workers
+    if args.in_flight:
+        config.ASYNC_MAX_IN_FLIGHT = args.in_flight
+        config.ASYNC_MAX_CONNECTIONS = args.in_flight
+    config.STREAM_RESPONSES = args.stream
+    config.TRACE_ENABLED = args.trace
+    config.METRICS_PORT = args.metrics_port
+    if args.replay:
+        config.CASSETTE_MODE = "replay"
+        config.CASSETTE_PATH = args.replay
+
+
+def summarize_stage(stage: str, stats: Dict, requests: List[Dict]) -> Dict:
+    """Combine scheduler stats and the server's request log for one stage."""
+    elapsed = stats.get("elapsed") or 0.0
+    job_seconds = stats.get("job_seconds") or []
+    server_seconds = [request["server_seconds"] for request in requests if request["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for request in requests:
+        statuses[str(request["status"])] = statuses.get(str(request["status"]), 0) + 1
+
+    return {
+        "stage": stage,
+        "jobs": stats["total"],
+        "successful": stats["successful"],
+        "failed": stats["failed"],
+        "elapsed": round(elapsed, 3),
+        "jobs_per_sec": round(len(job_seconds) / elapsed, 2) if elapsed else None,
+        "calls": len(requests),
+        "calls_per_sec": round(len(requests) / elapsed, 2) if elapsed else None,
+        "statuses": statuses,
+        "job_latency": {f"p{pct}": percentile(job_seconds, pct) for pct in (50, 95, 99)},
+        "server_latency": {f"p{pct}": percentile(server_seconds, pct) for pct in (50, 95, 99)},
+        "workers": stats.get("workers"),
+        "utilization": sum(job_seconds) / (stats["workers"] * elapsed) if elapsed and stats.get("workers") else None,
+    }
+
+
+def count_mangled_answers() -> int:
+    """Count saved answers missing the mock's non-ASCII text (decoded with the wrong charset)."""
+    mangled = 0
+    for path in config.RESPONSES_DIR.rglob("*.json"):
+        with open(path, encoding="utf-8") as f:
+            response = json.load(f)
+        if response.get("success") and mock_server.UNICODE_SAMPLE not in (response.get("answer") or ""):
+            mangled += 1
+    return mangled
+
+
+def print_stage(summary: Dict):
+    """Print one stage's summary."""
+    def latencies(values: Dict) -> str:
+        return "  ".join(f"{name} {value:.3f}s" if value is not None else f"{name} -" for name, value in values.items())
+
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(summary["statuses"].items()))
+    print(f"{summary['stage']}: {summary['jobs']} job(s) ({summary['successful']} ok, {summary['failed']} failed) "
+          f"in {summary['elapsed']:.2f}s, {summary['jobs_per_sec'] or 0:.1f} jobs/s")
+    print(f"  HTTP calls:         {summary['calls']} ({summary['calls_per_sec'] or 0:.1f}/s; {statuses or 'none'})")
+    print(f"  Job latency:        {latencies(summary['job_latency'])}")
+    print(f"  Server latency:     {latencies(summary['server_latency'])}")
+    if summary["utilization"] is not None:
+        print(f"  Worker utilization: {summary['utilization']:.0%} of {summary['workers']} worker slot(s)")
+    if summary.get("mangled_answers"):
+        print(f"  ❌ Mangled answers:  {summary['mangled_answers']} (non-ASCII text decoded with the wrong charset)")
+
+
+def run_load_test(args: argparse.Namespace, workdir: Path) -> List[Dict]:
+    """Run both stages against a fresh mock server. Returns the stage summaries."""
+    server = mock_server.server_from_arguments(args)
+    configure(args, workdir, server.start())
+
+    # Imported after configure(): request_cache opens config.REQUEST_CACHE_PATH at import
+    import grader
+    import run_bench
+
+    summaries = []
+    try:
+        mark = len(server.get_requests())
+        stats = run_bench.main(use_async=args.use_async)
+        if stats is None:
+            return summaries
+        summaries.append(summarize_stage("answer", stats, server.get_requests(mark)))
+        if not args.replay:
+            summaries[-1]["mangled_answers"] = count_mangled_answers()
+
+        mark = len(server.get_requests())
+        stats = grader.grade_all_responses(use_async=args.use_async, incremental=False,
+                                           batch_size=args.batch, per_question=args.per_question)
+        summaries.append(summarize_stage("grade", stats, server.get_requests(mark)))
+    finally:
+        server.stop()
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the answer + grade pipeline against a local mock server.")
+    parser.add_argument("--models", type=int, default=None,
+                        help="Number of test models (variants of config.TEST_MODELS; default: those models)")
+    parser.add_argument("--trials", type=int, default=1, help="Trials per model (default: 1)")
+    parser.add_argument("--grades", type=int, default=config.NUM_GRADES,
+                        help=f"Grades per answer (default: {config.NUM_GRADES})")
+    parser.add_argument("--assignments", type=int, nargs="*", default=None,
+                        help="Assignments to run (default: config.ASSIGNMENTS_TO_TEST)")
+    parser.add_argument("--workers", type=int, default=None, help="Thread pool size (default: config.MAX_WORKERS)")
+    parser.add_argument("--in-flight", type=int, default=None,
+                        help="Async requests in flight (default: config.ASYNC_MAX_IN_FLIGHT)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio client")
+    parser.add_argument("--stream", action="store_true", help="Stream responses over SSE")
+    parser.add_argument("--batch", type=int, default=None, metavar="N", help="Grades per grader request")
+    parser.add_argument("--per-question", action="store_true", default=None,
+                        help="Grade every question as its own request")
+    mock_server.add_server_arguments(parser)
+    parser.add_argument("--replay", type=Path, nargs="?", const=config.CASSETTE_PATH, default=None, metavar="CASSETTE",
+                        help="Serve requests from a recorded cassette instead of the mock server "
+                             "(default: config.CASSETTE_PATH)")
+    parser.add_argument("--trace", action="store_true",
+                        help="Record a span trace of each stage to config.TRACE_DIR")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="Serve live Prometheus metrics on this port while the test runs")
+    parser.add_argument("--workdir", type=Path, default=None,
+                        help="Keep responses, grades and stores here (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the stage summaries to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the client's per-request log lines")
+    args = parser.parse_args()
+    per_question = args.per_question if args.per_question is not None else config.PER_QUESTION_GRADING
+    if per_question and args.batch and args.batch > 1:
+        parser.error("--batch can't be combined with per-question grading (every question is its own request)")
+
+    if not args.verbose:
+        # openrouter_client configures INFO logging when it is imported
+        logging.disable(logging.CRITICAL)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="civbench-load-"))
+    try:
+        summaries = run_load_test(args, workdir)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 60)
+    print("LOAD TEST RESULTS")
+    print("=" * 60)
+    if args.replay:
+        print(f"Replayed from: {args.replay} (replay latency x{config.CASSETTE_REPLAY_LATENCY}), "
+              f"{'async' if args.use_async else 'threads'}")
+    else:
+        print(f"Latency: {args.latency}, 429 rate: {args.rate_limit_rate}, 503 rate: {args.server_error_rate}, "
+              f"choice error rate: {args.choice_error_rate}, {'async' if args.use_async else 'threads'}")
+    print()
+    for summary in summaries:
+        print_stage(summary)
+        print()
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"arguments": {key: str(value) for key, value in vars(args).items()}, "stages": summaries},
+                      f, indent=2)
+        print(f"Summary written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Live metrics for long runs, served in the Prometheus text format.
+
+call_model and the scheduler update the metrics below as they go; start_server()
+serves them at http://127.0.0.1:<port>/metrics (config.METRICS_PORT, or
+--metrics-port on run_bench.py / run_grading.py) so a run can be watched while
+it is going, with Prometheus or just curl. Useful queries:
+
+    rate(civbench_output_tokens_total[1m])            # output tokens/sec per model
+    histogram_quantile(0.95, rate(civbench_request_latency_seconds_bucket[5m]))
+    time() - civbench_last_success_timestamp_seconds  # a stalled provider keeps growing
+
+Standard library only; updating a metric is a dict update under a lock.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; LLM calls range from under a second to several minutes
+LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300]
+
+_registry: List["_Metric"] = []
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    """Escape a label value for the text format."""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """A metric family: one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> List[str]:
+        """Text format lines for this metric."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: List[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, {**state, "buckets": list(state["buckets"])}) for key, state in self._values.items())
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                bucket_labels = _format_labels(self.labels, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            bucket_labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state['count']}")
+        return lines
+
+
+# Updated by openrouter_client.call_model
+REQUESTS_IN_FLIGHT = Gauge("civbench_requests_in_flight", "API calls currently being sent (including retries)", ("model",))
+REQUESTS = Counter("civbench_requests_total", "Finished API calls by outcome (success, error, cached, replayed)",
+                   ("model", "outcome"))
+REQUEST_LATENCY = Histogram("civbench_request_latency_seconds", "Duration of sent API calls, including retries",
+                            ("model",))
+RETRIES = Counter("civbench_retries_total", "Retried API attempts (429, 5xx, timeouts, connection errors)", ("model",))
+PROMPT_TOKENS = Counter("civbench_prompt_tokens_total", "Prompt tokens of successful API calls", ("model",))
+OUTPUT_TOKENS = Counter("civbench_output_tokens_total", "Completion tokens of successful API calls", ("model",))
+LAST_SUCCESS = Gauge("civbench_last_success_timestamp_seconds", "Unix time of the last successful API call",
+                     ("model",))
+
+# Updated by scheduler.run_jobs / run_jobs_async (unit: assignment, grade, batch, question)
+JOBS_PENDING = Gauge("civbench_jobs_pending", "Jobs waiting for a worker", ("unit",))
+JOBS_RUNNING = Gauge("civbench_jobs_running", "Jobs being worked on", ("unit",))
+JOBS = Counter("civbench_jobs_total", "Finished jobs by outcome (successful, failed, skipped)", ("unit", "outcome"))
+
+
+def record_call(model_id: str, result: Dict, seconds: float):
+    """Record a finished call_model call that was sent to the API."""
+    REQUEST_LATENCY.observe(seconds, model=model_id)
+    if result["error"] is not None:
+        REQUESTS.inc(model=model_id, outcome="error")
+        return
+    REQUESTS.inc(model=model_id, outcome="success")
+    usage = result.get("usage") or {}
+    PROMPT_TOKENS.inc(usage.get("prompt_tokens") or 0, model=model_id)
+    OUTPUT_TOKENS.inc(usage.get("completion_tokens") or 0, model=model_id)
+    LAST_SUCCESS.set(time.time(), model=model_id)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise print over the progress bars
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(port: int, host: str = "127.0.0.1") -> str:
+    """
+    Serve /metrics on a background thread (once per process; later calls reuse the server).
+
+    Returns:
+        The metrics URL
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        host, port = _server.server_address[:2]
+    return f"http://{host}:{port}/metrics"
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter chat completions API (standard library only).
+
+Serves POST /chat/completions in the shape openrouter_client.call_model consumes:
+`choices` (one per requested sample, with `n`), `usage` (token counts and cost),
+`reasoning` in place of content, per-choice `error`s, 429s with Retry-After, 5xx
+errors and SSE streaming. Latency is drawn from a configurable distribution, per
+model if needed. Replies are shaped after the prompt: answers get "Question 1a:"
+style headings, and grading prompts get JSON verdicts that match grading_schema,
+so the whole answer + grade pipeline runs against it unchanged.
+
+Run it standalone and point config.OPENROUTER_BASE_URL at it:
+    python mock_server.py --port 8765 --latency lognormal:2,0.5 --rate-limit-rate 0.05
+or let load_test.py start one in-process.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import questions
+from grading_schema import QUESTION_RESULTS
+
+# Labels for answers when a prompt carries no ground truth to take them from
+DEFAULT_QUESTION_IDS = ["1a", "1b", "2", "3"]
+
+# Non-ASCII text every answer includes, so a client that decodes the body with the
+# wrong charset shows up as answers missing it (see load_test.py)
+UNICODE_SAMPLE = "θ = 30°, σ ≥ 250 MPa"
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a latency distribution spec into a sampler (seconds).
+
+    Specs: "constant:S", "uniform:LOW,HIGH", "exponential:MEAN",
+    "lognormal:MEDIAN,SIGMA" (the long tail real providers show).
+
+    Raises:
+        ValueError: If the spec is not one of the above
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(arg) for arg in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+
+    if kind == "constant" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "exponential" and len(params) == 1:
+        return lambda rng: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    if kind == "lognormal" and len(params) == 2:
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1]) if params[0] > 0 else 0.0
+    raise ValueError(f"Invalid latency spec: {spec!r} "
+                     "(expected constant:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA)")
+
+
+class MockOpenRouter:
+    """
+    Mock OpenRouter server running on a background thread.
+
+    Every request is logged (see get_requests) with its model, status and the time
+    the server spent on it, so load tests can count calls and compare latencies.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "constant:0.05",
+        model_latency: Optional[Dict[str, str]] = None,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        choice_error_rate: float = 0.0,
+        reasoning_rate: float = 0.0,
+        retry_after: float = 0.5,
+        max_samples: int = 16,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            latency: Default latency distribution (see parse_latency)
+            model_latency: Latency distributions for specific model IDs
+            rate_limit_rate: Share of requests answered with 429 and a Retry-After header
+            server_error_rate: Share of requests answered with 503
+            choice_error_rate: Share of requests answered 200 with a per-choice 502 error
+            reasoning_rate: Share of replies sent in `reasoning` with empty content (like GPT-5)
+            retry_after: Retry-After seconds sent with 429s
+            max_samples: Most choices returned for a request with `n` (providers may return fewer)
+            seed: Seed for latencies, errors and verdicts
+        """
+        self.latency = parse_latency(latency)
+        self.model_latency = {model: parse_latency(spec) for model, spec in (model_latency or {}).items()}
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.choice_error_rate = choice_error_rate
+        self.reasoning_rate = reasoning_rate
+        self.retry_after = retry_after
+        self.max_samples = max_samples
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._requests: List[Dict] = []
+        self._requests_lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """URL to use as config.OPENROUTER_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Start serving on a background thread. Returns the base URL."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def get_requests(self, since: int = 0) -> List[Dict]:
+        """Get the request log (from entry `since` on): model, status, start and server_seconds."""
+        with self._requests_lock:
+            return list(self._requests[since:])
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _choice(self, options: List):
+        with self._rng_lock:
+            return self._rng.choice(options)
+
+    def _sample_latency(self, model_id: str) -> float:
+        sampler = self.model_latency.get(model_id, self.latency)
+        with self._rng_lock:
+            return max(0.0, sampler(self._rng))
+
+    def _log(self, model_id: str, status: int, start: float):
+        with self._requests_lock:
+            self._requests.append({
+                "model": model_id,
+                "status": status,
+                "start": start,
+                "server_seconds": time.perf_counter() - start,
+            })
+
+    def _make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # The request log replaces per-request access lines
+
+            def do_POST(self):
+                start = time.perf_counter()
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.rstrip("/") != "/chat/completions":
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "code": 404}})
+                    mock._log(None, 404, start)
+                    return
+                try:
+                    payload = json.loads(body)
+                    model_id = payload["model"]
+                except (ValueError, KeyError):
+                    self._send_json(400, {"error": {"message": "Invalid request body", "code": 400}})
+                    mock._log(None, 400, start)
+                    return
+
+                status = mock.handle(self, payload, start)
+                mock._log(model_id, status, start)
+
+            def _send_json(self, status: int, data: Dict, headers: Optional[Dict] = None):
+                out = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(out)
+
+        return Handler
+
+    def handle(self, handler: BaseHTTPRequestHandler, payload: Dict, start: float) -> int:
+        """Answer one chat completion request. Returns the HTTP status sent."""
+        model_id = payload["model"]
+
+        # Failures come back quickly, like a provider rejecting a request up front
+        roll = self._random()
+        if roll < self.rate_limit_rate:
+            handler._send_json(429, {"error": {"message": "Rate limit exceeded", "code": 429}},
+                               {"Retry-After": str(self.retry_after)})
+            return 429
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            handler._send_json(503, {"error": {"message": "Service unavailable", "code": 503}})
+            return 503
+
+        latency = self._sample_latency(model_id)
+        prompt = _get_prompt(payload)
+        n = min(payload.get("n") or 1, self.max_samples)
+        contents = [self._reply(prompt) for _ in range(n)]
+        usage = self._usage(payload, contents)
+
+        if self._random() < self.choice_error_rate:
+            error = {"message": "Upstream provider error", "code": 502}
+            if payload.get("stream"):
+                # Streams report the error in a chunk, after the 200 has been sent
+                self._stream(handler, "", {}, latency, start, False, error=error)
+                return 200
+            time.sleep(latency)
+            handler._send_json(200, {"choices": [{"error": error}], "usage": {}})
+            return 200
+
+        reasoning = self._random() < self.reasoning_rate
+        if payload.get("stream"):
+            self._stream(handler, contents[0], usage, latency, start, reasoning)
+            return 200
+
+        # Wait out the rest of the latency so server_seconds matches the drawn latency
+        time.sleep(max(0.0, latency - (time.perf_counter() - start)))
+        message_key = "reasoning" if reasoning else "content"
+        choices = [
+            {"message": {"role": "assistant", "content": "", message_key: content}, "finish_reason": "stop"}
+            for content in contents
+        ]
+        handler._send_json(200, {"id": "gen-mock", "model": model_id, "choices": choices, "usage": usage})
+        return 200
+
+    def _stream(self, handler, content: str, usage: Dict, latency: float, start: float, reasoning: bool,
+                error: Optional[Dict] = None):
+        """
+        Send a reply as SSE chunks spread over the latency (first token after about a third of it),
+        or, given an error, a single chunk carrying it as a per-choice error.
+        """
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write(text: str):
+            data = text.encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        write(": OPENROUTER PROCESSING\n\n")
+        if error:
+            time.sleep(latency)
+            write("data: " + json.dumps({"choices": [{"delta": {}, "error": error, "finish_reason": "error"}]}) + "\n\n")
+            write("data: [DONE]\n\n")
+            handler.wfile.write(b"0\r\n\r\n")
+            return
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)] or [""]
+        time.sleep(latency / 3)
+        delta_key = "reasoning" if reasoning else "content"
+        for i, piece in enumerate(pieces):
+            # Raw UTF-8 (no \u escapes) and no charset in the Content-Type, like real SSE endpoints
+            write("data: " + json.dumps({"choices": [{"delta": {delta_key: piece}}]}, ensure_ascii=False) + "\n\n")
+            # Spread the remaining latency over the chunks
+            remaining = latency - (time.perf_counter() - start)
+            time.sleep(max(0.0, remaining / (len(pieces) - i)))
+        write("data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}], "usage": usage}) + "\n\n")
+        write("data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+
+    def _reply(self, prompt: str) -> str:
+        """Make up a reply in the format the prompt asks for."""
+        if "GROUND TRUTH ANSWER TO QUESTION" in prompt:
+            return json.dumps({"result": self._choice(QUESTION_RESULTS)})
+
+        if "GROUND TRUTH ANSWER:" in prompt:
+            ground_truth = prompt.split("GROUND TRUTH ANSWER:", 1)[1].split("STUDENT'S ANSWER:", 1)[0]
+            question_ids = list(questions.split_ground_truth(ground_truth)) or DEFAULT_QUESTION_IDS
+            match = re.search(r"Grade the answer (\d+) times", prompt)
+            if match:
+                return json.dumps({"gradings": [self._grading(question_ids) for _ in range(int(match.group(1)))]})
+            return json.dumps(self._grading(question_ids))
+
+        return "\n\n".join(
+            f"**Question {question_id}:**\nWorking shown here ({UNICODE_SAMPLE}); "
+            f"the answer is {self._random() * 100:.2f} kN."
+            for question_id in DEFAULT_QUESTION_IDS
+        )
+
+    def _grading(self, question_ids: List[str]) -> Dict:
+        """A random verdict for the given questions, in the format of grading_schema.GRADE_SCHEMA."""
+        labels = {question_id: self._choice(QUESTION_RESULTS) for question_id in question_ids}
+        correct = sum(1 for label in labels.values() if label == "correct")
+        partial = sum(1 for label in labels.values() if label == "partial")
+        return {
+            "questions": labels,
+            "total_correct": correct,
+            "total_questions": len(labels),
+            "score": round(100 * (correct + 0.5 * partial) / len(labels), 1),
+        }
+
+    def _usage(self, payload: Dict, contents: List[str]) -> Dict:
+        """Rough usage block: ~4 characters per text token, a flat 1000 tokens per image."""
+        text_chars = 0
+        images = 0
+        for message in payload.get("messages", []):
+            content = message.get("content")
+            parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+            for part in parts:
+                if part.get("type") == "image_url":
+                    images += 1
+                else:
+                    text_chars += len(part.get("text") or "")
+        prompt_tokens = text_chars // 4 + 1000 * images
+        completion_tokens = sum(len(content) // 4 + 1 for content in contents)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": round((prompt_tokens + 4 * completion_tokens) * 1e-6, 8),
+        }
+
+
+def _get_prompt(payload: Dict) -> str:
+    """Get the text of the request's user message(s)."""
+    texts = []
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(part.get("text") or "" for part in content or [] if part.get("type") == "text")
+    return "\n".join(texts)
+
+
+def parse_model_latency(values: List[str]) -> Dict[str, str]:
+    """Parse repeated MODEL=SPEC arguments into a dict."""
+    model_latency = {}
+    for value in values or []:
+        model_id, sep, spec = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected MODEL=SPEC, got {value!r}")
+        model_latency[model_id] = spec
+    return model_latency
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """Add the mock server's options to an argument parser (shared with load_test.py)."""
+    parser.add_argument("--latency", default="constant:0.05",
+                        help="Latency distribution: constant:S, uniform:LOW,HIGH, exponential:MEAN "
+                             "or lognormal:MEDIAN,SIGMA (default: constant:0.05)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Latency distribution for one model (repeatable)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Share of requests answered with 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0,
+                        help="Share of requests answered with 503")
+    parser.add_argument("--choice-error-rate", type=float, default=0.0,
+                        help="Share of requests answered with a per-choice error")
+    parser.add_argument("--reasoning-rate", type=float, default=0.0,
+                        help="Share of replies sent in the reasoning field with empty content")
+    parser.add_argument("--retry-after", type=float, default=0.5,
+                        help="Retry-After seconds sent with 429s")
+    parser.add_argument("--max-samples", type=int, default=16,
+                        help="Most choices returned for a request with n")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+
+
+def server_from_arguments(args: argparse.Namespace, port: int = 0) -> MockOpenRouter:
+    """Create a MockOpenRouter from parsed add_server_arguments options."""
+    return MockOpenRouter(
+        port=port,
+        latency=args.latency,
+        model_latency=parse_model_latency(args.model_latency),
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        choice_error_rate=args.choice_error_rate,
+        reasoning_rate=args.reasoning_rate,
+        retry_after=args.retry_after,
+        max_samples=args.max_samples,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock of the OpenRouter chat completions API.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_arguments(args, port=args.port)
+    print(f"Mock OpenRouter listening on {server.base_url}")
+    print(f"Set config.OPENROUTER_BASE_URL = \"{server.base_url}\" to use it (Ctrl-C to stop)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        served = server.get_requests()
+        print(f"\nServed {len(served)} request(s)")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,32 @@
 Simple OpenRouter API client.
 """
 
+import asyncio
 import base64
+import email.utils
+import json
 import logging
+import random
 import requests
+import threading
 import time
+import urllib3
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
+try:
+    import httpx
+except ImportError:  # Only needed for call_model_async
+    httpx = None
+
+import cassette
 import config
+import cost_ledger
+import image_cache
+import metrics
+import rate_limit
+import request_cache
+import tracing
 
 # Set up logging
 logging.basicConfig(
@@ -19,6 +37,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared connection pools (created lazily)
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_client = None
+
+# Transport errors of both clients (requests for call_model, httpx for call_model_async)
+_TIMEOUT_ERRORS = (requests.exceptions.Timeout,) + ((httpx.TimeoutException,) if httpx else ())
+# A connection dropped mid-stream is a ChunkedEncodingError for requests, a TransportError for httpx
+_CONNECTION_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) + (
+    (httpx.TransportError,) if httpx else ()
+)
+_HTTP_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
 
 def encode_image(image_path: Path) -> str:
     """Encode image to base64 string."""
@@ -26,26 +57,66 @@ def encode_image(image_path: Path) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
-def call_model(
+def _get_session() -> requests.Session:
+    """Get the shared HTTP session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Keep one pooled connection per worker so requests reuse TCP+TLS connections
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=config.MAX_WORKERS,
+                pool_maxsize=config.MAX_WORKERS,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get_async_client() -> "httpx.AsyncClient":
+    """Get the shared async HTTP client, creating it on first use."""
+    global _async_client
+    if httpx is None:
+        raise RuntimeError("The async client requires httpx: pip install 'httpx[http2]'")
+    if _async_client is None:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            logger.warning("h2 is not installed, async client falling back to HTTP/1.1")
+            http2 = False
+        _async_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=config.ASYNC_MAX_CONNECTIONS,
+            ),
+        )
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared async HTTP client (call before the event loop shuts down)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def _build_request(
     model_id: str,
     prompt: str,
-    image_paths: Optional[List[Path]] = None,
-    max_tokens: int = config.DEFAULT_MAX_TOKENS,
-    temperature: float = config.DEFAULT_TEMPERATURE,
-    timeout: int = config.DEFAULT_TIMEOUT,
-) -> Dict:
+    image_paths: Optional[List[Path]],
+    max_tokens: int,
+    temperature: float,
+    stream: bool = False,
+    n: int = 1,
+    response_format: Optional[Dict] = None,
+) -> Tuple[Dict, Dict]:
     """
-    Call an OpenRouter model with text and optional images.
-
-    Args:
-        model_id: OpenRouter model ID (e.g., "anthropic/claude-sonnet-4.5")
-        prompt: Text prompt to send
-        image_paths: Optional list of image file paths
-        max_tokens: Maximum tokens in response
-        temperature: Sampling temperature (0=deterministic, 1=creative)
-
-    Returns:
-        Dict with 'content' (response text) and 'error' (if any)
+    Build the headers and JSON payload for a chat completion request
+    (n > 1 asks for n samples; response_format requests structured output).
     """
     headers = {
         "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
@@ -59,14 +130,8 @@ def call_model(
     # Add images if provided
     if image_paths:
         for img_path in image_paths:
-            # All images are .png format
-            encoded = encode_image(img_path)
-            content_parts.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/png;base64,{encoded}"
-                }
-            })
+            # Encoded once per image and reused across calls
+            content_parts.append(image_cache.get_image_content_part(img_path))
 
     # Add text prompt
     content_parts.append({
@@ -79,98 +144,657 @@ def call_model(
         "content": content_parts
     })
 
-    # Make API request
     payload = {
         "model": model_id,
         "messages": messages,
         "max_tokens": max_tokens,
         "temperature": temperature,
     }
+    if n > 1:
+        payload["n"] = n
+    if response_format:
+        payload["response_format"] = response_format
+    if stream:
+        payload["stream"] = True
+    return headers, payload
 
-    # Log request details
-    image_count = len(image_paths) if image_paths else 0
-    logger.info(f"Starting API request: model={model_id}, images={image_count}, timeout={timeout}s")
-    start_time = time.time()
 
+def get_request_fingerprint(
+    model_id: str,
+    prompt: str,
+    image_paths: Optional[List[Path]] = None,
+    max_tokens: int = config.DEFAULT_MAX_TOKENS,
+    temperature: float = config.DEFAULT_TEMPERATURE,
+    sample_key: Optional[str] = None,
+    n: int = 1,
+    response_format: Optional[Dict] = None,
+) -> str:
+    """Get the request cache fingerprint call_model would use for these arguments."""
+    _, payload = _build_request(model_id, prompt, image_paths, max_tokens, temperature, n=n,
+                                response_format=response_format)
+    return request_cache.request_fingerprint(payload, image_paths, sample_key)
+
+
+def _parse_response_data(data: Dict) -> Dict:
+    """
+    Turn a chat completion response body into the call_model result dict.
+    Raises KeyError/IndexError if the body does not have the expected shape.
+    """
+    # Check for errors in the response choices
+    choice = data["choices"][0]
+    if "error" in choice and choice["error"]:
+        error_msg = choice["error"].get("message", "Unknown error")
+        error_code = choice["error"].get("code", "unknown")
+        logger.error(f"Model returned error: code={error_code}, message={error_msg}")
+        return {
+            "content": None,
+            "error": f"Model error ({error_code}): {error_msg}",
+            # The provider may still bill for the failed generation (see cost_ledger)
+            "usage": data.get("usage") or {},
+        }
+
+    content = _get_message_content(choice["message"])
+
+    content_length = len(content) if content else 0
+    usage = data.get("usage", {})
+    logger.info(f"Success: content_length={content_length} chars, usage={usage}")
+
+    result = {
+        "content": content,
+        "error": None,
+        "usage": usage,
+    }
+    # Requests with n > 1 get one completion per sample; errored samples are dropped
+    if len(data["choices"]) > 1:
+        result["contents"] = [
+            _get_message_content(other["message"])
+            for other in data["choices"]
+            if not other.get("error") and "message" in other
+        ]
+    return result
+
+
+def _get_message_content(message: Dict) -> str:
+    """Get the text of a response message."""
+    # For reasoning models (like GPT-5), check for reasoning field first
+    # If reasoning exists and content is empty, use reasoning as the content
+    content = message.get("content", "")
+    if not content and "reasoning" in message:
+        content = message["reasoning"]
+        logger.info(f"Using reasoning field as content (length={len(content)} chars)")
+    return content
+
+
+class _StreamTimeout(Exception):
+    """Raised when a streamed response stalls or exceeds the total timeout."""
+
+
+class _StreamAssembler:
+    """Incrementally assembles server-sent event chunks into a chat completion body."""
+
+    def __init__(self, start_time: float, timeout: int):
+        self.start_time = start_time
+        self.timeout = timeout
+        self.first_token_time = None
+        self.content_parts = []
+        self.reasoning_parts = []
+        self.usage = {}
+        self.error = None
+        self.finish_reason = None
+        self.done = False
+
+    def feed(self, line: str):
+        """Process one SSE line."""
+        # The whole generation must still finish within the total timeout
+        if time.time() - self.start_time > self.timeout:
+            raise _StreamTimeout(f"Request timed out after {self.timeout} seconds (streaming)")
+
+        # Skip blank separators and keep-alive comments (": OPENROUTER PROCESSING")
+        if not line or not line.startswith("data:"):
+            return
+        chunk_text = line[len("data:"):].strip()
+        if chunk_text == "[DONE]":
+            self.done = True
+            return
+
+        chunk = json.loads(chunk_text)
+        if chunk.get("error"):
+            self.error = chunk["error"]
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        choices = chunk.get("choices") or []
+        if not choices:
+            return
+        choice = choices[0]
+        if choice.get("error"):
+            self.error = choice["error"]
+        if choice.get("finish_reason"):
+            self.finish_reason = choice["finish_reason"]
+
+        delta = choice.get("delta") or {}
+        content = delta.get("content")
+        reasoning = delta.get("reasoning")
+        if (content or reasoning) and self.first_token_time is None:
+            self.first_token_time = time.time()
+        if content:
+            self.content_parts.append(content)
+        if reasoning:
+            self.reasoning_parts.append(reasoning)
+
+    def to_response_data(self) -> Dict:
+        """Build a body shaped like a non-streamed chat completion response."""
+        message = {"content": "".join(self.content_parts)}
+        if self.reasoning_parts:
+            message["reasoning"] = "".join(self.reasoning_parts)
+        choice = {"message": message, "finish_reason": self.finish_reason}
+        if self.error:
+            choice["error"] = self.error
+        return {"choices": [choice], "usage": self.usage}
+
+
+def _build_metrics(
+    start_time: float,
+    end_time: float,
+    usage: Dict,
+    streamed: bool,
+    first_token_time: Optional[float] = None,
+    request_bytes: Optional[int] = None,
+) -> Dict:
+    """Build the latency/throughput/upload-size metrics saved with each response."""
+    latency = end_time - start_time
+    completion_tokens = (usage or {}).get("completion_tokens") or 0
+
+    # Output throughput is measured over the generation phase when we know when it started
+    generation_time = end_time - first_token_time if first_token_time else latency
+    tokens_per_sec = completion_tokens / generation_time if generation_time > 0 else None
+
+    return {
+        "streamed": streamed,
+        "time_to_first_token": round(first_token_time - start_time, 3) if first_token_time else None,
+        "latency": round(latency, 3),
+        "output_tokens": completion_tokens,
+        "output_tokens_per_sec": round(tokens_per_sec, 2) if tokens_per_sec is not None else None,
+        "request_bytes": request_bytes,
+    }
+
+
+def _get_retry_after(headers) -> float:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds; 0 if absent or invalid."""
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
     try:
-        response = requests.post(
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def get_retry_delay(attempt: int, retry_after: float = 0.0) -> float:
+    """
+    Get how long to wait before retry number `attempt` (0-based).
+    Uses exponential backoff with jitter, but never waits less than the server's Retry-After.
+    """
+    backoff = min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * (2 ** attempt))
+    jittered = backoff * random.uniform(0.5, 1.0)
+    return max(jittered, min(retry_after, config.RETRY_MAX_DELAY))
+
+
+def _is_retryable_choice_error(data: Dict) -> bool:
+    """Check whether a 200 response carries a per-choice (or top-level) error worth retrying."""
+    error = data.get("error")
+    if not error and data.get("choices"):
+        error = data["choices"][0].get("error")
+    if not error:
+        return False
+    try:
+        return int(error.get("code")) in config.RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def _serialize(payload: Dict) -> bytes:
+    """Serialize a request payload once, so the upload size can be recorded."""
+    with tracing.span("serialize", "client") as span_args:
+        body = json.dumps(payload).encode("utf-8")
+        span_args["bytes"] = len(body)
+    return body
+
+
+def _post(headers: Dict, payload: Dict, body: bytes, timeout: int, start_time: float) -> Tuple[Dict, Optional[float]]:
+    """
+    Send one request over the shared requests session.
+
+    Returns:
+        (data, first_token_time) - the response body (assembled from the chunks when
+        streaming) and when the first token arrived (None unless streaming)
+    """
+    stream = payload.get("stream", False)
+    with tracing.span("http", "client", model=payload["model"], bytes=len(body), stream=stream) as http_args:
+        response = _get_session().post(
             f"{config.OPENROUTER_BASE_URL}/chat/completions",
             headers=headers,
-            json=payload,
-            timeout=timeout,
+            data=body,
+            # When streaming, the read timeout is the idle-stall timeout between chunks
+            timeout=(timeout, config.STREAM_IDLE_TIMEOUT) if stream else timeout,
+            stream=stream,
         )
+        http_args["status"] = response.status_code
 
         elapsed_time = time.time() - start_time
         logger.info(f"Got HTTP response: status={response.status_code}, elapsed={elapsed_time:.1f}s")
 
-        # Log response body for debugging (first 500 chars)
-        response_preview = response.text[:500] if len(response.text) > 500 else response.text
-        logger.debug(f"Response preview: {response_preview}")
+        if not stream:
+            # Log response body for debugging (first 500 chars)
+            logger.debug(f"Response preview: {response.text[:500]}")
+            response.raise_for_status()
+            return response.json(), None
 
         response.raise_for_status()
+        assembler = _StreamAssembler(start_time, timeout)
+        # text/event-stream is always UTF-8; without a charset requests would assume ISO-8859-1
+        response.encoding = "utf-8"
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                assembler.feed(line)
+        except requests.exceptions.ConnectionError as e:
+            # The idle-stall (read) timeout surfaces as a ConnectionError wrapping urllib3's ReadTimeoutError;
+            # anything else (e.g. a reset connection) keeps its own error
+            if e.args and isinstance(e.args[0], urllib3.exceptions.ReadTimeoutError):
+                raise _StreamTimeout(f"Stream stalled: no data for {config.STREAM_IDLE_TIMEOUT} seconds")
+            raise
+        finally:
+            response.close()
+    return assembler.to_response_data(), assembler.first_token_time
 
-        data = response.json()
-
-        # Check for errors in the response choices
-        choice = data["choices"][0]
-        if "error" in choice and choice["error"]:
-            error_msg = choice["error"].get("message", "Unknown error")
-            error_code = choice["error"].get("code", "unknown")
-            logger.error(f"Model returned error: code={error_code}, message={error_msg}")
-            return {
-                "content": None,
-                "error": f"Model error ({error_code}): {error_msg}",
-            }
-
-        message = choice["message"]
-        # For reasoning models (like GPT-5), check for reasoning field first
-        # If reasoning exists and content is empty, use reasoning as the content
-        content = message.get("content", "")
-        if not content and "reasoning" in message:
-            content = message["reasoning"]
-            logger.info(f"Using reasoning field as content (length={len(content)} chars)")
-
-        content_length = len(content) if content else 0
-        usage = data.get("usage", {})
-        logger.info(f"Success: content_length={content_length} chars, usage={usage}")
 
-        return {
-            "content": content,
-            "error": None,
-            "usage": usage,
-        }
+async def _post_async(headers: Dict, payload: Dict, body: bytes, timeout: int,
+                      start_time: float) -> Tuple[Dict, Optional[float]]:
+    """Async version of _post using the shared httpx client."""
+    stream = payload.get("stream", False)
+    url = f"{config.OPENROUTER_BASE_URL}/chat/completions"
+    with tracing.span("http", "client", model=payload["model"], bytes=len(body), stream=stream) as http_args:
+        if not stream:
+            response = await _get_async_client().post(url, headers=headers, content=body, timeout=timeout)
+            http_args["status"] = response.status_code
 
-    except requests.exceptions.Timeout:
-        elapsed_time = time.time() - start_time
+            elapsed_time = time.time() - start_time
+            logger.info(f"Got HTTP response: status={response.status_code}, elapsed={elapsed_time:.1f}s, http_version={response.http_version}")
+            logger.debug(f"Response preview: {response.text[:500]}")
+            response.raise_for_status()
+            return response.json(), None
+
+        # The read timeout is the idle-stall timeout between chunks
+        request_timeout = httpx.Timeout(timeout, read=config.STREAM_IDLE_TIMEOUT)
+        async with _get_async_client().stream(
+            "POST", url, headers=headers, content=body, timeout=request_timeout
+        ) as response:
+            http_args["status"] = response.status_code
+            elapsed_time = time.time() - start_time
+            logger.info(f"Got HTTP response: status={response.status_code}, elapsed={elapsed_time:.1f}s, http_version={response.http_version}")
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+
+            assembler = _StreamAssembler(start_time, timeout)
+            try:
+                async for line in response.aiter_lines():
+                    assembler.feed(line)
+            except httpx.ReadTimeout:
+                raise _StreamTimeout(f"Stream stalled: no data for {config.STREAM_IDLE_TIMEOUT} seconds")
+    return assembler.to_response_data(), assembler.first_token_time
+
+
+def _attempt_result(data: Dict, stream: bool, start_time: float, first_token_time: Optional[float],
+                    request_bytes: int) -> Tuple[Dict, Optional[float]]:
+    """Turn a received response body into the (result, retry_after) of _send_request."""
+    try:
+        with tracing.span("parse_response", "client"):
+            result = _parse_response_data(data)
+        # Raw body for cassette recording (call_model removes it from the result)
+        result["response_data"] = data
+        result["metrics"] = _build_metrics(
+            start_time, time.time(), data.get("usage"), stream, first_token_time, request_bytes
+        )
+    except Exception as e:
+        return _failed_attempt(e, start_time, None, data)
+    return result, (0.0 if result["error"] and _is_retryable_choice_error(data) else None)
+
+
+def _failed_attempt(e: Exception, start_time: float, timeout: Optional[int],
+                    data: Optional[Dict] = None) -> Tuple[Dict, Optional[float]]:
+    """
+    Turn an error raised during one attempt (by either client) into the (result, retry_after)
+    of _send_request. Stalls, timeouts, connection errors and config.RETRYABLE_STATUS_CODES
+    are retried. Must be called while handling `e`, so the traceback can be logged.
+
+    Args:
+        data: The response body, if it was received
+    """
+    elapsed_time = time.time() - start_time
+    retry_after = None
+    if isinstance(e, _StreamTimeout):
+        logger.error(f"{e} (after {elapsed_time:.1f}s)")
+        error, retry_after = str(e), 0.0
+    elif isinstance(e, _TIMEOUT_ERRORS):
         logger.error(f"Request timed out after {elapsed_time:.1f}s (timeout={timeout}s)")
-        return {
-            "content": None,
-            "error": f"Request timed out after {timeout} seconds",
-        }
-    except requests.exceptions.RequestException as e:
-        elapsed_time = time.time() - start_time
+        error, retry_after = f"Request timed out after {timeout} seconds", 0.0
+    elif isinstance(e, _HTTP_ERRORS):
         logger.error(f"API request failed after {elapsed_time:.1f}s: {str(e)}")
-        # Try to log response details if available
-        if hasattr(e, 'response') and e.response is not None:
-            logger.error(f"Response status: {e.response.status_code}")
-            logger.error(f"Response body: {e.response.text[:500]}")
-        return {
-            "content": None,
-            "error": f"API request failed: {str(e)}",
-        }
-    except (KeyError, IndexError) as e:
-        elapsed_time = time.time() - start_time
+        error = f"API request failed: {str(e)}"
+        if isinstance(e, _CONNECTION_ERRORS):
+            retry_after = 0.0
+        # Only HTTP status errors carry a response
+        response = getattr(e, "response", None)
+        if response is not None:
+            logger.error(f"Response status: {response.status_code}")
+            logger.error(f"Response body: {response.text[:500]}")
+            if response.status_code in config.RETRYABLE_STATUS_CODES:
+                retry_after = _get_retry_after(response.headers)
+    elif isinstance(e, (KeyError, IndexError)):
         logger.error(f"Failed to parse response after {elapsed_time:.1f}s: {str(e)}")
-        logger.error(f"Response data structure: {data if 'data' in locals() else 'N/A'}")
-        return {
-            "content": None,
-            "error": f"Failed to parse response: {str(e)}",
-        }
-    except Exception as e:
-        elapsed_time = time.time() - start_time
+        logger.error(f"Response data structure: {data if data is not None else 'N/A'}")
+        error = f"Failed to parse response: {str(e)}"
+        if data is not None and _is_retryable_choice_error(data):
+            retry_after = 0.0
+    else:
         logger.error(f"Unexpected error after {elapsed_time:.1f}s: {str(e)}")
         logger.exception("Full traceback:")
+        error = f"Unexpected error: {str(e)}"
+    result = {"content": None, "error": error}
+    # A body we couldn't use may still have been billed
+    if isinstance(data, dict) and data.get("usage"):
+        result["usage"] = data["usage"]
+    return result, retry_after
+
+
+def _send_request(headers: Dict, payload: Dict, timeout: int) -> Tuple[Dict, Optional[float]]:
+    """
+    Make one HTTP attempt for call_model.
+
+    Returns:
+        (result, retry_after) - retry_after is None if the call must not be retried,
+        otherwise the server-requested wait in seconds (0 if none was given)
+    """
+    body = _serialize(payload)
+    start_time = time.time()
+    try:
+        data, first_token_time = _post(headers, payload, body, timeout, start_time)
+    except Exception as e:
+        return _failed_attempt(e, start_time, timeout)
+    return _attempt_result(data, payload.get("stream", False), start_time, first_token_time, len(body))
+
+
+async def _send_request_async(headers: Dict, payload: Dict, timeout: int) -> Tuple[Dict, Optional[float]]:
+    """Async version of _send_request using the shared httpx client."""
+    body = _serialize(payload)
+    start_time = time.time()
+    try:
+        data, first_token_time = await _post_async(headers, payload, body, timeout, start_time)
+    except Exception as e:
+        return _failed_attempt(e, start_time, timeout)
+    return _attempt_result(data, payload.get("stream", False), start_time, first_token_time, len(body))
+
+
+def _replay(model_id: str, fingerprint: str) -> Tuple[Dict, float]:
+    """
+    Serve a request from the cassette (config.CASSETTE_MODE = "replay").
+
+    Returns:
+        (result, delay) - the call_model result and how long to wait before returning it
+    """
+    entry = cassette.load(fingerprint)
+    if entry is None:
+        logger.error(f"Request not in cassette: model={model_id}, fingerprint={fingerprint[:12]}")
         return {
             "content": None,
-            "error": f"Unexpected error: {str(e)}",
-        }
+            "error": f"Request not recorded in cassette {config.CASSETTE_PATH} (replay mode)",
+            "attempts": 0,
+            "request_fingerprint": fingerprint,
+        }, 0.0
+
+    logger.info(f"Replaying from cassette: model={model_id}, fingerprint={fingerprint[:12]}")
+    if entry["response_data"] is not None:
+        # Parsed again, like a live response
+        result = _parse_response_data(entry["response_data"])
+    else:
+        result = {"content": None, "error": entry["error"]}
+    if entry.get("metrics"):
+        result["metrics"] = entry["metrics"]
+    result["attempts"] = entry.get("attempts", 1)
+    result["request_fingerprint"] = fingerprint
+    result["replayed"] = True
+    return result, cassette.get_replay_delay(entry)
+
+
+def _prepare_call(
+    model_id: str,
+    prompt: str,
+    image_paths: Optional[List[Path]],
+    max_tokens: int,
+    temperature: float,
+    timeout: int,
+    stream: Optional[bool],
+    sample_key: Optional[str],
+    use_cache: bool,
+    n: int,
+    response_format: Optional[Dict],
+) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Build the request of a call_model / call_model_async call, and serve it from the
+    cassette (replay mode) or the request cache if possible.
+
+    Returns:
+        (call, served) - call holds the request (headers, payload, fingerprint), the
+        cassette mode and whether the request cache is used; served is the result if
+        no request needs to be sent (after waiting call["replay_delay"] seconds), else None
+    """
+    if stream is None:
+        stream = config.STREAM_RESPONSES
+    # The stream assembler only follows the first choice
+    stream = stream and n == 1
+    # Includes encoding images that aren't in the image cache yet
+    with tracing.span("build_request", "client", images=len(image_paths or [])):
+        headers, payload = _build_request(model_id, prompt, image_paths, max_tokens, temperature, stream, n,
+                                          response_format)
+        fingerprint = request_cache.request_fingerprint(payload, image_paths, sample_key)
+    call = {
+        "headers": headers,
+        "payload": payload,
+        "fingerprint": fingerprint,
+        "mode": cassette.get_mode(),
+        "use_cache": use_cache and config.REQUEST_CACHE_ENABLED,
+        "replay_delay": 0.0,
+    }
+    if call["mode"] == "replay":
+        with tracing.span("replay", "client", model=model_id):
+            result, call["replay_delay"] = _replay(model_id, fingerprint)
+        metrics.REQUESTS.inc(model=model_id, outcome="replayed")
+        return call, result
+    # While recording, every request is sent so the cassette holds the whole run
+    if call["use_cache"] and call["mode"] != "record":
+        with tracing.span("cache_lookup", "client"):
+            cached = request_cache.lookup(fingerprint)
+        if cached is not None:
+            logger.info(f"Request cache hit: model={model_id}, fingerprint={fingerprint[:12]}")
+            metrics.REQUESTS.inc(model=model_id, outcome="cached")
+            # Nothing was sent: the stored timings belong to the original call, so they're cleared
+            timings = {"time_to_first_token": None, "latency": None, "output_tokens_per_sec": None}
+            return call, {**cached, "cache_hit": True, "attempts": 0,
+                          "metrics": {**(cached.get("metrics") or {}), **timings}}
+
+    # Log request details
+    image_count = len(image_paths) if image_paths else 0
+    logger.info(f"Starting API request: model={model_id}, images={image_count}, timeout={timeout}s, stream={stream}")
+    return call, None
+
+
+def _plan_retry(model_id: str, attempt: int, result: Dict, retry_after: Optional[float],
+                limiters: List, tags: Optional[Dict]) -> Optional[float]:
+    """
+    Decide whether attempt number `attempt` (0-based) of a call is retried. A retried
+    attempt that was billed (returned usage) is recorded in the cost ledger here, since
+    only the final attempt reaches _finish_call.
+
+    Returns:
+        How long to wait before the next attempt, or None to stop retrying
+    """
+    if retry_after is None or attempt == config.MAX_RETRIES:
+        return None
+
+    if result.get("usage"):
+        cost_ledger.record(model_id, result["usage"], tags)
+    delay = get_retry_delay(attempt, retry_after)
+    metrics.RETRIES.inc(model=model_id)
+    if retry_after:
+        # The provider told us to back off; hold back other callers of this model too
+        for limiter in limiters:
+            limiter.pause(retry_after)
+    logger.warning(f"Retrying {model_id} in {delay:.1f}s (attempt {attempt + 2}/{config.MAX_RETRIES + 1}): {result['error']}")
+    return delay
+
+
+def _finish_call(model_id: str, call: Dict, result: Dict, attempts: int, call_start: float,
+                 tags: Optional[Dict]) -> Dict:
+    """Record the final result of a sent call (metrics, cassette, ledger, request cache) and return it."""
+    metrics.record_call(model_id, result, time.time() - call_start)
+    response_data = result.pop("response_data", None)
+    result["attempts"] = attempts
+    result["request_fingerprint"] = call["fingerprint"]
+    # Ledger, request cache and cassette writes
+    with tracing.span("record_result", "client"):
+        if call["mode"] == "record":
+            cassette.record(call["fingerprint"], model_id, result, response_data, time.time() - call_start)
+        # Failed calls count too when they were billed (e.g. per-choice errors with usage)
+        if result["error"] is None or result.get("usage"):
+            cost_ledger.record(model_id, result.get("usage"), tags)
+        if call["use_cache"] and result["error"] is None:
+            request_cache.store(call["fingerprint"], model_id, result)
+    return result
+
+
+def call_model(
+    model_id: str,
+    prompt: str,
+    image_paths: Optional[List[Path]] = None,
+    max_tokens: int = config.DEFAULT_MAX_TOKENS,
+    temperature: float = config.DEFAULT_TEMPERATURE,
+    timeout: int = config.DEFAULT_TIMEOUT,
+    stream: Optional[bool] = None,
+    sample_key: Optional[str] = None,
+    use_cache: bool = True,
+    n: int = 1,
+    response_format: Optional[Dict] = None,
+    tags: Optional[Dict] = None,
+) -> Dict:
+    """
+    Call an OpenRouter model with text and optional images.
+    Rate limits (config.RATE_LIMITS) are applied before each attempt, and 429s, 5xx
+    responses, timeouts and connection errors are retried with exponential backoff.
+
+    Args:
+        model_id: OpenRouter model ID (e.g., "anthropic/claude-sonnet-4.5")
+        prompt: Text prompt to send
+        image_paths: Optional list of image file paths
+        max_tokens: Maximum tokens in response
+        temperature: Sampling temperature (0=deterministic, 1=creative)
+        timeout: Total timeout in seconds for one attempt
+        stream: Stream the response over SSE (defaults to config.STREAM_RESPONSES);
+            a stream that sends nothing for config.STREAM_IDLE_TIMEOUT seconds is
+            treated as stalled
+        sample_key: Distinguishes independent samples of an identical request in the
+            request cache (e.g. "trial_0", "grade_3")
+        use_cache: Look up/store the result in the request cache (if config.REQUEST_CACHE_ENABLED)
+        n: Number of independent samples to request in one call (providers may return
+            fewer); n > 1 disables streaming
+        response_format: OpenAI-style response_format (e.g. a "json_schema" spec) for
+            models that support structured output
+        tags: Labels for the cost ledger (see cost_ledger.TAG_COLUMNS, e.g. stage and assignment);
+            they don't change the request
+
+    Returns:
+        Dict with 'content' (response text), 'error' (if any), 'attempts',
+        'metrics' (latency, time to first token, output tokens/sec, request bytes) and
+        'request_fingerprint' ('cache_hit' is set when served from the request cache, with
+        no attempts and no timing metrics,
+        'replayed' when served from the cassette, see config.CASSETTE_MODE).
+        When more than one sample came back, 'contents' lists all of them
+    """
+    call, served = _prepare_call(model_id, prompt, image_paths, max_tokens, temperature, timeout, stream,
+                                 sample_key, use_cache, n, response_format)
+    if served is not None:
+        time.sleep(call["replay_delay"])
+        return served
+
+    limiters = rate_limit.get_limiters(model_id)
+    call_start = time.time()
+    metrics.REQUESTS_IN_FLIGHT.inc(model=model_id)
+    # Always released, even if the call is interrupted or cancelled
+    try:
+        for attempt in range(config.MAX_RETRIES + 1):
+            with tracing.span("rate_limit_wait", "client"):
+                for limiter in limiters:
+                    limiter.acquire()
+
+            result, retry_after = _send_request(call["headers"], call["payload"], timeout)
+            delay = _plan_retry(model_id, attempt, result, retry_after, limiters, tags)
+            if delay is None:
+                break
+            with tracing.span("retry_backoff", "client", attempt=attempt + 1):
+                time.sleep(delay)
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec(model=model_id)
+
+    return _finish_call(model_id, call, result, attempt + 1, call_start, tags)
+
+
+async def call_model_async(
+    model_id: str,
+    prompt: str,
+    image_paths: Optional[List[Path]] = None,
+    max_tokens: int = config.DEFAULT_MAX_TOKENS,
+    temperature: float = config.DEFAULT_TEMPERATURE,
+    timeout: int = config.DEFAULT_TIMEOUT,
+    stream: Optional[bool] = None,
+    sample_key: Optional[str] = None,
+    use_cache: bool = True,
+    n: int = 1,
+    response_format: Optional[Dict] = None,
+    tags: Optional[Dict] = None,
+) -> Dict:
+    """
+    Async version of call_model backed by a pooled (HTTP/2 when available) httpx client.
+    Takes the same arguments, applies the same rate limits and retries, and returns
+    the same dict shape as call_model.
+    """
+    call, served = _prepare_call(model_id, prompt, image_paths, max_tokens, temperature, timeout, stream,
+                                 sample_key, use_cache, n, response_format)
+    if served is not None:
+        await asyncio.sleep(call["replay_delay"])
+        return served
+
+    limiters = rate_limit.get_limiters(model_id)
+    call_start = time.time()
+    metrics.REQUESTS_IN_FLIGHT.inc(model=model_id)
+    # Always released, even if the call is interrupted or cancelled
+    try:
+        for attempt in range(config.MAX_RETRIES + 1):
+            with tracing.span("rate_limit_wait", "client"):
+                for limiter in limiters:
+                    await limiter.acquire_async()
+
+            result, retry_after = await _send_request_async(call["headers"], call["payload"], timeout)
+            delay = _plan_retry(model_id, attempt, result, retry_after, limiters, tags)
+            if delay is None:
+                break
+            with tracing.span("retry_backoff", "client", attempt=attempt + 1):
+                await asyncio.sleep(delay)
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec(model=model_id)
+
+    return _finish_call(model_id, call, result, attempt + 1, call_start, tags)
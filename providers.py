@@ -0,0 +1,11 @@
+"""
+OpenRouter model IDs and their providers.
+
+Shared by the scheduler (per-provider worker caps) and the rate limiters
+(per-provider request limits).
+"""
+
+
+def get_provider(model_id: str) -> str:
+    """Get the provider prefix of an OpenRouter model ID (e.g. "anthropic")."""
+    return model_id.split("/")[0]
@@ -0,0 +1,168 @@
+"""
+Split ground truth and student answers into canonical question IDs.
+
+Ground truth files label each answer at the start of a line ("a) 794mm",
+"1a) kN", "2) 12.13kg"); those labels are the canonical question IDs for the
+assignment. Files with one answer per line may leave later questions unlabelled
+("a) kN" ... "e) MPa", then "12.13kg"); those are numbered after the labelled
+ones, which makes the lettered answers parts of question 1 ("1a" ... "1e", "2").
+Student answers are split on their own headings ("## Part (a)",
+"### Question 3b:", "**Question 1a:**", "1a) ..."), which are mapped onto the
+canonical IDs, so "3b" in an answer matches "b" in the ground truth.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# A ground truth label at the start of a line: "a)", "(a)", "1a)", "2)"
+_GROUND_TRUTH_LABEL = re.compile(r"^\s*\(?(\d{0,2}[a-z]|\d{1,2})\)\s*(.*)$", re.IGNORECASE)
+
+# A heading in a student answer: "Question 3b", "Q2" (any label), "Part (a)", or a
+# bare "(a)", "a)", "1a)", "1a:", "a." at the start of a line. "Part" and bare labels need
+# a letter, so numbered steps ("1.", "2)", "Part 2: ...") are not mistaken for questions.
+_ANSWER_HEADING = re.compile(
+    r"^[ \t>#*_]*"
+    r"(?:"
+    r"(?:question|q)\s*\.?\s*\(?(?P<named>\d{1,2}[a-z]?|[a-z])\)?(?![a-z0-9])"
+    r"|"
+    r"part\s*\(?(?P<part>\d{0,2}[a-z])\)?(?![a-z0-9])"
+    r"|"
+    r"\(?(?P<bare>\d{0,2}[a-z])(?:\)|[.:](?=[\s*]|$))"
+    r")",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def normalize_question_id(label: str) -> str:
+    """Canonical form of a question label ("(1A)" -> "1a")."""
+    return re.sub(r"[^0-9a-z]", "", label.lower())
+
+
+def split_ground_truth(ground_truth: str) -> Dict[str, str]:
+    """
+    Split a ground truth file into per-question answers.
+
+    Unlabeled lines before the first label (shared assumptions) are prepended to every
+    question. After the first label, an unlabeled line continues the answer above it when
+    answers are separated by blank lines; in files with one answer per line (no blank
+    lines), it is a question of its own and gets the next question number.
+
+    Args:
+        ground_truth: Contents of data/ground_truth/<n>.md
+
+    Returns:
+        Dict of canonical question ID -> ground truth text, in file order
+        (empty if the file has no labels)
+    """
+    lines = [line.strip() for line in ground_truth.splitlines()]
+    first_label = next((i for i, line in enumerate(lines) if _GROUND_TRUTH_LABEL.match(line)), None)
+    if first_label is None:
+        return {}
+    preamble, body = lines[:first_label], lines[first_label:]
+    while not body[-1]:
+        body.pop()
+    one_per_line = all(body)
+
+    # (label, lines) per answer; unlabelled answers get label None
+    answers: List[Tuple[Optional[str], List[str]]] = []
+    for line in body:
+        match = _GROUND_TRUTH_LABEL.match(line)
+        if match:
+            answers.append((normalize_question_id(match.group(1)), [match.group(2).strip()]))
+        elif one_per_line:
+            answers.append((None, [line]))
+        else:
+            answers[-1][1].append(line)
+
+    if any(label is None for label, _ in answers):
+        answers = _number_unlabelled(answers)
+
+    sections: Dict[str, List[str]] = {}
+    for label, answer_lines in answers:
+        sections.setdefault(label, []).extend(answer_lines)
+
+    # The first preamble line is usually a title like "Correct Answers:"
+    context = "\n".join(line for line in preamble[1:] if line)
+    return {
+        question_id: "\n".join(part for part in ([context] if context else []) + lines if part)
+        for question_id, lines in sections.items()
+    }
+
+
+def _number_unlabelled(answers: List[Tuple[Optional[str], List[str]]]) -> List[Tuple[str, List[str]]]:
+    """
+    Give unlabelled answers the next question number, and bare letter labels the number
+    of the question they belong to ("a" before any number -> "1a").
+    """
+    numbered = []
+    number = 0
+    for label, answer_lines in answers:
+        if label is None:
+            number += 1
+            label = str(number)
+        elif label.isalpha():
+            number = max(number, 1)
+            label = f"{number}{label}"
+        else:
+            number = int(re.match(r"\d+", label).group())
+        numbered.append((label, answer_lines))
+    return numbered
+
+
+def match_question_id(label: str, question_ids: List[str]) -> Optional[str]:
+    """
+    Map a label used in a student answer onto one of the canonical question IDs.
+
+    Exact matches win; otherwise "3b" matches "b" and "b" matches a single "<n>b".
+
+    Returns:
+        The canonical question ID, or None if the label doesn't identify one
+    """
+    label = normalize_question_id(label)
+    if label in question_ids:
+        return label
+
+    letter = re.sub(r"^\d+", "", label)
+    if letter and letter != label and letter in question_ids:
+        return letter
+    if letter == label:
+        candidates = [question_id for question_id in question_ids if re.fullmatch(rf"\d+{letter}", question_id)]
+        if len(candidates) == 1:
+            return candidates[0]
+    return None
+
+
+def split_student_answer(answer: str, question_ids: List[str]) -> Dict[str, str]:
+    """
+    Split a student answer into the sections for each canonical question.
+
+    Text before the first recognized heading (given data, assumptions) is kept at
+    the top of every section. Questions without a recognized heading get the full answer.
+
+    Args:
+        answer: The student's answer text
+        question_ids: Canonical question IDs from split_ground_truth
+
+    Returns:
+        Dict of question ID -> answer text for every ID in question_ids
+    """
+    headings = []
+    for match in _ANSWER_HEADING.finditer(answer):
+        question_id = match_question_id(match.group("named") or match.group("part") or match.group("bare"), question_ids)
+        if question_id is not None:
+            headings.append((match.start(), question_id))
+
+    if not headings:
+        return {question_id: answer for question_id in question_ids}
+
+    preamble = answer[:headings[0][0]].strip()
+    sections: Dict[str, List[str]] = {}
+    for i, (start, question_id) in enumerate(headings):
+        end = headings[i + 1][0] if i + 1 < len(headings) else len(answer)
+        sections.setdefault(question_id, []).append(answer[start:end].strip())
+
+    return {
+        question_id: "\n\n".join(([preamble] if preamble else []) + sections[question_id])
+        if question_id in sections else answer
+        for question_id in question_ids
+    }
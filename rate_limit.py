@@ -0,0 +1,78 @@
+"""
+Token-bucket request limiters for OpenRouter calls.
+
+Limits are configured in config.RATE_LIMITS as requests per minute, keyed by
+full model ID (e.g. "google/gemini-2.5-flash") or provider prefix (e.g.
+"openai"). A call waits on every bucket that applies to its model, so a
+provider limit is shared by all of that provider's models.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+import config
+import providers
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Callers reserve a token and sleep until it is theirs."""
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        """
+        Args:
+            requests_per_minute: Sustained request rate
+            burst: Number of requests that may be sent back-to-back
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly going into debt) and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back all callers for at least `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_limiters(model_id: str) -> List[TokenBucket]:
+    """Get the token buckets that apply to a model (model-specific and provider-wide)."""
+    limiters = []
+    for key in dict.fromkeys((model_id, providers.get_provider(model_id))):
+        requests_per_minute = config.RATE_LIMITS.get(key)
+        if requests_per_minute is None:
+            continue
+        with _buckets_lock:
+            if key not in _buckets:
+                _buckets[key] = TokenBucket(requests_per_minute, config.RATE_LIMIT_BURST)
+            limiters.append(_buckets[key])
+    return limiters
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of successful OpenRouter calls.
+
+Each call_model request is keyed by a hash of everything that determines the
+answer: model, prompt, image contents, sampling params and a sample key that
+separates independent samples of the same request (e.g. trial or grade
+number). Changing a prompt, temperature, max_tokens or image therefore misses
+the cache, while re-running an unchanged request costs nothing.
+
+Show cache size and hit/miss counts with:
+    python request_cache.py
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+import image_preprocess
+
+
+class BlobStore:
+    """Compact on-disk key -> JSON store (SQLite, zlib-compressed values), safe to share between threads."""
+
+    def __init__(self, path: Path, table: str = "entries"):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the database on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, model TEXT, created TEXT, value BLOB)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get the stored value for a key, or None."""
+        row = self._connect().execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, model: str, value: Dict):
+        """Store (or replace) the value for a key."""
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, model, created, value) VALUES (?, ?, ?, ?)",
+                (key, model, datetime.now().isoformat(), blob),
+            )
+
+    def summary(self) -> List[Dict]:
+        """Get entry counts and stored bytes per model."""
+        rows = self._connect().execute(
+            f"SELECT model, COUNT(*), SUM(LENGTH(value)) FROM {self.table} GROUP BY model ORDER BY model"
+        ).fetchall()
+        return [{"model": model, "entries": count, "bytes": size or 0} for model, count, size in rows]
+
+
+_file_hashes: Dict = {}
+_file_hashes_lock = threading.Lock()
+
+
+def _file_sha256(path: Path) -> str:
+    """Hash an image file's contents (memoized by path + mtime + size)."""
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    with _file_hashes_lock:
+        digest = _file_hashes.get(memo_key)
+    if digest is None:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        with _file_hashes_lock:
+            _file_hashes[memo_key] = digest
+    return digest
+
+
+def request_fingerprint(payload: Dict, image_paths: Optional[List[Path]], sample_key: Optional[str] = None) -> str:
+    """
+    Hash a chat completion request.
+
+    Image data URLs are replaced by hashes of the source files (plus the preprocessing
+    settings when enabled), so hashing stays cheap. "stream" is ignored since it does
+    not change the answer.
+
+    Args:
+        payload: JSON payload built by openrouter_client
+        image_paths: Images attached to the request, in payload order
+        sample_key: Distinguishes independent samples of the same request
+
+    Returns:
+        Hex SHA-256 fingerprint
+    """
+    image_hashes = iter([_file_sha256(path) for path in image_paths or []])
+    messages = []
+    for message in payload.get("messages", []):
+        content = message["content"]
+        if isinstance(content, list):
+            content = [
+                {"type": "image", "sha256": next(image_hashes)} if part.get("type") == "image_url" else part
+                for part in content
+            ]
+        messages.append({**message, "content": content})
+
+    keyed = {key: value for key, value in payload.items() if key not in ("messages", "stream")}
+    keyed["messages"] = messages
+    keyed["sample_key"] = sample_key
+    if config.IMAGE_PREPROCESS:
+        keyed["image_preprocess"] = image_preprocess.settings_key()
+
+    canonical = json.dumps(keyed, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+_store = BlobStore(config.REQUEST_CACHE_PATH, table="requests")
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+_stats_lock = threading.Lock()
+
+
+def lookup(fingerprint: str) -> Optional[Dict]:
+    """Get the cached call_model result for a fingerprint, or None (counts a hit/miss)."""
+    result = _store.get(fingerprint)
+    with _stats_lock:
+        _stats["hits" if result is not None else "misses"] += 1
+    return result
+
+
+def store(fingerprint: str, model_id: str, result: Dict):
+    """Cache a successful call_model result."""
+    if result.get("error") is not None:
+        return
+    _store.put(fingerprint, model_id, result)
+    with _stats_lock:
+        _stats["stores"] += 1
+
+
+def get_stats() -> Dict:
+    """Get this process's hit/miss/store counts."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def print_stats():
+    """Print this process's hit rate (if the cache was used)."""
+    stats = get_stats()
+    lookups = stats["hits"] + stats["misses"]
+    if lookups:
+        print(f"Request cache: {stats['hits']}/{lookups} hits ({stats['hits'] / lookups:.0%}), "
+              f"{stats['stores']} new entries")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("REQUEST CACHE")
+    print("=" * 60)
+    print(f"Path: {config.REQUEST_CACHE_PATH}")
+    print(f"Enabled: {config.REQUEST_CACHE_ENABLED}")
+    print()
+    for row in _store.summary():
+        print(f"  {row['model']:40s} {row['entries']:6d} entries {row['bytes'] / 1024:10.1f} KiB")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Indexed, deduplicated store of grade records (SQLite).
+
+Replaces the append-only results/grades.jsonl: every grade is keyed by
+(grader_model, tested_model, assignment, trial, grade_num), so re-running
+grading updates a record instead of adding a duplicate. Writes are safe from
+concurrent threads and processes (WAL mode + busy timeout).
+
+Usage:
+    python results_store.py migrate [FILE ...]   # import JSONL grades (default: results/grades.jsonl)
+    python results_store.py export [FILE]        # write deduplicated JSONL
+    python results_store.py stats                # record counts per grader/model
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+
+KEY_COLUMNS = ["grader_model", "tested_model", "assignment", "trial", "grade_num"]
+COLUMNS = KEY_COLUMNS + [
+    "timestamp", "score", "total_correct", "total_questions", "questions", "summary", "success",
+]
+# Stored as JSON text
+JSON_COLUMNS = ["questions", "summary"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS grades (
+    grader_model TEXT NOT NULL,
+    tested_model TEXT NOT NULL,
+    assignment INTEGER NOT NULL,
+    trial INTEGER NOT NULL,
+    grade_num INTEGER NOT NULL,
+    timestamp TEXT,
+    score REAL,
+    total_correct INTEGER,
+    total_questions INTEGER,
+    questions TEXT,
+    summary TEXT,
+    success INTEGER,
+    PRIMARY KEY (grader_model, tested_model, assignment, trial, grade_num)
+);
+CREATE INDEX IF NOT EXISTS idx_grades_tested_model ON grades (tested_model);
+CREATE INDEX IF NOT EXISTS idx_grades_assignment ON grades (assignment);
+"""
+
+_local = threading.local()
+
+
+def _connect(db_path: Optional[Path] = None) -> sqlite3.Connection:
+    """Get this thread's connection to the results database, creating it on first use."""
+    db_path = Path(db_path or config.RESULTS_DB_PATH)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def _to_row(record: Dict) -> tuple:
+    """Convert a grade record to a row tuple in COLUMNS order."""
+    row = []
+    for column in COLUMNS:
+        value = record.get(column)
+        if column in JSON_COLUMNS:
+            value = json.dumps(value or {})
+        elif column == "success":
+            value = int(bool(value))
+        row.append(value)
+    return tuple(row)
+
+
+def _from_row(row: tuple) -> Dict:
+    """Convert a row tuple in COLUMNS order back to a grade record."""
+    record = dict(zip(COLUMNS, row))
+    for column in JSON_COLUMNS:
+        record[column] = json.loads(record[column]) if record[column] else {}
+    record["success"] = bool(record["success"])
+    return record
+
+
+# SQL condition for a usable grade row (table: "grades" or "excluded")
+_USABLE = "({table}.success = 1 AND {table}.score IS NOT NULL)"
+
+
+def upsert_grades(records: List[Dict], db_path: Optional[Path] = None):
+    """
+    Insert grade records, replacing existing records with the same key.
+    An existing record is only replaced by one with an equal or newer timestamp, and a
+    usable grade (successful, with a score) only by another usable one, so a failed or
+    unparseable regrade doesn't drop a good grade from the analysis.
+    """
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS if column not in KEY_COLUMNS)
+    sql = (
+        f"INSERT INTO grades ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET {updates} "
+        "WHERE (excluded.timestamp >= grades.timestamp OR grades.timestamp IS NULL) "
+        f"AND ({_USABLE.format(table='excluded')} OR NOT {_USABLE.format(table='grades')})"
+    )
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(sql, [_to_row(record) for record in records])
+
+
+def upsert_grade(record: Dict, db_path: Optional[Path] = None):
+    """Insert or update a single grade record (see upsert_grades)."""
+    upsert_grades([record], db_path)
+
+
+def load_records(
+    grader_model: Optional[str] = None,
+    tested_model: Optional[str] = None,
+    assignment: Optional[int] = None,
+    db_path: Optional[Path] = None,
+) -> List[Dict]:
+    """
+    Load grade records, optionally filtered (filters use the table's indexes).
+
+    Returns:
+        List of grade record dicts, ordered by key
+    """
+    ensure_migrated(db_path)
+    filters = {"grader_model": grader_model, "tested_model": tested_model, "assignment": assignment}
+    clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+    params = [value for value in filters.values() if value is not None]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = _connect(db_path).execute(
+        f"SELECT {', '.join(COLUMNS)} FROM grades {where} ORDER BY {', '.join(KEY_COLUMNS)}", params
+    ).fetchall()
+    return [_from_row(row) for row in rows]
+
+
+def load_dataframe(**filters):
+    """Load grade records (see load_records) into a pandas DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame(load_records(**filters), columns=COLUMNS)
+
+
+def migrate_jsonl(paths: List[Path], db_path: Optional[Path] = None) -> Dict:
+    """
+    Import grade records from JSONL files. Duplicate keys keep the newest record.
+
+    Returns:
+        Dict with 'read' (lines read) and 'stored' (records in the store afterwards)
+    """
+    records = []
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+
+    upsert_grades(records, db_path)
+    stored = _connect(db_path).execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+    return {"read": len(records), "stored": stored}
+
+
+def ensure_migrated(db_path: Optional[Path] = None):
+    """Create the store from results/grades.jsonl the first time it is needed."""
+    db_path = Path(db_path or config.RESULTS_DB_PATH)
+    legacy_path = config.RESULTS_DIR / "grades.jsonl"
+    if not db_path.exists() and legacy_path.exists():
+        migrate_jsonl([legacy_path], db_path)
+
+
+def export_jsonl(path: Path, db_path: Optional[Path] = None) -> int:
+    """Write all (deduplicated) grade records to a JSONL file. Returns the record count."""
+    records = load_records(db_path=db_path)
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the grade results store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Import grades from JSONL files")
+    migrate_parser.add_argument("files", nargs="*", type=Path, default=[config.RESULTS_DIR / "grades.jsonl"])
+    export_parser = subparsers.add_parser("export", help="Write deduplicated grades to JSONL")
+    export_parser.add_argument("file", nargs="?", type=Path, default=config.RESULTS_DIR / "grades_dedup.jsonl")
+    subparsers.add_parser("stats", help="Show record counts")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        result = migrate_jsonl(args.files)
+        print(f"Read {result['read']} record(s); store now holds {result['stored']} unique grade(s)")
+        print(f"Store: {config.RESULTS_DB_PATH}")
+    elif args.command == "export":
+        count = export_jsonl(args.file)
+        print(f"Wrote {count} grade(s) to {args.file}")
+    elif args.command == "stats":
+        ensure_migrated()
+        rows = _connect().execute(
+            "SELECT grader_model, tested_model, COUNT(*), SUM(success) FROM grades "
+            "GROUP BY grader_model, tested_model ORDER BY grader_model, tested_model"
+        ).fetchall()
+        for grader_model, tested_model, count, successes in rows:
+            print(f"  {grader_model:28s} {tested_model:40s} {count:5d} grades ({successes} successful)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,48 @@
 #!/usr/bin/env python3
 """
 Main benchmark orchestrator.
-Run with: python run_bench.py
+Run with: python run_bench.py [--async] [--resume RUN_ID] [--cassette record|replay] [--trace]
+          [--metrics-port PORT]
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+import argparse
+import asyncio
+from typing import Optional
 
 import config
 import answerer
-
-
-def main():
-    """Run the benchmark."""
+import cassette
+import cost_ledger
+import metrics
+import openrouter_client
+import request_cache
+import run_manifest
+import scheduler
+import tracing
+
+
+def main(use_async: bool = False, resume: Optional[str] = None):
+    """
+    Run the benchmark.
+
+    Args:
+        use_async: Run all jobs as asyncio tasks with the async OpenRouter client
+            instead of on the thread pool
+        resume: Run ID of an earlier run whose pending and failed jobs should be
+            re-queued (see run_manifest.py) instead of planning a new run
+
+    Returns:
+        Scheduler stats for the answer jobs (see scheduler.run_jobs), or None if
+        there were no images to test or no such run
+    """
     print("=" * 60)
     print("Civil Engineering Benchmark")
     print("=" * 60)
     print()
+    run_id = cost_ledger.start_run(resume)
+    tracing.reset()
+    if config.METRICS_PORT:
+        print(f"📈 Live metrics: {metrics.start_server(config.METRICS_PORT)}\n")
 
     # Check that images directory exists
     if not config.IMAGES_DIR.exists():
@@ -32,84 +58,133 @@ def main():
         return
 
     print(f"Found {len(image_files)} image file(s)")
-    print(f"Testing {len(config.TEST_MODELS)} model(s)")
-    print(f"Number of trials per model: {config.NUM_TRIALS}")
+    if resume:
+        try:
+            manifest = run_manifest.RunManifest.load("bench", resume)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return
+        jobs = manifest.get_incomplete()
+        print(f"Resuming run {run_id}: {len(jobs)} of {len(manifest.data['jobs'])} job(s) left")
+        changed = manifest.get_config_changes()
+        if changed:
+            print(f"⚠️  Settings changed since the run started: {', '.join(changed)}")
+    else:
+        print(f"Testing {len(config.TEST_MODELS)} model(s)")
+        print(f"Number of trials per model: {config.NUM_TRIALS}")
     print(f"Parallel workers: {config.MAX_WORKERS}")
+    if config.PROVIDER_MAX_WORKERS:
+        print(f"Per-provider worker caps: {config.PROVIDER_MAX_WORKERS}")
     print()
 
-    # Run benchmark
-    total_calls = 0
-    successful_calls = 0
-    failed_calls = 0
-
-    for model_id in config.TEST_MODELS:
-        print(f"\n{'='*60}")
-        print(f"Model: {model_id}")
-        print('='*60)
-
-        for trial_num in range(config.NUM_TRIALS):
-            if config.NUM_TRIALS > 1:
-                print(f"\nTrial {trial_num + 1}/{config.NUM_TRIALS}")
-
-            # Build list of assignments to process
-            assignments_to_process = []
-            for assignment_num in config.ASSIGNMENTS_TO_TEST:
-                # Check if images exist for this assignment
-                image_paths = answerer.find_assignment_images(assignment_num)
-                if not image_paths:
-                    print(f"  Skipping assignment {assignment_num} (no images found)")
-                    continue
-                assignments_to_process.append(assignment_num)
-
-            if not assignments_to_process:
+    if not resume:
+        # Build one flat job list covering every (model, trial, assignment)
+        assignments_to_process = []
+        for assignment_num in config.ASSIGNMENTS_TO_TEST:
+            # Check if images exist for this assignment
+            image_paths = answerer.find_assignment_images(assignment_num)
+            if not image_paths:
+                print(f"  Skipping assignment {assignment_num} (no images found)")
                 continue
-
-            # Process assignments in parallel
-            print(f"\n  Processing {len(assignments_to_process)} assignment(s) with {config.MAX_WORKERS} workers...")
-            with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as executor:
-                # Submit all tasks (verbose=False for cleaner output)
-                future_to_assignment = {
-                    executor.submit(
-                        answerer.get_answer,
-                        model_id,
-                        assignment_num,
-                        trial_num,
-                        verbose=False
-                    ): assignment_num
-                    for assignment_num in assignments_to_process
-                }
-
-                # Process results as they complete with progress bar
-                with tqdm(total=len(assignments_to_process), desc="  Progress", unit="assignment") as pbar:
-                    for future in as_completed(future_to_assignment):
-                        assignment_num = future_to_assignment[future]
-                        total_calls += 1
-
-                        try:
-                            result = future.result()
-                            if result["success"]:
-                                successful_calls += 1
-                                pbar.set_postfix_str(f"Assignment {assignment_num} ✓")
-                            else:
-                                failed_calls += 1
-                                pbar.set_postfix_str(f"Assignment {assignment_num} ✗")
-                        except Exception as e:
-                            failed_calls += 1
-                            tqdm.write(f"  ❌ Exception processing assignment {assignment_num}: {e}")
-
-                        pbar.update(1)
+            assignments_to_process.append(assignment_num)
+
+        jobs = [
+            {
+                "model_id": model_id,
+                "trial_num": trial_num,
+                "assignment_num": assignment_num,
+            }
+            for model_id in config.TEST_MODELS
+            for trial_num in range(config.NUM_TRIALS)
+            for assignment_num in assignments_to_process
+        ]
+        manifest = run_manifest.RunManifest.create("bench", run_id, jobs)
+
+    def checkpoint(job, response):
+        """Checkpoint a finished job's state in the run manifest."""
+        manifest.mark(job, response["success"], response.get("error"))
+        return response
+
+    common = dict(
+        describe=lambda job: f"{job['model_id'].split('/')[-1]} A{job['assignment_num']} T{job['trial_num']}",
+        unit="assignment",
+    )
+
+    # Process all jobs on one shared pool (verbose=False for cleaner output)
+    try:
+        if use_async:
+            print(f"\n  Processing {len(jobs)} job(s) with up to {config.ASYNC_MAX_IN_FLIGHT} requests in flight...")
+
+            async def answer(job):
+                return checkpoint(job, await answerer.get_answer_async(
+                    job["model_id"],
+                    job["assignment_num"],
+                    job["trial_num"],
+                    verbose=False
+                ))
+
+            async def run():
+                try:
+                    return await scheduler.run_jobs_async(jobs, worker=answer, **common)
+                finally:
+                    await openrouter_client.close_async_client()
+
+            stats = asyncio.run(run())
+        else:
+            print(f"\n  Processing {len(jobs)} job(s) with {config.MAX_WORKERS} workers...")
+            stats = scheduler.run_jobs(
+                jobs,
+                worker=lambda job: checkpoint(job, answerer.get_answer(
+                    job["model_id"],
+                    job["assignment_num"],
+                    job["trial_num"],
+                    verbose=False
+                )),
+                **common,
+            )
+    except BaseException:
+        # Ctrl-C or a crash: keep what finished so the rest can be resumed
+        manifest.finish("interrupted")
+        raise
+    manifest.finish()
 
     # Summary
     print()
     print("=" * 60)
     print("BENCHMARK COMPLETE")
     print("=" * 60)
-    print(f"Total API calls: {total_calls}")
-    print(f"Successful: {successful_calls}")
-    print(f"Failed: {failed_calls}")
+    print(f"Total API calls: {stats['total']}")
+    print(f"Successful: {stats['successful']}")
+    print(f"Failed: {stats['failed']}")
+    if stats["skipped"]:
+        print(f"Skipped (budget reached): {stats['skipped']}")
+    request_cache.print_stats()
+    cassette.print_stats()
+    cost_ledger.print_run_summary()
+    manifest.print_summary("run_bench.py")
     print(f"\nResponses saved to: {config.RESPONSES_DIR}")
+    tracing.finish(f"bench-{run_id}")
     print()
+    return stats
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the civil engineering benchmark.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio OpenRouter client instead of the thread pool")
+    parser.add_argument("--resume", default=None, metavar="RUN_ID",
+                        help="Re-queue only the pending and failed jobs of an earlier run (see run_manifest.py)")
+    parser.add_argument("--cassette", choices=cassette.MODES, default=None,
+                        help="Record API responses to, or replay them from, config.CASSETTE_PATH")
+    parser.add_argument("--trace", action="store_true",
+                        help="Record a span trace of the run to config.TRACE_DIR")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="Serve live Prometheus metrics on this port (default: config.METRICS_PORT)")
+    args = parser.parse_args()
+    if args.cassette:
+        config.CASSETTE_MODE = args.cassette
+    if args.trace:
+        config.TRACE_ENABLED = True
+    if args.metrics_port:
+        config.METRICS_PORT = args.metrics_port
+    main(use_async=args.use_async, resume=args.resume)
@@ -1,10 +1,52 @@
 #!/usr/bin/env python3
 """
 Grade all existing responses.
-Run with: python run_grading.py
+Run with: python run_grading.py [--async] [--full] [--adaptive] [--batch N] [--per-question]
+          [--resume RUN_ID] [--cassette record|replay] [--trace] [--metrics-port PORT]
 """
 
+import argparse
+
+import cassette
+import config
 import grader
 
 if __name__ == "__main__":
-    grader.grade_all_responses()
+    parser = argparse.ArgumentParser(description="Grade all existing responses.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio OpenRouter client instead of the thread pool")
+    parser.add_argument("--full", action="store_true",
+                        help="Regrade every answer instead of only missing or stale grades "
+                             "(with fresh grader calls, not request cache replies)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Grade in rounds until grades agree instead of exactly NUM_GRADES per answer")
+    parser.add_argument("--batch", type=int, default=None, metavar="N",
+                        help="Request up to N grades of an answer per grader call (default: config.GRADE_BATCH_SIZE)")
+    parser.add_argument("--per-question", action="store_true", default=None,
+                        help="Grade every question as its own small request (default: config.PER_QUESTION_GRADING)")
+    parser.add_argument("--resume", default=None, metavar="RUN_ID",
+                        help="Re-queue only the pending and failed grades of an earlier run (see run_manifest.py)")
+    parser.add_argument("--cassette", choices=cassette.MODES, default=None,
+                        help="Record API responses to, or replay them from, config.CASSETTE_PATH")
+    parser.add_argument("--trace", action="store_true",
+                        help="Record a span trace of the run to config.TRACE_DIR")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="Serve live Prometheus metrics on this port (default: config.METRICS_PORT)")
+    args = parser.parse_args()
+    per_question = args.per_question if args.per_question is not None else config.PER_QUESTION_GRADING
+    if per_question and args.batch and args.batch > 1:
+        parser.error("--batch can't be combined with per-question grading (every question is its own request)")
+    if args.cassette:
+        config.CASSETTE_MODE = args.cassette
+    if args.trace:
+        config.TRACE_ENABLED = True
+    if args.metrics_port:
+        config.METRICS_PORT = args.metrics_port
+    grader.grade_all_responses(
+        use_async=args.use_async,
+        incremental=not args.full,
+        adaptive=args.adaptive,
+        batch_size=args.batch,
+        per_question=args.per_question,
+        resume=args.resume,
+    )
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Run manifests: what a benchmark or grading run planned, and how far it got.
+
+Every run of run_bench.py / run_grading.py writes config.RUNS_DIR/<kind>-<run_id>.json
+(the run ID is the cost ledger's, see cost_ledger.start_run) with the command, a
+snapshot of config.py, the planned job list and each job's state (pending, done or
+failed). Job states are checkpointed as jobs finish, at most every
+config.RUN_MANIFEST_SAVE_INTERVAL seconds and always when the run ends or is
+interrupted; every write goes to a temp file that replaces the manifest, so a crash
+never leaves a half-written one. Jobs that finished after the last checkpoint of a
+crashed run are simply redone on resume (answers on disk and current grades are
+reused, so this costs little).
+
+Re-queue only the incomplete or failed jobs of a run with:
+    python run_bench.py --resume RUN_ID
+    python run_grading.py --resume RUN_ID
+
+List runs, or show one run's unfinished jobs, with:
+    python run_manifest.py [RUN_ID]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+
+JOB_STATES = ["pending", "done", "failed"]
+
+# Fields identifying a job of each kind (the rest of a job, e.g. the student answer, is rebuilt on resume)
+JOB_FIELDS = {
+    "bench": ("model_id", "trial_num", "assignment_num"),
+    "grading": ("model_id", "trial_num", "assignment_num", "grade_num"),
+}
+
+# Settings left out of the config snapshot
+SECRET_SETTINGS = {"OPENROUTER_API_KEY"}
+
+_active: Optional["RunManifest"] = None
+
+
+def get_path(kind: str, run_id: str) -> Path:
+    """Get the manifest path of a run."""
+    return config.RUNS_DIR / f"{kind}-{run_id}.json"
+
+
+def snapshot_config() -> Dict:
+    """Get the JSON-serializable values of every setting in config.py (paths as strings)."""
+    snapshot = {}
+    for name in sorted(vars(config)):
+        if not name.isupper() or name in SECRET_SETTINGS:
+            continue
+        snapshot[name] = json.loads(json.dumps(getattr(config, name), default=str))
+    return snapshot
+
+
+def _job_key(kind: str, job: Dict) -> str:
+    return "|".join(str(job[field]) for field in JOB_FIELDS[kind])
+
+
+class RunManifest:
+    """
+    The manifest of one run. mark() is thread-safe, so workers can record their
+    jobs as they finish.
+    """
+
+    def __init__(self, path: Path, data: Dict):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    @classmethod
+    def create(cls, kind: str, run_id: str, jobs: List[Dict], options: Optional[Dict] = None) -> "RunManifest":
+        """
+        Start the manifest of a new run (saved right away, with every job pending).
+
+        Args:
+            kind: "bench" or "grading"
+            run_id: Run ID (see cost_ledger.start_run)
+            jobs: Planned jobs (only the JOB_FIELDS of each are kept)
+            options: Run options needed to resume it the same way (e.g. per_question)
+        """
+        now = datetime.now().isoformat()
+        manifest = cls(get_path(kind, run_id), {
+            "run_id": run_id,
+            "kind": kind,
+            "status": "running",
+            "created": now,
+            "updated": now,
+            "command": sys.argv,
+            "options": options or {},
+            "config": snapshot_config(),
+            "resumes": [],
+            "jobs": {},
+        })
+        manifest.plan(jobs)
+        return manifest
+
+    @classmethod
+    def load(cls, kind: str, run_id: str) -> "RunManifest":
+        """
+        Load a run's manifest to resume it.
+
+        Raises:
+            FileNotFoundError: If the run has no manifest of this kind
+        """
+        path = get_path(kind, run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No {kind} run {run_id!r} in {config.RUNS_DIR} (see python run_manifest.py)")
+        with open(path) as f:
+            manifest = cls(path, json.load(f))
+        manifest.data["status"] = "running"
+        manifest.data["resumes"].append({"started": datetime.now().isoformat(), "command": sys.argv})
+        return manifest
+
+    @property
+    def run_id(self) -> str:
+        return self.data["run_id"]
+
+    @property
+    def options(self) -> Dict:
+        return self.data["options"]
+
+    def plan(self, jobs: List[Dict]):
+        """Add jobs to the run as pending (jobs planned again, e.g. on resume, start over) and save."""
+        kind = self.data["kind"]
+        with self._lock:
+            for job in jobs:
+                self.data["jobs"][_job_key(kind, job)] = {
+                    "job": {field: job[field] for field in JOB_FIELDS[kind]},
+                    "state": "pending",
+                }
+        self.save()
+
+    def mark(self, job: Dict, success: bool, error: Optional[str] = None):
+        """Record a finished job (jobs not in the plan are ignored); saved at most every few seconds."""
+        with self._lock:
+            entry = self.data["jobs"].get(_job_key(self.data["kind"], job))
+            if entry is None:
+                return
+            entry["state"] = "done" if success else "failed"
+            entry["finished"] = datetime.now().isoformat()
+            if error and not success:
+                entry["error"] = error
+            else:
+                entry.pop("error", None)
+            due = time.monotonic() - self._last_save >= config.RUN_MANIFEST_SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def get_incomplete(self) -> List[Dict]:
+        """Get the jobs (their JOB_FIELDS) that are pending or failed."""
+        with self._lock:
+            return [dict(entry["job"]) for entry in self.data["jobs"].values() if entry["state"] != "done"]
+
+    def get_counts(self) -> Dict[str, int]:
+        """Get the number of jobs in each state."""
+        with self._lock:
+            states = [entry["state"] for entry in self.data["jobs"].values()]
+        return {state: states.count(state) for state in JOB_STATES}
+
+    def get_config_changes(self) -> List[str]:
+        """Get the settings whose value differs from the snapshot taken when the run started."""
+        snapshot = self.data["config"]
+        current = snapshot_config()
+        return sorted(name for name in snapshot.keys() | current.keys() if snapshot.get(name) != current.get(name))
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        with self._lock:
+            self.data["updated"] = datetime.now().isoformat()
+            text = json.dumps(self.data, indent=2)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp_path.replace(self.path)
+            self._last_save = time.monotonic()
+
+    def finish(self, status: Optional[str] = None):
+        """
+        Save the final state of the run.
+
+        Args:
+            status: e.g. "interrupted"; by default "complete" if every job is done, else "incomplete"
+        """
+        counts = self.get_counts()
+        if status is None:
+            status = "complete" if counts["done"] == sum(counts.values()) else "incomplete"
+        self.data["status"] = status
+        self.save()
+
+    def print_summary(self, command: str):
+        """Print the run's job counts, and how to resume it if anything is left."""
+        counts = self.get_counts()
+        print(f"Run manifest: {self.path} ({counts['done']}/{sum(counts.values())} job(s) done)")
+        left = counts["pending"] + counts["failed"]
+        if left:
+            print(f"  {left} job(s) left; re-queue them with python {command} --resume {self.run_id}")
+
+
+def activate(manifest: Optional[RunManifest]):
+    """Make a manifest the one that finished jobs are recorded in (None to stop recording)."""
+    global _active
+    _active = manifest
+
+
+def plan_active(jobs: List[Dict]):
+    """Add jobs to the active manifest, if there is one (e.g. each round of adaptive grading)."""
+    if _active is not None:
+        _active.plan(jobs)
+
+
+def mark_active(job: Dict, success: bool, error: Optional[str] = None):
+    """Record a finished job in the active manifest, if there is one."""
+    if _active is not None:
+        _active.mark(job, success, error)
+
+
+def list_runs() -> List[Dict]:
+    """Get every saved manifest, newest first."""
+    runs = []
+    for path in config.RUNS_DIR.glob("*.json") if config.RUNS_DIR.exists() else []:
+        with open(path) as f:
+            runs.append(json.load(f))
+    return sorted(runs, key=lambda run: run["created"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List run manifests or show one run's unfinished jobs.")
+    parser.add_argument("run_id", nargs="?", default=None, help="Show the pending and failed jobs of this run")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RUNS")
+    print("=" * 60)
+    runs = [run for run in list_runs() if args.run_id in (None, run["run_id"])]
+    if not runs:
+        print(f"No runs found in {config.RUNS_DIR}")
+        return
+
+    for run in runs:
+        states = [entry["state"] for entry in run["jobs"].values()]
+        counts = "  ".join(f"{state} {states.count(state)}" for state in JOB_STATES)
+        resumes = f"  (resumed {len(run['resumes'])}x)" if run["resumes"] else ""
+        print(f"{run['kind']:8s} {run['run_id']:16s} {run['status']:12s} {counts}{resumes}")
+
+        if args.run_id:
+            for entry in run["jobs"].values():
+                if entry["state"] == "done":
+                    continue
+                job = "  ".join(f"{field}={value}" for field, value in entry["job"].items())
+                error = f"  {entry['error']}" if entry.get("error") else ""
+                print(f"    {entry['state']:8s} {job}{error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Shared job scheduler for answering and grading runs.
+
+All jobs go into one flat queue that is drained by a single worker pool.
+Jobs are dispatched round-robin across providers, and each provider can be
+capped to a number of in-flight jobs via config.PROVIDER_MAX_WORKERS.
+run_jobs_async does the same on an asyncio event loop for async workers.
+Once the run's spend reaches config.BUDGET_LIMIT_USD (see cost_ledger), no new
+jobs are started; jobs in flight finish and the rest are reported as skipped.
+Both also time the run and every job, so load tests (load_test.py) can report
+job latency and worker utilization, trace each job's queue wait and run
+(see tracing.py), and keep pending/running/finished job counts in metrics.py.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from tqdm import tqdm
+
+import config
+import cost_ledger
+import metrics
+import providers
+import tracing
+
+
+def get_provider_limit(provider: str, max_workers: int) -> int:
+    """Get the maximum number of in-flight jobs allowed for a provider."""
+    limit = config.PROVIDER_MAX_WORKERS.get(provider)
+    if limit is None:
+        return max_workers
+    return max(1, min(limit, max_workers))
+
+
+def _run_traced(worker: Callable[[Dict], Dict], job: Dict, label: str, queued: float) -> Dict:
+    """Run a job on a worker thread, tracing how long it waited in the queue and how long it ran."""
+    tracing.add_span("queue_wait", queued, time.perf_counter(), "scheduler", job=label)
+    with tracing.span("job", "scheduler", job=label):
+        return worker(job)
+
+
+def run_jobs(
+    jobs: List[Dict],
+    worker: Callable[[Dict], Dict],
+    provider_of: Callable[[Dict], str] = lambda job: providers.get_provider(job["model_id"]),
+    describe: Callable[[Dict], str] = str,
+    max_workers: Optional[int] = None,
+    desc: str = "  Progress",
+    unit: str = "job",
+) -> Dict:
+    """
+    Run all jobs on one worker pool, respecting per-provider concurrency caps.
+
+    Args:
+        jobs: List of job dicts
+        worker: Function called with a job; must return a dict with a 'success' key
+        provider_of: Function mapping a job to the provider it calls
+        describe: Function giving a short label for a job (shown in the progress bar)
+        max_workers: Size of the worker pool (defaults to config.MAX_WORKERS)
+        desc: Progress bar description
+        unit: Progress bar unit
+
+    Returns:
+        Dict with 'total', 'successful', 'failed' and 'skipped' (not started because
+        the budget ran out) job counts, plus 'workers' (pool size), 'elapsed' (wall
+        seconds) and 'job_seconds' (how long each finished job took)
+    """
+    max_workers = max_workers or config.MAX_WORKERS
+
+    # One FIFO queue per provider, visited round-robin
+    pending: "OrderedDict[str, deque]" = OrderedDict()
+    for job in jobs:
+        pending.setdefault(provider_of(job), deque()).append(job)
+    in_flight = {provider: 0 for provider in pending}
+    limits = {provider: get_provider_limit(provider, max_workers) for provider in pending}
+
+    stats = {"total": len(jobs), "successful": 0, "failed": 0, "skipped": 0,
+             "workers": max_workers, "elapsed": 0.0, "job_seconds": []}
+    future_to_job = {}
+    run_start = time.perf_counter()
+    metrics.JOBS_PENDING.inc(len(jobs), unit=unit)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            tqdm(total=len(jobs), desc=desc, unit=unit) as pbar:
+
+        def dispatch():
+            """Fill free worker slots with jobs from providers that are under their cap."""
+            if pending and cost_ledger.budget_exceeded():
+                stats["skipped"] = sum(len(queue) for queue in pending.values())
+                pending.clear()
+                metrics.JOBS_PENDING.dec(stats["skipped"], unit=unit)
+                metrics.JOBS.inc(stats["skipped"], unit=unit, outcome="skipped")
+                tqdm.write(f"  ⏸️  Budget of ${config.BUDGET_LIMIT_USD:.2f} reached; "
+                           f"not starting {stats['skipped']} remaining job(s)")
+                return
+            while len(future_to_job) < max_workers:
+                submitted = False
+                for provider in list(pending):
+                    if len(future_to_job) >= max_workers:
+                        break
+                    if in_flight[provider] >= limits[provider]:
+                        continue
+                    job = pending[provider].popleft()
+                    if not pending[provider]:
+                        del pending[provider]
+                    else:
+                        # Rotate so the next dispatch starts with another provider
+                        pending.move_to_end(provider)
+                    in_flight[provider] += 1
+                    metrics.JOBS_PENDING.dec(unit=unit)
+                    metrics.JOBS_RUNNING.inc(unit=unit)
+                    future = executor.submit(_run_traced, worker, job, describe(job), run_start)
+                    future_to_job[future] = (provider, job, time.perf_counter())
+                    submitted = True
+                if not submitted:
+                    return
+
+        dispatch()
+        while future_to_job:
+            done, _ = wait(future_to_job, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider, job, job_start = future_to_job.pop(future)
+                in_flight[provider] -= 1
+                # Jobs are only submitted when a worker is free, so this is the job's run time
+                stats["job_seconds"].append(time.perf_counter() - job_start)
+                label = describe(job)
+
+                try:
+                    result = future.result()
+                    outcome = "successful" if result["success"] else "failed"
+                    pbar.set_postfix_str(f"{label} {'✓' if result['success'] else '✗'}")
+                except Exception as e:
+                    outcome = "failed"
+                    tqdm.write(f"  ❌ Exception processing {label}: {e}")
+                stats[outcome] += 1
+                metrics.JOBS_RUNNING.dec(unit=unit)
+                metrics.JOBS.inc(unit=unit, outcome=outcome)
+
+                pbar.update(1)
+            dispatch()
+
+    stats["elapsed"] = time.perf_counter() - run_start
+    return stats
+
+
+async def run_jobs_async(
+    jobs: List[Dict],
+    worker: Callable[[Dict], Awaitable[Dict]],
+    provider_of: Callable[[Dict], str] = lambda job: providers.get_provider(job["model_id"]),
+    describe: Callable[[Dict], str] = str,
+    max_in_flight: Optional[int] = None,
+    desc: str = "  Progress",
+    unit: str = "job",
+) -> Dict:
+    """
+    Async version of run_jobs: runs every job as a task on the current event loop.
+
+    Args:
+        jobs: List of job dicts
+        worker: Coroutine function called with a job; must return a dict with a 'success' key
+        provider_of: Function mapping a job to the provider it calls
+        describe: Function giving a short label for a job (shown in the progress bar)
+        max_in_flight: Maximum concurrent jobs (defaults to config.ASYNC_MAX_IN_FLIGHT)
+        desc: Progress bar description
+        unit: Progress bar unit
+
+    Returns:
+        Dict with 'total', 'successful', 'failed' and 'skipped' job counts, plus
+        'workers' (max_in_flight), 'elapsed' and 'job_seconds' as in run_jobs
+    """
+    max_in_flight = max_in_flight or config.ASYNC_MAX_IN_FLIGHT
+    global_slots = asyncio.Semaphore(max_in_flight)
+    provider_slots = {}
+    for job in jobs:
+        provider = provider_of(job)
+        if provider not in provider_slots:
+            provider_slots[provider] = asyncio.Semaphore(get_provider_limit(provider, max_in_flight))
+
+    stats = {"total": len(jobs), "successful": 0, "failed": 0, "skipped": 0,
+             "workers": max_in_flight, "elapsed": 0.0, "job_seconds": []}
+    run_start = time.perf_counter()
+    metrics.JOBS_PENDING.inc(len(jobs), unit=unit)
+
+    with tqdm(total=len(jobs), desc=desc, unit=unit) as pbar:
+
+        async def run_one(job: Dict):
+            label = describe(job)
+            async with provider_slots[provider_of(job)], global_slots:
+                metrics.JOBS_PENDING.dec(unit=unit)
+                if cost_ledger.budget_exceeded():
+                    if not stats["skipped"]:
+                        tqdm.write(f"  ⏸️  Budget of ${config.BUDGET_LIMIT_USD:.2f} reached; "
+                                   f"not starting the remaining job(s)")
+                    stats["skipped"] += 1
+                    metrics.JOBS.inc(unit=unit, outcome="skipped")
+                    pbar.update(1)
+                    return
+                job_start = time.perf_counter()
+                tracing.add_span("queue_wait", run_start, job_start, "scheduler", job=label)
+                metrics.JOBS_RUNNING.inc(unit=unit)
+                try:
+                    with tracing.span("job", "scheduler", job=label):
+                        result = await worker(job)
+                    outcome = "successful" if result["success"] else "failed"
+                    pbar.set_postfix_str(f"{label} {'✓' if result['success'] else '✗'}")
+                except Exception as e:
+                    outcome = "failed"
+                    tqdm.write(f"  ❌ Exception processing {label}: {e}")
+                stats[outcome] += 1
+                stats["job_seconds"].append(time.perf_counter() - job_start)
+                metrics.JOBS_RUNNING.dec(unit=unit)
+                metrics.JOBS.inc(unit=unit, outcome=outcome)
+            pbar.update(1)
+
+        await asyncio.gather(*(run_one(job) for job in jobs))
+
+    stats["elapsed"] = time.perf_counter() - run_start
+    return stats
@@ -0,0 +1,31 @@
+"""Tests for analysis/stats.py."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The analysis scripts import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "analysis"))
+import stats
+
+
+def test_bootstrap_model_cis_model_without_scores():
+    # Model "b" only has a failed grade (NaN score, as load_grades gives for unparsed grades)
+    df = pd.DataFrame({
+        "tested_model": ["a", "a", "a", "a", "b"],
+        "assignment": [1, 1, 2, 2, 1],
+        "trial": [0, 0, 0, 0, 0],
+        "grade_num": [0, 1, 0, 1, 0],
+        "normalized_score": [0.5, 0.75, 1.0, 0.25, np.nan],
+    })
+
+    table = stats.bootstrap_model_cis(df, iterations=200, seed=0)
+
+    assert list(table.index) == ["a", "b"]
+    assert table.loc["a", "mean"] == 0.625
+    assert table.loc["a", "n_grades"] == 4
+    assert table.loc["b", ["mean", "ci_low", "ci_high", "std_error"]].isna().all()
+    assert table.loc["b", "n_assignments"] == 0
+    assert table.loc["b", "n_grades"] == 0
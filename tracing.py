@@ -0,0 +1,164 @@
+"""
+Span-based tracing of answering and grading runs (Chrome trace format).
+
+With config.TRACE_ENABLED set (or --trace on run_bench.py / run_grading.py),
+every stage of a job records a span: the wait in the scheduler queue, the job
+itself, building the request (image encoding), rate-limit waits, serializing the
+payload, each HTTP attempt, parsing the response and the grade, and saving
+results to disk. Spans are kept in memory and written as one JSON file per run
+to config.TRACE_DIR. Open it in https://ui.perfetto.dev or chrome://tracing.
+
+Worker threads and asyncio tasks each get their own track. Waits measured after
+the fact (queue waits) overlap, so they are written as async events that the
+viewer gives their own lanes. When tracing is off, span() costs one config check.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+
+_events: List[Dict] = []
+_tracks: Dict = {}
+_lock = threading.Lock()
+_epoch = time.perf_counter()
+_async_ids = iter(range(1, 1 << 62))
+
+
+def enabled() -> bool:
+    """Whether spans are being recorded."""
+    return config.TRACE_ENABLED
+
+
+def reset():
+    """Drop recorded spans and restart the trace clock (call at the start of a run)."""
+    global _epoch
+    with _lock:
+        _events.clear()
+        _tracks.clear()
+        _epoch = time.perf_counter()
+
+
+def _microseconds(t: float) -> float:
+    """Convert a time.perf_counter() value into trace time."""
+    return round((t - _epoch) * 1e6, 1)
+
+
+def _track() -> int:
+    """Get the trace thread ID for the current asyncio task or thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    key = ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+
+    with _lock:
+        tid = _tracks.get(key)
+        if tid is None:
+            tid = _tracks[key] = len(_tracks) + 1
+            name = f"task {tid}" if task is not None else threading.current_thread().name
+            _events.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": name}})
+    return tid
+
+
+@contextmanager
+def span(name: str, category: str = "pipeline", **args):
+    """
+    Record the enclosed block as a span on the current thread's (or task's) track.
+
+    Yields a dict of span arguments; anything added to it (e.g. an HTTP status)
+    is saved with the span.
+    """
+    if not config.TRACE_ENABLED:
+        yield args
+        return
+
+    tid = _track()
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        event = {
+            "ph": "X", "name": name, "cat": category, "pid": 1, "tid": tid,
+            "ts": _microseconds(start), "dur": round((end - start) * 1e6, 1), "args": args,
+        }
+        with _lock:
+            _events.append(event)
+
+
+def add_span(name: str, start: float, end: float, category: str = "pipeline", **args):
+    """
+    Record a span measured elsewhere (time.perf_counter() start/end), e.g. a queue wait.
+    Written as an async event, so overlapping spans get their own lanes.
+    """
+    if not config.TRACE_ENABLED:
+        return
+    with _lock:
+        span_id = next(_async_ids)
+        common = {"name": name, "cat": category, "pid": 1, "tid": 0, "id": span_id}
+        _events.append({**common, "ph": "b", "ts": _microseconds(start), "args": args})
+        _events.append({**common, "ph": "e", "ts": _microseconds(end)})
+
+
+def get_durations() -> Dict[str, List[float]]:
+    """Get the recorded durations (seconds) of every span name."""
+    durations: Dict[str, List[float]] = {}
+    with _lock:
+        events = list(_events)
+    begins = {}
+    for event in events:
+        if event["ph"] == "X":
+            durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+        elif event["ph"] == "b":
+            begins[event["id"]] = event["ts"]
+        elif event["ph"] == "e":
+            durations.setdefault(event["name"], []).append((event["ts"] - begins.pop(event["id"])) / 1e6)
+    return durations
+
+
+def save(path: Path) -> Path:
+    """Write the recorded spans as a Chrome trace JSON file."""
+    with _lock:
+        events = [{"ph": "M", "name": "process_name", "pid": 1, "args": {"name": "civbench"}}] + list(_events)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file first so a viewer never loads a partial trace
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    tmp_path.replace(path)
+    return path
+
+
+def print_summary():
+    """Print count, total and mean/p95/max duration per span name, largest total first."""
+    durations = get_durations()
+    if not durations:
+        return
+    width = max(len(name) for name in durations)
+    print(f"{'span':{width}s} {'count':>7s} {'total s':>9s} {'mean ms':>9s} {'p95 ms':>9s} {'max ms':>9s}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        ordered = sorted(values)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        print(f"{name:{width}s} {len(values):7d} {sum(values):9.2f} {1e3 * sum(values) / len(values):9.1f} "
+              f"{1e3 * p95:9.1f} {1e3 * ordered[-1]:9.1f}")
+
+
+def finish(name: str) -> Optional[Path]:
+    """
+    Save the run's trace as config.TRACE_DIR/<name>.json and print where its time went.
+
+    Returns:
+        The trace path, or None if tracing is off
+    """
+    if not config.TRACE_ENABLED:
+        return None
+    path = save(config.TRACE_DIR / f"{name}.json")
+    print(f"\nTrace saved to: {path} (open in https://ui.perfetto.dev)")
+    print_summary()
+    return path